@@ -1,7 +1,9 @@
+import click
 from flask import Flask, jsonify
 
 from config import Config
-from models.database import close_db, init_db
+from models.database import close_db, get_db, init_db
+from utils.job_runner import job_runner
 from controllers import (
     auth_bp, dashboard_bp, admin_bp, inventory_bp, conformity_bp,
     repotentiation_bp, destruction_bp, reports_bp, bulk_upload_bp
@@ -26,6 +28,11 @@ def create_app():
     # Cerrar conexión de BD al terminar
     app.teardown_appcontext(close_db)
 
+    # Hilo de trabajos de carga en segundo plano (uno por worker, arranca con el primer request)
+    @app.before_request
+    def start_job_runner():
+        job_runner.ensure_started(app)
+
     # Health check endpoint
     @app.route("/health")
     def health():
@@ -55,6 +62,83 @@ def init_db_command():
     print("Base de datos inicializada.")
 
 
+@app.cli.command("backfill-phases")
+def backfill_phases_command():
+    """Recalcula la columna fase tras cambiar PROJECT_PHASES"""
+    from models.project import ProjectRecord
+    with app.app_context():
+        updated = ProjectRecord.backfill_phases(get_db())
+    print(f"Fases recalculadas: {updated} registros actualizados.")
+
+
+@app.cli.command("snapshot-progress")
+@click.option("--date", "snapshot_date", default=None, help="Fecha de la foto (YYYY-MM-DD, por defecto hoy)")
+def snapshot_progress_command(snapshot_date):
+    """Guarda la foto diaria de avance (ejecutar una vez al dia, p. ej. con cron)"""
+    from models.progress import ProgressSnapshot
+    from utils.helpers import coerce_iso_date
+    day = coerce_iso_date(snapshot_date) if snapshot_date else None
+    if snapshot_date and not day:
+        raise click.BadParameter("Usa el formato YYYY-MM-DD", param_hint="--date")
+    with app.app_context():
+        rows = ProgressSnapshot.capture(get_db(), day)
+    print(f"Foto de avance guardada: {rows} filas.")
+
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command():
+    """Falla si alguna consulta caliente recorre una tabla completa"""
+    from models.query_plan import audit_query_plans
+    with app.app_context():
+        results = audit_query_plans(get_db())
+
+    failures = 0
+    for result in results:
+        status = "FULL SCAN" if result["full_scans"] else "OK"
+        print(f"[{status}] {result['name']}")
+        if result["full_scans"]:
+            failures += 1
+            print(f"    {result['sql']}")
+            for detail in result["plan"]:
+                print(f"      {detail}")
+    print(f"{len(results)} consultas analizadas, {failures} con recorrido completo.")
+    if failures:
+        raise SystemExit(1)
+
+
+@app.cli.command("reconcile-uploads")
+@click.option("--remove", is_flag=True, help="Borra los huerfanos y corrige los registros sin archivo")
+def reconcile_uploads_command(remove):
+    """Concilia uploads/ con la base y actualiza los totales de espacio (p. ej. con cron)"""
+    from models.storage import UploadReconciler
+    with app.app_context():
+        report = UploadReconciler.run(get_db(), remove=remove)
+
+    for item in report["dangling_sample"]:
+        print(f"[SIN ARCHIVO] {item['table']} #{item['id']}: {item['path']}")
+    for item in report["orphan_sample"]:
+        print(f"[HUERFANO] {item['path']} ({item['bytes']} bytes)")
+    print(
+        f"{report['rows_checked']} registros y {report['files_checked']} archivos revisados: "
+        f"{report['dangling']} registros sin archivo, {report['orphans']} huerfanos "
+        f"({report['orphan_bytes']} bytes), {report['refcounts']} conteos de blobs desalineados."
+    )
+    if remove:
+        print(f"Corregido: {report['orphans_removed']} huerfanos borrados.")
+
+
+@app.cli.command("run-jobs")
+@click.option("--once", is_flag=True, help="Procesa la cola pendiente y termina")
+def run_jobs_command(once):
+    """Procesa los trabajos de carga masiva en primer plano"""
+    import time
+    while True:
+        if not job_runner.run_once(app):
+            if once:
+                break
+            time.sleep(app.config["JOB_POLL_INTERVAL"])
+
+
 if __name__ == "__main__":
     with app.app_context():
         init_db()
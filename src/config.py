@@ -1,5 +1,6 @@
 import os
 import secrets
+from functools import lru_cache
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -13,11 +14,45 @@ class Config:
     # Limite global de subida (500MB para videos de evidencia)
     MAX_CONTENT_LENGTH = 500 * 1024 * 1024
     INITIAL_ADMIN_PASSWORD = os.environ.get("BANBIF_ADMIN_CODE")
+    # Ajustes de conexion SQLite (compartida por todos los workers de gunicorn)
+    SQLITE_JOURNAL_MODE = os.environ.get("BANBIF_SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("BANBIF_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_SYNCHRONOUS = os.environ.get("BANBIF_SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.environ.get("BANBIF_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Negativo = KiB (SQLite); -16000 son ~16MB de cache de paginas por conexion
+    SQLITE_CACHE_SIZE = int(os.environ.get("BANBIF_SQLITE_CACHE_SIZE", "-16000"))
+    # Conexiones ociosas que conserva cada worker (0 = abrir y cerrar en cada request)
+    SQLITE_POOL_SIZE = int(os.environ.get("BANBIF_SQLITE_POOL_SIZE", "4"))
+    # Segundos entre ejecuciones de PRAGMA optimize por proceso (0 = desactivado)
+    SQLITE_OPTIMIZE_INTERVAL = int(os.environ.get("BANBIF_SQLITE_OPTIMIZE_INTERVAL", "3600"))
+    # Trabajos de carga masiva en segundo plano (hilo por worker; 0 = usar `flask run-jobs`)
+    JOB_WORKER_ENABLED = os.environ.get("BANBIF_JOB_WORKER", "1") != "0"
+    JOB_POLL_INTERVAL = float(os.environ.get("BANBIF_JOB_POLL_INTERVAL", "2"))
+    # Segundos sin avance tras los cuales otro worker retoma un trabajo en proceso
+    JOB_STALE_AFTER = int(os.environ.get("BANBIF_JOB_STALE_AFTER", "120"))
+    # Veces que se toma un trabajo antes de darlo por fallido (p. ej. si tumba al worker)
+    JOB_MAX_ATTEMPTS = int(os.environ.get("BANBIF_JOB_MAX_ATTEMPTS", "3"))
+    # Eventos de cambio de datos (/api/events): sondeo de PRAGMA data_version por
+    # worker, latido para proxies y vida maxima de cada conexion SSE (segundos)
+    EVENTS_POLL_INTERVAL = float(os.environ.get("BANBIF_EVENTS_POLL_INTERVAL", "0.5"))
+    EVENTS_HEARTBEAT = float(os.environ.get("BANBIF_EVENTS_HEARTBEAT", "15"))
+    EVENTS_MAX_AGE = float(os.environ.get("BANBIF_EVENTS_MAX_AGE", "300"))
+    # Entrega de videos y actas: "" = la app transmite el archivo (con Range y
+    # ETag); "x-accel" = nginx (X-Accel-Redirect); "x-sendfile" = Apache/lighttpd
+    EVIDENCE_DELIVERY = os.environ.get("BANBIF_EVIDENCE_DELIVERY", "").strip().lower()
+    # Location interna de nginx que apunta a uploads/ (solo con "x-accel")
+    EVIDENCE_ACCEL_PREFIX = os.environ.get("BANBIF_EVIDENCE_ACCEL_PREFIX", "/protected-uploads/")
 
 # Limites especificos por tipo de archivo
 MAX_ACTA_SIZE = 50 * 1024 * 1024      # 50MB para PDFs y MSGs
 MAX_VIDEO_SIZE = 500 * 1024 * 1024    # 500MB para videos de evidencia
 
+# Cache de resumenes compartida entre workers (entradas maximas antes de expulsar)
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("BANBIF_SUMMARY_CACHE_MAX_ENTRIES", "256"))
+
+# Filas por lote en las cargas masivas (executemany dentro de una sola transaccion)
+BULK_CHUNK_SIZE = int(os.environ.get("BANBIF_BULK_CHUNK_SIZE", "500"))
+
 PROJECT_COLUMNS = [
     "record_id",
     "ubicacion",
@@ -83,6 +118,7 @@ PROJECT_PHASES = {
     },
 }
 
+@lru_cache(maxsize=256)
 def get_phase_from_category(categoria: str) -> str:
     """Determina la fase a partir de la categoría de trabajo"""
     if not categoria:
@@ -1,19 +1,53 @@
 import csv
-import io
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_from_directory
+import sqlite3
+import time
+import uuid
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, flash, send_from_directory, current_app,
+    jsonify, g,
+)
 
 from models.database import get_db
-from models.project import ProjectRecord
 from models.component import RAMUnit, SSDUnit, COMPONENT_STATUS
 from models.repotentiation import RepotentiationRecord
 from models.destruction import DiskDestruction, DESTRUCTION_STATUS
-from config import CSV_FIELD_MAP, BASE_DIR
+from models.upload_job import UploadJob, JOBS_DIR, UPLOAD_MODES
+from config import BASE_DIR, BULK_CHUNK_SIZE
 from utils.decorators import login_required, admin_required
-from utils.helpers import normalize_header, normalize_date
+from utils.helpers import normalize_date
+from utils.ingest import read_csv_rows, chunked
+from utils.job_runner import job_runner
 
 bulk_upload_bp = Blueprint('bulk_upload', __name__, url_prefix='/carga-masiva')
 
 
+def _ingest_csv(file, field_map: dict, handle_chunk, skip_empty: bool = True):
+    """Procesa el CSV en lotes de BULK_CHUNK_SIZE filas dentro de una sola transaccion.
+
+    `handle_chunk(db, filas)` recibe listas de (numero de linea, fila mapeada).
+    Retorna None si todo se confirmo, o el mensaje de error si se revirtio la carga.
+    """
+    db = get_db()
+    rows = read_csv_rows(file.stream, field_map, skip_empty=skip_empty)
+    try:
+        for chunk in chunked(rows, BULK_CHUNK_SIZE):
+            handle_chunk(db, chunk)
+    except UnicodeDecodeError:
+        db.rollback()
+        return "No se pudo decodificar el archivo. Usa UTF-8."
+    except csv.Error as exc:
+        db.rollback()
+        return f"El archivo CSV no es valido: {exc}"
+    except sqlite3.Error:
+        db.rollback()
+        current_app.logger.exception("Error en carga masiva")
+        return "No se pudo guardar la carga; no se aplico ningun cambio."
+    finally:
+        rows.close()
+    db.commit()
+    return None
+
+
 # ============================================================================
 # CARGA DE AVANCES (project_records)
 # ============================================================================
@@ -30,61 +64,70 @@ def index():
 @login_required
 @admin_required
 def upload_progress():
-    """Carga masiva de avances del proyecto"""
-    summary = None
+    """Carga masiva de avances del proyecto (procesada en segundo plano)"""
+    db = get_db()
     if request.method == "POST":
         file = request.files.get("file")
         if not file or not file.filename:
             flash("Selecciona un archivo CSV", "danger")
-            return render_template("bulk_upload/avances.html", summary=summary)
+            return redirect(url_for("bulk_upload.upload_progress"))
         if not file.filename.lower().endswith(".csv"):
             flash("El archivo debe tener formato .csv", "danger")
-            return render_template("bulk_upload/avances.html", summary=summary)
-
-        try:
-            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            flash("No se pudo decodificar el archivo. Usa UTF-8.", "danger")
-            return render_template("bulk_upload/avances.html", summary=summary)
-
-        reader = csv.DictReader(stream)
-        mapped_rows = []
-        for raw_row in reader:
-            normalized_row = {}
-            for header, value in raw_row.items():
-                key = CSV_FIELD_MAP.get(normalize_header(header))
-                if not key:
-                    continue
-                if isinstance(value, str):
-                    value = value.strip()
-                normalized_row[key] = value
-            if not normalized_row.get("record_id"):
-                continue
-            for field in ("estado", "estado_coordinacion", "estado_upgrade"):
-                if field in normalized_row and isinstance(normalized_row[field], str):
-                    normalized_row[field] = normalized_row[field].upper()
-            for field in ("fecha_estado", "fecha_programada", "fecha_ejecucion"):
-                if field in normalized_row:
-                    normalized_row[field] = normalize_date(normalized_row[field])
-            mapped_rows.append(normalized_row)
-
-        if not mapped_rows:
-            flash("No se encontraron registros validos en el CSV.", "warning")
-            return render_template("bulk_upload/avances.html", summary=summary)
-
-        db = get_db()
-        inserted = 0
-        updated = 0
-        for row in mapped_rows:
-            rowcount = ProjectRecord.upsert_record(db, row)
-            if rowcount == 1:
-                inserted += 1
-            else:
-                updated += 1
-        db.commit()
-        summary = {"inserted": inserted, "updated": updated, "total": inserted + updated}
-        flash("Carga procesada correctamente", "success")
-    return render_template("bulk_upload/avances.html", summary=summary)
+            return redirect(url_for("bulk_upload.upload_progress"))
+
+        mode = request.form.get("mode", "full")
+        if mode not in UPLOAD_MODES:
+            mode = "full"
+        mark_missing = mode == "delta" and request.form.get("mark_missing") == "1"
+
+        file_path, total_rows = _store_job_file(file)
+        job_id = UploadJob.create(
+            db, "avances", str(file_path), file.filename, total_rows, g.user["username"],
+            mode=mode, mark_missing=mark_missing,
+        )
+        job_runner.ensure_started(current_app._get_current_object())
+        job_runner.notify()
+        flash("Archivo recibido; la carga se procesa en segundo plano.", "info")
+        return redirect(url_for("bulk_upload.upload_progress", job=job_id))
+
+    job = None
+    job_id = request.args.get("job", type=int)
+    if job_id:
+        row = UploadJob.get_by_id(db, job_id)
+        job = UploadJob.to_dict(row) if row else None
+    recent_jobs = [UploadJob.to_dict(row) for row in UploadJob.get_recent(db, "avances")]
+    return render_template(
+        "bulk_upload/avances.html", job=job, recent_jobs=recent_jobs, upload_modes=UPLOAD_MODES
+    )
+
+
+@bulk_upload_bp.route("/jobs/<int:job_id>")
+@login_required
+@admin_required
+def job_status(job_id: int):
+    """Estado y avance de un trabajo de carga (JSON)"""
+    job = UploadJob.get_by_id(get_db(), job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(UploadJob.to_dict(job))
+
+
+def _store_job_file(file):
+    """Guarda la subida en JOBS_DIR por bloques; retorna (ruta, filas de datos aproximadas)"""
+    file_path = JOBS_DIR / f"{uuid.uuid4().hex}.csv"
+    lines = 0
+    last_byte = b"\n"
+    with open(file_path, "wb") as target:
+        while True:
+            block = file.stream.read(1024 * 1024)
+            if not block:
+                break
+            target.write(block)
+            lines += block.count(b"\n")
+            last_byte = block[-1:]
+    if last_byte != b"\n":
+        lines += 1
+    return file_path, max(lines - 1, 0)
 
 
 @bulk_upload_bp.route("/avances/plantilla")
@@ -113,6 +156,78 @@ def download_progress_template():
     return send_from_directory(template_path.parent, template_path.name, as_attachment=True)
 
 
+# ============================================================================
+# COMPONENTES (RAM / SSD)
+# ============================================================================
+
+def _validate_component_row(normalized_row: dict):
+    """Valida una fila mapeada de RAM/SSD; retorna (fila, None) o (None, mensaje de error)"""
+    if not normalized_row.get("serial_num"):
+        return None, "Serial requerido"
+
+    # Validar capacidad
+    try:
+        capacidad = int(normalized_row.get("capacidad_gb", 0))
+    except ValueError:
+        return None, "Capacidad debe ser numero"
+    if capacidad <= 0:
+        return None, "Capacidad invalida"
+    normalized_row["capacidad_gb"] = capacidad
+
+    # Validar estado
+    estado = normalized_row.get("estado", "POR_ENTREGAR").upper().replace(" ", "_")
+    if estado not in COMPONENT_STATUS:
+        estado = "POR_ENTREGAR"
+    normalized_row["estado"] = estado
+
+    # Velocidad opcional (solo RAM)
+    if normalized_row.get("velocidad_mhz"):
+        try:
+            normalized_row["velocidad_mhz"] = int(normalized_row["velocidad_mhz"])
+        except ValueError:
+            normalized_row["velocidad_mhz"] = None
+    return normalized_row, None
+
+
+def _ingest_components(file, model, field_map: dict):
+    """Carga RAM/SSD por lotes (validacion + bulk_upsert); retorna (resumen, error)"""
+    started = time.perf_counter()
+    totals = {"inserted": 0, "updated": 0, "validation": 0.0, "write": 0.0}
+    errors = []
+
+    def handle_chunk(db, chunk):
+        begin = time.perf_counter()
+        valid_rows = []
+        for row_num, row in chunk:
+            normalized_row, error = _validate_component_row(row)
+            if error:
+                errors.append(f"Fila {row_num}: {error}")
+            else:
+                valid_rows.append(normalized_row)
+        validated = time.perf_counter()
+        inserted, updated = model.bulk_upsert(db, valid_rows)
+        totals["inserted"] += inserted
+        totals["updated"] += updated
+        totals["validation"] += validated - begin
+        totals["write"] += time.perf_counter() - validated
+
+    error = _ingest_csv(file, field_map, handle_chunk)
+    if error:
+        return None, error
+
+    return {
+        "inserted": totals["inserted"],
+        "updated": totals["updated"],
+        "total": totals["inserted"] + totals["updated"],
+        "errors": errors,
+        "timing": {
+            "validation_ms": round(totals["validation"] * 1000),
+            "write_ms": round(totals["write"] * 1000),
+            "total_ms": round((time.perf_counter() - started) * 1000),
+        },
+    }, None
+
+
 # ============================================================================
 # CARGA DE RAM
 # ============================================================================
@@ -152,66 +267,11 @@ def upload_ram():
             flash("El archivo debe tener formato .csv", "danger")
             return render_template("bulk_upload/ram.html", summary=summary, estados=COMPONENT_STATUS)
 
-        try:
-            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            flash("No se pudo decodificar el archivo. Usa UTF-8.", "danger")
-            return render_template("bulk_upload/ram.html", summary=summary, estados=COMPONENT_STATUS)
-
-        reader = csv.DictReader(stream)
-        db = get_db()
-        inserted = 0
-        updated = 0
-        errors = []
-
-        for row_num, raw_row in enumerate(reader, start=2):
-            normalized_row = {}
-            for header, value in raw_row.items():
-                key = RAM_CSV_FIELDS.get(normalize_header(header))
-                if key and value:
-                    normalized_row[key] = value.strip()
-
-            serial = normalized_row.get("serial_num")
-            if not serial:
-                errors.append(f"Fila {row_num}: Serial requerido")
-                continue
-
-            # Validar capacidad
-            try:
-                capacidad = int(normalized_row.get("capacidad_gb", 0))
-                if capacidad <= 0:
-                    errors.append(f"Fila {row_num}: Capacidad invalida")
-                    continue
-                normalized_row["capacidad_gb"] = capacidad
-            except ValueError:
-                errors.append(f"Fila {row_num}: Capacidad debe ser numero")
-                continue
-
-            # Validar estado
-            estado = normalized_row.get("estado", "POR_ENTREGAR").upper().replace(" ", "_")
-            if estado not in COMPONENT_STATUS:
-                estado = "POR_ENTREGAR"
-            normalized_row["estado"] = estado
-
-            # Velocidad opcional
-            if normalized_row.get("velocidad_mhz"):
-                try:
-                    normalized_row["velocidad_mhz"] = int(normalized_row["velocidad_mhz"])
-                except ValueError:
-                    normalized_row["velocidad_mhz"] = None
-
-            # Verificar si existe
-            existing = RAMUnit.get_by_serial(db, serial)
-            if existing:
-                RAMUnit.update(db, existing["id"], normalized_row)
-                updated += 1
-            else:
-                RAMUnit.create(db, normalized_row)
-                inserted += 1
-
-        summary = {"inserted": inserted, "updated": updated, "total": inserted + updated, "errors": errors}
-        if errors:
-            flash(f"Carga completada con {len(errors)} errores", "warning")
+        summary, error = _ingest_components(file, RAMUnit, RAM_CSV_FIELDS)
+        if error:
+            flash(error, "danger")
+        elif summary["errors"]:
+            flash(f"Carga completada con {len(summary['errors'])} errores", "warning")
         else:
             flash("Carga procesada correctamente", "success")
 
@@ -271,59 +331,11 @@ def upload_ssd():
             flash("El archivo debe tener formato .csv", "danger")
             return render_template("bulk_upload/ssd.html", summary=summary, estados=COMPONENT_STATUS)
 
-        try:
-            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            flash("No se pudo decodificar el archivo. Usa UTF-8.", "danger")
-            return render_template("bulk_upload/ssd.html", summary=summary, estados=COMPONENT_STATUS)
-
-        reader = csv.DictReader(stream)
-        db = get_db()
-        inserted = 0
-        updated = 0
-        errors = []
-
-        for row_num, raw_row in enumerate(reader, start=2):
-            normalized_row = {}
-            for header, value in raw_row.items():
-                key = SSD_CSV_FIELDS.get(normalize_header(header))
-                if key and value:
-                    normalized_row[key] = value.strip()
-
-            serial = normalized_row.get("serial_num")
-            if not serial:
-                errors.append(f"Fila {row_num}: Serial requerido")
-                continue
-
-            # Validar capacidad
-            try:
-                capacidad = int(normalized_row.get("capacidad_gb", 0))
-                if capacidad <= 0:
-                    errors.append(f"Fila {row_num}: Capacidad invalida")
-                    continue
-                normalized_row["capacidad_gb"] = capacidad
-            except ValueError:
-                errors.append(f"Fila {row_num}: Capacidad debe ser numero")
-                continue
-
-            # Validar estado
-            estado = normalized_row.get("estado", "POR_ENTREGAR").upper().replace(" ", "_")
-            if estado not in COMPONENT_STATUS:
-                estado = "POR_ENTREGAR"
-            normalized_row["estado"] = estado
-
-            # Verificar si existe
-            existing = SSDUnit.get_by_serial(db, serial)
-            if existing:
-                SSDUnit.update(db, existing["id"], normalized_row)
-                updated += 1
-            else:
-                SSDUnit.create(db, normalized_row)
-                inserted += 1
-
-        summary = {"inserted": inserted, "updated": updated, "total": inserted + updated, "errors": errors}
-        if errors:
-            flash(f"Carga completada con {len(errors)} errores", "warning")
+        summary, error = _ingest_components(file, SSDUnit, SSD_CSV_FIELDS)
+        if error:
+            flash(error, "danger")
+        elif summary["errors"]:
+            flash(f"Carga completada con {len(summary['errors'])} errores", "warning")
         else:
             flash("Carga procesada correctamente", "success")
 
@@ -393,52 +405,45 @@ def upload_repotentiation():
             flash("El archivo debe tener formato .csv", "danger")
             return render_template("bulk_upload/repotenciacion.html", summary=summary)
 
-        try:
-            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            flash("No se pudo decodificar el archivo. Usa UTF-8.", "danger")
-            return render_template("bulk_upload/repotenciacion.html", summary=summary)
-
-        reader = csv.DictReader(stream)
-        db = get_db()
-        inserted = 0
+        counts = {"inserted": 0}
         errors = []
 
-        for row_num, raw_row in enumerate(reader, start=2):
-            normalized_row = {}
-            for header, value in raw_row.items():
-                key = REPOT_CSV_FIELDS.get(normalize_header(header))
-                if key and value:
-                    normalized_row[key] = value.strip()
-
-            equipo_serial = normalized_row.get("equipo_serial")
-            if not equipo_serial:
-                errors.append(f"Fila {row_num}: Serial de equipo requerido")
-                continue
-
-            fecha = normalized_row.get("fecha_repotenciacion")
-            if not fecha:
-                errors.append(f"Fila {row_num}: Fecha de repotenciacion requerida")
-                continue
-
-            # Normalizar fecha
-            normalized_row["fecha_repotenciacion"] = normalize_date(fecha)
-
-            # Convertir campos numericos
-            for field in ["ram_antes_gb", "ram_despues_gb", "disco_antes_capacidad_gb", "disco_despues_capacidad_gb"]:
-                if normalized_row.get(field):
-                    try:
-                        normalized_row[field] = int(normalized_row[field])
-                    except ValueError:
-                        normalized_row[field] = None
+        def handle_chunk(db, chunk):
+            for row_num, normalized_row in chunk:
+                equipo_serial = normalized_row.get("equipo_serial")
+                if not equipo_serial:
+                    errors.append(f"Fila {row_num}: Serial de equipo requerido")
+                    continue
+
+                fecha = normalized_row.get("fecha_repotenciacion")
+                if not fecha:
+                    errors.append(f"Fila {row_num}: Fecha de repotenciacion requerida")
+                    continue
+
+                # Normalizar fecha
+                normalized_row["fecha_repotenciacion"] = normalize_date(fecha)
+
+                # Convertir campos numericos
+                for field in ["ram_antes_gb", "ram_despues_gb", "disco_antes_capacidad_gb", "disco_despues_capacidad_gb"]:
+                    if normalized_row.get(field):
+                        try:
+                            normalized_row[field] = int(normalized_row[field])
+                        except ValueError:
+                            normalized_row[field] = None
+
+                # Campo booleano
+                destruido = normalized_row.get("disco_extraido_destruido", "").upper()
+                normalized_row["disco_extraido_destruido"] = 1 if destruido in ("1", "SI", "YES", "TRUE") else 0
 
-            # Campo booleano
-            destruido = normalized_row.get("disco_extraido_destruido", "").upper()
-            normalized_row["disco_extraido_destruido"] = 1 if destruido in ("1", "SI", "YES", "TRUE") else 0
+                RepotentiationRecord.create(db, normalized_row, commit=False)
+                counts["inserted"] += 1
 
-            RepotentiationRecord.create(db, normalized_row)
-            inserted += 1
+        error = _ingest_csv(file, REPOT_CSV_FIELDS, handle_chunk)
+        if error:
+            flash(error, "danger")
+            return render_template("bulk_upload/repotenciacion.html", summary=summary)
 
+        inserted = counts["inserted"]
         summary = {"inserted": inserted, "total": inserted, "errors": errors}
         if errors:
             flash(f"Carga completada con {len(errors)} errores", "warning")
@@ -529,57 +534,49 @@ def upload_destruction():
             flash("El archivo debe tener formato .csv", "danger")
             return render_template("bulk_upload/destruccion.html", summary=summary, estados=DESTRUCTION_STATUS)
 
-        try:
-            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            flash("No se pudo decodificar el archivo. Usa UTF-8.", "danger")
-            return render_template("bulk_upload/destruccion.html", summary=summary, estados=DESTRUCTION_STATUS)
-
-        reader = csv.DictReader(stream)
-        db = get_db()
-        inserted = 0
-        updated = 0
+        counts = {"inserted": 0, "updated": 0}
         errors = []
 
-        for row_num, raw_row in enumerate(reader, start=2):
-            normalized_row = {}
-            for header, value in raw_row.items():
-                key = DESTRUCTION_CSV_FIELDS.get(normalize_header(header))
-                if key and value:
-                    normalized_row[key] = value.strip()
-
-            disco_serial = normalized_row.get("disco_serial")
-            if not disco_serial:
-                errors.append(f"Fila {row_num}: Serial de disco requerido")
-                continue
-
-            # Validar estado
-            estado = normalized_row.get("estado", "PENDIENTE").upper().replace(" ", "_")
-            if estado not in DESTRUCTION_STATUS:
-                estado = "PENDIENTE"
-            normalized_row["estado"] = estado
-
-            # Convertir capacidad
-            if normalized_row.get("disco_capacidad_gb"):
-                try:
-                    normalized_row["disco_capacidad_gb"] = int(normalized_row["disco_capacidad_gb"])
-                except ValueError:
-                    normalized_row["disco_capacidad_gb"] = None
-
-            # Normalizar fechas
-            for field in ["fecha_extraccion", "fecha_destruccion", "certificado_fecha"]:
-                if normalized_row.get(field):
-                    normalized_row[field] = normalize_date(normalized_row[field])
-
-            # Verificar si existe
-            existing = DiskDestruction.get_by_serial(db, disco_serial)
-            if existing:
-                DiskDestruction.update(db, existing["id"], normalized_row)
-                updated += 1
-            else:
-                DiskDestruction.create(db, normalized_row)
-                inserted += 1
+        def handle_chunk(db, chunk):
+            for row_num, normalized_row in chunk:
+                disco_serial = normalized_row.get("disco_serial")
+                if not disco_serial:
+                    errors.append(f"Fila {row_num}: Serial de disco requerido")
+                    continue
+
+                # Validar estado
+                estado = normalized_row.get("estado", "PENDIENTE").upper().replace(" ", "_")
+                if estado not in DESTRUCTION_STATUS:
+                    estado = "PENDIENTE"
+                normalized_row["estado"] = estado
+
+                # Convertir capacidad
+                if normalized_row.get("disco_capacidad_gb"):
+                    try:
+                        normalized_row["disco_capacidad_gb"] = int(normalized_row["disco_capacidad_gb"])
+                    except ValueError:
+                        normalized_row["disco_capacidad_gb"] = None
+
+                # Normalizar fechas
+                for field in ["fecha_extraccion", "fecha_destruccion", "certificado_fecha"]:
+                    if normalized_row.get(field):
+                        normalized_row[field] = normalize_date(normalized_row[field])
+
+                # Verificar si existe
+                existing = DiskDestruction.get_by_serial(db, disco_serial)
+                if existing:
+                    DiskDestruction.update(db, existing["id"], normalized_row, commit=False)
+                    counts["updated"] += 1
+                else:
+                    DiskDestruction.create(db, normalized_row, commit=False)
+                    counts["inserted"] += 1
+
+        error = _ingest_csv(file, DESTRUCTION_CSV_FIELDS, handle_chunk)
+        if error:
+            flash(error, "danger")
+            return render_template("bulk_upload/destruccion.html", summary=summary, estados=DESTRUCTION_STATUS)
 
+        inserted, updated = counts["inserted"], counts["updated"]
         summary = {"inserted": inserted, "updated": updated, "total": inserted + updated, "errors": errors}
         if errors:
             flash(f"Carga completada con {len(errors)} errores", "warning")
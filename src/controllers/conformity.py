@@ -1,10 +1,18 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g, send_file, abort
+from flask import (
+    Blueprint, Response, render_template, request, redirect, url_for, flash, jsonify, g, abort,
+    stream_with_context,
+)
 
-from config import MAX_ACTA_SIZE
+from config import MAX_ACTA_SIZE, PROJECT_PHASES
 from models.database import get_db
-from models.conformity import ConformityRecord, UPLOADS_DIR
-from utils.decorators import login_required, admin_required
+from models.conformity import ConformityRecord, UPLOADS_DIR, CONFORMITY_SORT_KEYS
+from models.project import ProjectRecord
+from utils.decorators import login_required, admin_required, etag_versioned
+from utils.export import iter_zip_bundle, zip_entry_name, export_filename
+from utils.files import send_evidence
+from utils.helpers import coerce_iso_date
+from utils.pagination import page_args, page_params
 
 conformity_bp = Blueprint('conformity', __name__, url_prefix='/actas')
 
@@ -15,11 +23,14 @@ def index():
     """Vista principal de actas de conformidad"""
     db = get_db()
     equipo_filter = request.args.get("equipo", "").strip()
-    records = ConformityRecord.get_all(db, equipo_serial=equipo_filter if equipo_filter else None)
+    args = page_args(request.args, CONFORMITY_SORT_KEYS, "fecha_subida")
+    page = ConformityRecord.get_page(db, {"equipo_serial": equipo_filter}, **args)
     summary = ConformityRecord.get_summary(db)
     return render_template(
         "conformity/index.html",
-        records=records,
+        records=page["items"],
+        page=page,
+        page_params=page_params(page, equipo=equipo_filter),
         summary=summary,
         equipo_filter=equipo_filter,
     )
@@ -32,26 +43,20 @@ def upload():
     """Subir nueva acta de conformidad"""
     db = get_db()
 
-    # Obtener lista de equipos para el selector
-    equipos = db.execute("""
-        SELECT serial_num, hostname, nombre_completo
-        FROM project_records
-        WHERE serial_num IS NOT NULL AND serial_num != ''
-        ORDER BY hostname
-    """).fetchall()
-
     if request.method == "POST":
         equipo_serial = request.form.get("equipo_serial", "").strip()
         notas = request.form.get("notas", "").strip()
         file = request.files.get("archivo")
+        # Equipo elegido en el selector; se conserva si el formulario se vuelve a mostrar
+        equipo = ProjectRecord.get_equipment(db, equipo_serial) if equipo_serial else None
 
         if not equipo_serial:
             flash("Debes seleccionar un equipo", "danger")
-            return render_template("conformity/upload.html", equipos=equipos)
+            return render_template("conformity/upload.html", equipo=equipo)
 
         if not file or not file.filename:
             flash("Debes seleccionar un archivo", "danger")
-            return render_template("conformity/upload.html", equipos=equipos)
+            return render_template("conformity/upload.html", equipo=equipo)
 
         # Validar tamaño del archivo (50MB max)
         file.seek(0, 2)  # Ir al final
@@ -59,24 +64,18 @@ def upload():
         file.seek(0)  # Volver al inicio
         if file_size > MAX_ACTA_SIZE:
             flash(f"El archivo excede el limite de 50MB (tamaño: {file_size // (1024*1024)}MB)", "danger")
-            return render_template("conformity/upload.html", equipos=equipos)
-
-        # Obtener datos del equipo
-        equipo = db.execute("""
-            SELECT serial_num, hostname, nombre_completo
-            FROM project_records WHERE serial_num = ?
-        """, (equipo_serial,)).fetchone()
+            return render_template("conformity/upload.html", equipo=equipo)
 
         if not equipo:
             flash("Equipo no encontrado", "danger")
-            return render_template("conformity/upload.html", equipos=equipos)
+            return render_template("conformity/upload.html", equipo=equipo)
 
         # Guardar archivo
-        safe_name, file_path, file_type = ConformityRecord.save_file(file, equipo_serial)
+        safe_name, file_path, file_type = ConformityRecord.save_file(db, file, equipo_serial)
 
         if not safe_name:
             flash("Tipo de archivo no permitido. Solo se aceptan PDF y MSG.", "danger")
-            return render_template("conformity/upload.html", equipos=equipos)
+            return render_template("conformity/upload.html", equipo=equipo)
 
         # Crear registro
         ConformityRecord.create(db, {
@@ -93,7 +92,7 @@ def upload():
         flash(f"Acta de conformidad subida correctamente para {equipo['hostname']}", "success")
         return redirect(url_for("conformity.index"))
 
-    return render_template("conformity/upload.html", equipos=equipos)
+    return render_template("conformity/upload.html", equipo=None)
 
 
 @conformity_bp.route("/ver/<int:id>")
@@ -114,9 +113,9 @@ def view(id):
 
     # Para PDF, mostrar en el navegador; para MSG, descargar
     if record["tipo_archivo"] == "PDF":
-        return send_file(file_path, mimetype='application/pdf')
+        return send_evidence(file_path, mimetype='application/pdf', download_name=record["nombre_archivo"])
     else:
-        return send_file(file_path, as_attachment=True, download_name=record["nombre_archivo"])
+        return send_evidence(file_path, as_attachment=True, download_name=record["nombre_archivo"])
 
 
 @conformity_bp.route("/descargar/<int:id>")
@@ -135,7 +134,49 @@ def download(id):
         flash("El archivo no existe en el servidor", "danger")
         return redirect(url_for("conformity.index"))
 
-    return send_file(file_path, as_attachment=True, download_name=record["nombre_archivo"])
+    return send_evidence(file_path, as_attachment=True, download_name=record["nombre_archivo"])
+
+
+ACTAS_BUNDLE_MANIFEST_HEADERS = [
+    "ID", "Sede", "Fase", "Equipo Serial", "Hostname", "Usuario", "Tipo",
+    "Nombre Archivo", "Fecha Subida", "Subido Por",
+]
+
+
+def _bundle_entry(r) -> tuple:
+    fase = PROJECT_PHASES.get(r["fase"], {}).get("nombre", "-") if r["fase"] else "-"
+    row = [
+        r["id"], r["nom_sede"], fase, r["equipo_serial"], r["equipo_hostname"],
+        r["usuario_nombre"], r["tipo_archivo"], r["nombre_archivo"], r["fecha_subida"], r["subido_por"],
+    ]
+    # El id evita choques entre actas del mismo equipo subidas en el mismo segundo
+    arcname = zip_entry_name(r["nom_sede"], r["equipo_serial"], f"{r['id']}_{r['nombre_archivo']}")
+    return arcname, r["ruta_archivo"], row
+
+
+@conformity_bp.route("/descargar-lote")
+@login_required
+def download_bundle():
+    """Descarga en un ZIP (por streaming) las actas de una sede, fase o rango de fechas"""
+    db = get_db()
+    filters = {
+        "nom_sede": request.args.get("nom_sede", "").strip() or None,
+        "fase": request.args.get("fase", "").strip() or None,
+        "fecha_inicio": coerce_iso_date(request.args.get("fecha_inicio", "").strip()) or None,
+        "fecha_fin": coerce_iso_date(request.args.get("fecha_fin", "").strip()) or None,
+    }
+    if filters["fase"] and filters["fase"] not in PROJECT_PHASES:
+        abort(400, description=f"Fase no valida: {filters['fase']}")
+
+    # Las filas (solo metadatos) se leen antes de empezar: un cursor abierto durante todo
+    # el streaming mantendria una transaccion de lectura y bloquearia el checkpoint del WAL
+    rows = ConformityRecord.iter_bundle(db, filters).fetchall()
+    entries = (_bundle_entry(r) for r in rows)
+    return Response(
+        stream_with_context(iter_zip_bundle(entries, "manifiesto.csv", ACTAS_BUNDLE_MANIFEST_HEADERS)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={export_filename('actas', 'zip')}"},
+    )
 
 
 @conformity_bp.route("/eliminar/<int:id>", methods=["POST"])
@@ -157,11 +198,7 @@ def by_equipment(serial):
     """Ver actas de un equipo específico"""
     db = get_db()
     records = ConformityRecord.get_by_equipment(db, serial)
-
-    equipo = db.execute("""
-        SELECT serial_num, hostname, nombre_completo
-        FROM project_records WHERE serial_num = ?
-    """, (serial,)).fetchone()
+    equipo = ProjectRecord.get_equipment(db, serial)
 
     return render_template(
         "conformity/equipment.html",
@@ -174,6 +211,7 @@ def by_equipment(serial):
 # API Endpoints
 @conformity_bp.route("/api/summary")
 @login_required
+@etag_versioned("conformity")
 def api_summary():
     """Resumen de actas para el dashboard"""
     db = get_db()
@@ -181,6 +219,16 @@ def api_summary():
     return jsonify(summary)
 
 
+@conformity_bp.route("/api/registros")
+@login_required
+def api_list():
+    """API paginada de actas (sort, order, limit, after/before)"""
+    db = get_db()
+    filters = {key: request.args.get(key, "").strip() for key in ("equipo_serial", "tipo_archivo")}
+    args = page_args(request.args, CONFORMITY_SORT_KEYS, "fecha_subida")
+    return jsonify(ConformityRecord.get_page(db, filters, **args))
+
+
 @conformity_bp.route("/api/equipo/<serial>")
 @login_required
 def api_by_equipment(serial):
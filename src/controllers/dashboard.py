@@ -1,10 +1,14 @@
-from flask import Blueprint, render_template, request, jsonify, g, redirect, url_for
+from flask import Blueprint, Response, current_app, render_template, request, jsonify, g, redirect, url_for
 
 from models.database import get_db
 from models.project import ProjectRecord
-from config import STATUS_CHOICES, PROJECT_PHASES, get_phase_from_category
-from utils.decorators import login_required
+from models.cache import DataVersion, SummaryCache
+from models.search import SearchIndex, SEARCH_SCOPES
+from models.progress import ProgressSnapshot
+from config import STATUS_CHOICES, PROJECT_PHASES
+from utils.decorators import login_required, etag_versioned
 from utils.helpers import coerce_iso_date
+from utils.events import EVENT_SCOPES, version_events, version_watcher
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -24,6 +28,7 @@ def index():
 
 @dashboard_bp.route("/api/summary")
 @login_required
+@etag_versioned("project")
 def api_summary():
     db = get_db()
 
@@ -41,11 +46,15 @@ def api_summary():
         "fase": fase_filter,
     }
 
-    records = ProjectRecord.query_records(db, filters)
-    summary = ProjectRecord.calculate_summary(records)
+    # El resumen solo cambia cuando se escriben registros del proyecto
+    version = DataVersion.token(db, "project")
+    cached = SummaryCache.get(db, "dashboard_summary", filters, version)
+    if cached is not None:
+        return jsonify(cached)
 
-    if not filters.get("nombre"):
-        summary["recent_updates"] = summary["recent_updates"][:10]
+    # Con filtro por nombre se listan todas las coincidencias
+    recent_limit = None if filters.get("nombre") else 10
+    summary = ProjectRecord.summarize(db, filters, recent_limit=recent_limit)
 
     filters_payload = {}
     for field in ("ubicacion", "nom_sede", "categoria_trab"):
@@ -59,13 +68,6 @@ def api_summary():
         "selected": filters.get("estado") or "",
     }
 
-    # Calcular resumen por fase
-    phase_counts = {}
-    for record in records:
-        fase = get_phase_from_category(record["categoria_trab"])
-        if fase:
-            phase_counts[fase] = phase_counts.get(fase, 0) + 1
-
     data = {
         **summary,
         "status_catalog": STATUS_CHOICES,
@@ -80,12 +82,160 @@ def api_summary():
         "estado_options": STATUS_CHOICES,
         "fase_filter": fase_filter or "",
         "fase_options": PROJECT_PHASES,
-        "fase_counts": phase_counts,
     }
 
+    SummaryCache.set(db, "dashboard_summary", filters, version, data)
     return jsonify(data)
 
 
+@dashboard_bp.route("/api/progress")
+@login_required
+@etag_versioned("progress")
+def api_progress():
+    """Series de burndown y velocidad desde las fotos diarias de avance"""
+    fase = request.args.get("fase", "").strip()
+    filters = {
+        "fase": fase if fase in PROJECT_PHASES else None,
+        "nom_sede": request.args.get("nom_sede", "").strip() or None,
+        "fecha_inicio": coerce_iso_date(request.args.get("fecha_inicio", "").strip()) or None,
+        "fecha_fin": coerce_iso_date(request.args.get("fecha_fin", "").strip()) or None,
+    }
+    return jsonify({
+        "filters": {key: value or "" for key, value in filters.items()},
+        **ProgressSnapshot.get_series(get_db(), **filters),
+    })
+
+
+@dashboard_bp.route("/api/events")
+@login_required
+def api_events():
+    """Server-Sent Events con la version de los conjuntos pedidos en `scopes`.
+
+    El cliente vuelve a pedir sus datos solo cuando llega una version nueva,
+    en lugar de sondear los endpoints. El flujo no usa la base de datos: la
+    conexion del request se libera al empezar a transmitir.
+    """
+    requested = [s.strip() for s in request.args.get("scopes", "project").split(",")]
+    scopes = [s for s in dict.fromkeys(requested) if s in EVENT_SCOPES]
+    if not scopes:
+        return jsonify({"error": f"scopes debe incluir alguno de: {', '.join(EVENT_SCOPES)}"}), 400
+
+    version_watcher.ensure_started(current_app._get_current_object())
+    stream = version_events(
+        scopes,
+        heartbeat=current_app.config["EVENTS_HEARTBEAT"],
+        max_age=current_app.config["EVENTS_MAX_AGE"],
+    )
+    response = Response(stream, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # nginx no debe acumular el flujo en su buffer
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# Largo minimo y maximo del termino de la busqueda global
+SEARCH_MIN_LENGTH = 2
+SEARCH_MAX_LENGTH = 64
+# Solo se cachean los prefijos cortos: son los que mas se repiten al escribir y
+# los que mas candidatos recorren; los terminos largos son selectivos
+SEARCH_CACHE_MAX_LENGTH = 4
+SEARCH_LIMITS = (1, 20)
+
+
+def _search_hit(group: str, item: dict, is_admin: bool) -> dict:
+    """Titulo, detalle y enlace de un resultado de la busqueda global"""
+    if group == "equipos":
+        return {
+            "title": item["hostname"] or item["serial_num"] or item["record_id"],
+            "subtitle": " · ".join(filter(None, [item["serial_num"], item["nombre_completo"], item["nom_sede"]])),
+            "url": url_for("repotentiation.by_equipment", serial=item["serial_num"]) if item["serial_num"] else None,
+        }
+    if group in ("ram", "ssd"):
+        endpoint = f"inventory.{group}_edit" if is_admin else f"inventory.{group}_list"
+        return {
+            "title": item["serial_num"],
+            "subtitle": " · ".join(filter(None, [
+                f"{item['capacidad_gb']} GB", item["marca"], item["estado"], item["equipo_serial"],
+            ])),
+            "url": url_for(endpoint, id=item["id"]) if is_admin else url_for(endpoint),
+        }
+    if group == "actas":
+        return {
+            "title": item["nombre_archivo"],
+            "subtitle": " · ".join(filter(None, [item["equipo_serial"], item["equipo_hostname"], item["usuario_nombre"]])),
+            "url": url_for("conformity.view", id=item["id"]),
+        }
+    return {
+        "title": item["disco_serial"],
+        "subtitle": " · ".join(filter(None, [item["estado"], item["equipo_origen_serial"], item["equipo_origen_hostname"]])),
+        "url": url_for("destruction.edit", id=item["id"]) if is_admin else url_for("destruction.index"),
+    }
+
+
+@dashboard_bp.route("/api/search")
+@login_required
+@etag_versioned(*SEARCH_SCOPES)
+def api_search():
+    """Busqueda global (typeahead) de equipos, componentes, actas y destrucciones"""
+    term = " ".join(request.args.get("q", "").split())[:SEARCH_MAX_LENGTH]
+    limit = request.args.get("limit", 5, type=int)
+    limit = max(SEARCH_LIMITS[0], min(limit, SEARCH_LIMITS[1]))
+    if len(term) < SEARCH_MIN_LENGTH:
+        return jsonify({"q": term, "groups": []})
+
+    db = get_db()
+    key = {"q": term, "limit": limit}
+    version = DataVersion.token(db, *SEARCH_SCOPES)
+    groups = SummaryCache.get(db, "global_search", key, version) if len(term) <= SEARCH_CACHE_MAX_LENGTH else None
+    if groups is None:
+        groups = SearchIndex.search(db, term, limit)
+        if len(term) <= SEARCH_CACHE_MAX_LENGTH:
+            SummaryCache.set(db, "global_search", key, version, groups)
+
+    is_admin = g.user["role"] == "admin"
+    return jsonify({
+        "q": term,
+        "groups": [
+            {
+                "key": group["key"],
+                "label": group["label"],
+                "more": group["more"],
+                "items": [
+                    {"id": item["id"], "match": item["match"], **_search_hit(group["key"], item, is_admin)}
+                    for item in group["items"]
+                ],
+            }
+            for group in groups
+        ],
+    })
+
+
+@dashboard_bp.route("/api/equipos")
+@login_required
+@etag_versioned("project")
+def api_equipment():
+    """Selector de equipos: equipos cuyo serial, hostname o usuario coincide con `q`"""
+    term = " ".join(request.args.get("q", "").split())[:SEARCH_MAX_LENGTH]
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(SEARCH_LIMITS[0], min(limit, SEARCH_LIMITS[1]))
+    if len(term) < SEARCH_MIN_LENGTH:
+        return jsonify({"q": term, "items": []})
+
+    items = ProjectRecord.search_equipment(get_db(), term, limit)
+    return jsonify({
+        "q": term,
+        "items": [
+            {
+                "serial_num": item["serial_num"],
+                "hostname": item["hostname"],
+                "nombre_completo": item["nombre_completo"],
+                "match": item["match"],
+            }
+            for item in items
+        ],
+    })
+
+
 @dashboard_bp.app_context_processor
 def inject_globals():
     return {"current_user": g.get("user")}
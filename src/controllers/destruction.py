@@ -1,10 +1,16 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g, send_file
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, flash, jsonify, g, current_app,
+)
 
 from config import MAX_VIDEO_SIZE
+from models.blob_store import BlobStore
 from models.database import get_db
-from models.destruction import DiskDestruction, DESTRUCTION_STATUS, VIDEOS_DIR
-from utils.decorators import login_required, admin_required
+from models.destruction import DiskDestruction, DESTRUCTION_STATUS, DESTRUCTION_SORT_KEYS, VIDEOS_DIR
+from models.video_upload import VideoUpload, UploadConflict, UploadTooLarge
+from utils.decorators import login_required, admin_required, etag_versioned
+from utils.files import send_evidence
+from utils.pagination import page_args, page_params
 
 destruction_bp = Blueprint('destruction', __name__, url_prefix='/destruccion')
 
@@ -16,12 +22,15 @@ def index():
     db = get_db()
     estado_filter = request.args.get("estado", "").strip()
 
-    records = DiskDestruction.get_all(db, estado=estado_filter if estado_filter else None)
+    args = page_args(request.args, DESTRUCTION_SORT_KEYS, "fecha_registro")
+    page = DiskDestruction.get_page(db, {"estado": estado_filter}, **args)
     summary = DiskDestruction.get_summary(db)
 
     return render_template(
         "destruction/index.html",
-        records=records,
+        records=page["items"],
+        page=page,
+        page_params=page_params(page, estado=estado_filter),
         summary=summary,
         status_options=DESTRUCTION_STATUS,
         estado_filter=estado_filter,
@@ -97,6 +106,7 @@ def edit(id):
         }
 
         # Procesar video si se subió uno nuevo
+        replaced_video = None
         video = request.files.get("video")
         if video and video.filename:
             # Validar tamaño del video (500MB max)
@@ -106,22 +116,19 @@ def edit(id):
             if video_size > MAX_VIDEO_SIZE:
                 flash(f"El video excede el limite de 500MB (tamaño: {video_size // (1024*1024)}MB)", "warning")
             else:
-                video_name, video_path = DiskDestruction.save_video(video, record["disco_serial"])
+                video_name, video_path = DiskDestruction.save_video(db, video, record["disco_serial"])
                 if video_name:
-                    # Eliminar video anterior si existe
-                    if record["video_ruta"]:
-                        try:
-                            old_path = record["video_ruta"]
-                            if os.path.exists(old_path):
-                                os.unlink(old_path)
-                        except Exception:
-                            pass
+                    replaced_video = record["video_ruta"]
                     data["video_nombre"] = video_name
                     data["video_ruta"] = video_path
                 else:
                     flash("Tipo de video no permitido. Use MP4, AVI, MOV, MKV o WEBM.", "warning")
 
-        DiskDestruction.update(db, id, data)
+        DiskDestruction.update(db, id, data, commit=False)
+        # Liberar el video anterior si se reemplazo (se borra si ningun otro registro lo usa)
+        released = BlobStore.release(db, replaced_video)
+        db.commit()
+        BlobStore.purge(db, released)
         flash("Registro actualizado correctamente", "success")
         return redirect(url_for("destruction.index"))
 
@@ -153,30 +160,99 @@ def upload_video(id):
         flash(f"El video excede el limite de 500MB (tamaño: {video_size // (1024*1024)}MB)", "danger")
         return redirect(url_for("destruction.edit", id=id))
 
-    video_name, video_path = DiskDestruction.save_video(video, record["disco_serial"])
+    video_name, video_path = DiskDestruction.save_video(db, video, record["disco_serial"])
 
     if not video_name:
         flash("Tipo de video no permitido. Use MP4, AVI, MOV, MKV o WEBM.", "danger")
         return redirect(url_for("destruction.edit", id=id))
 
-    # Eliminar video anterior si existe
-    if record["video_ruta"]:
-        try:
-            if os.path.exists(record["video_ruta"]):
-                os.unlink(record["video_ruta"])
-        except Exception:
-            pass
-
-    # Actualizar registro
+    # Actualizar registro y liberar el video anterior (se borra si ningun otro registro lo usa)
     data = dict(record)
     data["video_nombre"] = video_name
     data["video_ruta"] = video_path
-    DiskDestruction.update(db, id, data)
+    DiskDestruction.update(db, id, data, commit=False)
+    released = BlobStore.release(db, record["video_ruta"])
+    db.commit()
+    BlobStore.purge(db, released)
 
     flash("Video de evidencia subido correctamente", "success")
     return redirect(url_for("destruction.index"))
 
 
+# ============================================================================
+# SUBIDA REANUDABLE DE VIDEOS (tipo tus: crear, PATCH por partes con offset)
+# ============================================================================
+
+def _upload_headers(response, upload):
+    response.headers["Upload-Offset"] = str(VideoUpload.offset(upload))
+    response.headers["Upload-Length"] = str(upload["size"])
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@destruction_bp.route("/<int:id>/video/subidas", methods=["POST"])
+@login_required
+@admin_required
+def create_video_upload(id):
+    """Crea (o retoma) una subida reanudable: JSON {filename, size}"""
+    db = get_db()
+    if not DiskDestruction.get_by_id(db, id):
+        return jsonify({"error": "Registro no encontrado"}), 404
+
+    payload = request.get_json(silent=True) or {}
+    filename = str(payload.get("filename") or "").strip()
+    try:
+        size = int(payload.get("size") or request.headers.get("Upload-Length", 0))
+    except (TypeError, ValueError):
+        size = 0
+    try:
+        upload = VideoUpload.create(db, id, filename, size, g.user["username"])
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 413 if size > MAX_VIDEO_SIZE else 400
+
+    url = url_for("destruction.video_upload", upload_id=upload["id"])
+    response = jsonify({"id": upload["id"], "url": url, "offset": VideoUpload.offset(upload), "size": upload["size"]})
+    response.status_code = 201
+    response.headers["Location"] = url
+    return _upload_headers(response, upload)
+
+
+@destruction_bp.route("/video/subidas/<upload_id>", methods=["HEAD", "PATCH", "DELETE"])
+@login_required
+@admin_required
+def video_upload(upload_id):
+    """HEAD: bytes recibidos; PATCH: agrega una parte en Upload-Offset; DELETE: descarta"""
+    db = get_db()
+    upload = VideoUpload.get_by_id(db, upload_id)
+    if upload is None:
+        return jsonify({"error": "Subida no encontrada"}), 404
+
+    if request.method == "HEAD":
+        return _upload_headers(current_app.response_class(status=200), upload)
+
+    if request.method == "DELETE":
+        VideoUpload.discard(db, upload)
+        return "", 204
+
+    if request.mimetype != "application/offset+octet-stream":
+        return jsonify({"error": "Content-Type debe ser application/offset+octet-stream"}), 415
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Falta el encabezado Upload-Offset"}), 400
+
+    try:
+        VideoUpload.append(db, upload, offset, request.stream)
+    except UploadConflict as exc:
+        return _upload_headers(jsonify({"error": str(exc)}), VideoUpload.get_by_id(db, upload_id) or upload), 409
+    except UploadTooLarge as exc:
+        return _upload_headers(jsonify({"error": str(exc)}), VideoUpload.get_by_id(db, upload_id)), 413
+    except LookupError as exc:
+        return jsonify({"error": str(exc)}), 404
+
+    return _upload_headers(current_app.response_class(status=204), VideoUpload.get_by_id(db, upload_id))
+
+
 @destruction_bp.route("/<int:id>/ver-video")
 @login_required
 def view_video(id):
@@ -192,7 +268,7 @@ def view_video(id):
         flash("El archivo de video no existe en el servidor", "danger")
         return redirect(url_for("destruction.index"))
 
-    return send_file(record["video_ruta"])
+    return send_evidence(record["video_ruta"], download_name=record["video_nombre"])
 
 
 @destruction_bp.route("/<int:id>/eliminar", methods=["POST"])
@@ -234,6 +310,7 @@ def certify(id):
 # API Endpoints
 @destruction_bp.route("/api/summary")
 @login_required
+@etag_versioned("destruction")
 def api_summary():
     """Resumen de destrucción para el dashboard"""
     db = get_db()
@@ -241,4 +318,14 @@ def api_summary():
     return jsonify(summary)
 
 
+@destruction_bp.route("/api/registros")
+@login_required
+def api_list():
+    """API paginada de destrucciones (sort, order, limit, after/before)"""
+    db = get_db()
+    filters = {key: request.args.get(key, "").strip() for key in ("estado", "equipo_origen_serial")}
+    args = page_args(request.args, DESTRUCTION_SORT_KEYS, "fecha_registro")
+    return jsonify(DiskDestruction.get_page(db, filters, **args))
+
+
 from datetime import datetime
@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g
 
 from models.database import get_db
-from models.component import RAMUnit, SSDUnit, ComponentHistory, COMPONENT_STATUS, COMPONENT_STATUS_COLORS
-from utils.decorators import login_required, admin_required
+from models.component import (
+    RAMUnit, SSDUnit, ComponentHistory, COMPONENT_STATUS, COMPONENT_STATUS_COLORS, COMPONENT_SORT_KEYS,
+)
+from utils.decorators import login_required, admin_required, etag_versioned
+from utils.pagination import page_args, page_params
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventario')
 
@@ -20,11 +23,14 @@ def ram_list():
     """Lista de memorias RAM"""
     db = get_db()
     estado_filter = request.args.get("estado", "").strip()
-    rams = RAMUnit.get_all(db, estado=estado_filter if estado_filter else None)
+    args = page_args(request.args, COMPONENT_SORT_KEYS, "fecha_registro")
+    page = RAMUnit.get_page(db, {"estado": estado_filter}, **args)
     summary = RAMUnit.get_summary(db)
     return render_template(
         "inventory/ram_list.html",
-        rams=rams,
+        rams=page["items"],
+        page=page,
+        page_params=page_params(page, estado=estado_filter),
         summary=summary,
         status_options=COMPONENT_STATUS,
         status_colors=COMPONENT_STATUS_COLORS,
@@ -117,11 +123,14 @@ def ssd_list():
     """Lista de discos SSD"""
     db = get_db()
     estado_filter = request.args.get("estado", "").strip()
-    ssds = SSDUnit.get_all(db, estado=estado_filter if estado_filter else None)
+    args = page_args(request.args, COMPONENT_SORT_KEYS, "fecha_registro")
+    page = SSDUnit.get_page(db, {"estado": estado_filter}, **args)
     summary = SSDUnit.get_summary(db)
     return render_template(
         "inventory/ssd_list.html",
-        ssds=ssds,
+        ssds=page["items"],
+        page=page,
+        page_params=page_params(page, estado=estado_filter),
         summary=summary,
         status_options=COMPONENT_STATUS,
         status_colors=COMPONENT_STATUS_COLORS,
@@ -226,6 +235,7 @@ def history():
 # API Endpoints
 @inventory_bp.route("/api/summary")
 @login_required
+@etag_versioned("inventory")
 def api_summary():
     """Resumen de inventario para el dashboard"""
     db = get_db()
@@ -245,9 +255,9 @@ def api_summary():
 def api_ram_list():
     """API para listar RAMs"""
     db = get_db()
-    estado = request.args.get("estado", "").strip()
-    rams = RAMUnit.get_all(db, estado=estado if estado else None)
-    return jsonify([dict(ram) for ram in rams])
+    filters = {key: request.args.get(key, "").strip() for key in ("estado", "equipo_serial", "serial")}
+    args = page_args(request.args, COMPONENT_SORT_KEYS, "fecha_registro")
+    return jsonify(RAMUnit.get_page(db, filters, **args))
 
 
 @inventory_bp.route("/api/ssd")
@@ -255,6 +265,6 @@ def api_ram_list():
 def api_ssd_list():
     """API para listar SSDs"""
     db = get_db()
-    estado = request.args.get("estado", "").strip()
-    ssds = SSDUnit.get_all(db, estado=estado if estado else None)
-    return jsonify([dict(ssd) for ssd in ssds])
+    filters = {key: request.args.get(key, "").strip() for key in ("estado", "equipo_serial", "serial")}
+    args = page_args(request.args, COMPONENT_SORT_KEYS, "fecha_registro")
+    return jsonify(SSDUnit.get_page(db, filters, **args))
@@ -1,15 +1,15 @@
-import csv
-import io
-from datetime import datetime
-from flask import Blueprint, render_template, request, Response, jsonify
+from flask import Blueprint, render_template, request, abort
 
 from models.database import get_db
 from models.project import ProjectRecord
 from models.component import RAMUnit, SSDUnit, ComponentHistory, COMPONENT_STATUS
 from models.repotentiation import RepotentiationRecord
 from models.destruction import DiskDestruction, DESTRUCTION_STATUS
-from config import PROJECT_PHASES, get_phase_from_category
+from models.raw_table import RawTable
+from models.storage import StorageUsage, UploadReconciler, STORAGE_SCOPES
+from config import PROJECT_PHASES
 from utils.decorators import login_required, admin_required
+from utils.export import iter_cursor, export_response, available_export_formats, column_types_from_schema
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/reportes')
 
@@ -27,12 +27,9 @@ def index():
     destruction_summary = DiskDestruction.get_summary(db)
 
     # Conteo por fase
-    records = ProjectRecord.query_records(db, {})
-    phase_counts = {}
-    for record in records:
-        fase = get_phase_from_category(record["categoria_trab"])
-        if fase:
-            phase_counts[fase] = phase_counts.get(fase, 0) + 1
+    phase_counts = ProjectRecord.count_by_phase(db)
+    sedes = ProjectRecord.get_filter_options(db, "nom_sede")
+    storage_usage = StorageUsage.get(db)
 
     return render_template(
         "reports/index.html",
@@ -41,16 +38,58 @@ def index():
         repot_summary=repot_summary,
         destruction_summary=destruction_summary,
         phase_counts=phase_counts,
+        sedes=sedes,
+        storage_usage=storage_usage,
         project_phases=PROJECT_PHASES,
         component_status=COMPONENT_STATUS,
         destruction_status=DESTRUCTION_STATUS,
+        export_formats=available_export_formats(),
     )
 
 
+# ============================================================================
+# EXPORTACIONES (streaming; ?format=csv|csv.gz|xlsx|parquet)
+# ============================================================================
+
+DASHBOARD_EXPORT_HEADERS = [
+    "ID", "Ubicacion", "Sede", "Categoria", "Fase", "Nombre Completo",
+    "Perfil", "Marca", "Modelo", "Serial", "Hostname", "IP",
+    "Email", "Fecha Estado", "Estado", "Estado Coordinacion",
+    "Estado Upgrade", "Fecha Programada", "Fecha Ejecucion", "Notas"
+]
+
+
+def _dashboard_export_row(r) -> list:
+    fase = r["fase"]
+    fase_nombre = PROJECT_PHASES.get(fase, {}).get("nombre", "-") if fase else "-"
+    return [
+        r["record_id"],
+        r["ubicacion"],
+        r["nom_sede"],
+        r["categoria_trab"],
+        fase_nombre,
+        r["nombre_completo"],
+        r["perfil_imagen"],
+        r["marca"],
+        r["modelo"],
+        r["serial_num"],
+        r["hostname"],
+        r["ip_equipo"],
+        r["email_trabajo"],
+        r["fecha_estado"],
+        r["estado"],
+        r["estado_coordinacion"],
+        r["estado_upgrade"],
+        r["fecha_programada"],
+        r["fecha_ejecucion"],
+        r["notas"],
+    ]
+
+
 @reports_bp.route("/exportar/dashboard")
 @login_required
 def export_dashboard():
-    """Exporta datos del dashboard a CSV"""
+    """Exporta datos del dashboard"""
     db = get_db()
 
     # Obtener filtros de la URL
@@ -66,260 +105,210 @@ def export_dashboard():
         "fase": request.args.get("fase", "").strip() or None,
     }
 
-    records = ProjectRecord.query_records(db, filters)
-
-    # Generar CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Encabezados
-    headers = [
-        "ID", "Ubicacion", "Sede", "Categoria", "Fase", "Nombre Completo",
-        "Perfil", "Marca", "Modelo", "Serial", "Hostname", "IP",
-        "Email", "Fecha Estado", "Estado", "Estado Coordinacion",
-        "Estado Upgrade", "Fecha Programada", "Fecha Ejecucion", "Notas"
+    cursor = ProjectRecord.iter_records(db, filters)
+    rows = (_dashboard_export_row(r) for r in iter_cursor(cursor))
+    return export_response("dashboard_export", DASHBOARD_EXPORT_HEADERS, rows, request.args.get("format"))
+
+
+RAM_EXPORT_HEADERS = [
+    "ID", "Serial", "Marca", "Capacidad (GB)", "Tipo", "Velocidad (MHz)",
+    "Estado", "Equipo Serial", "Fecha Instalacion", "Fecha Registro", "Notas"
+]
+RAM_EXPORT_TYPES = {"ID": "int", "Capacidad (GB)": "int", "Velocidad (MHz)": "int"}
+
+
+def _ram_export_row(u) -> list:
+    return [
+        u["id"],
+        u["serial_num"],
+        u["marca"],
+        u["capacidad_gb"],
+        u["tipo"],
+        u["velocidad_mhz"],
+        COMPONENT_STATUS.get(u["estado"], u["estado"]),
+        u["equipo_serial"],
+        u["fecha_instalacion"],
+        u["fecha_registro"],
+        u["notas"],
     ]
-    writer.writerow(headers)
-
-    # Datos
-    for r in records:
-        fase = get_phase_from_category(r["categoria_trab"])
-        fase_nombre = PROJECT_PHASES.get(fase, {}).get("nombre", "-") if fase else "-"
-        writer.writerow([
-            r["record_id"],
-            r["ubicacion"],
-            r["nom_sede"],
-            r["categoria_trab"],
-            fase_nombre,
-            r["nombre_completo"],
-            r["perfil_imagen"],
-            r["marca"],
-            r["modelo"],
-            r["serial_num"],
-            r["hostname"],
-            r["ip_equipo"],
-            r["email_trabajo"],
-            r["fecha_estado"],
-            r["estado"],
-            r["estado_coordinacion"],
-            r["estado_upgrade"],
-            r["fecha_programada"],
-            r["fecha_ejecucion"],
-            r["notas"],
-        ])
-
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"dashboard_export_{timestamp}.csv"
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
 
 @reports_bp.route("/exportar/ram")
 @login_required
 def export_ram():
-    """Exporta inventario de RAM a CSV"""
+    """Exporta inventario de RAM"""
     db = get_db()
     estado = request.args.get("estado", "").strip() or None
-    units = RAMUnit.get_all(db, estado)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
-        "ID", "Serial", "Marca", "Capacidad (GB)", "Tipo", "Velocidad (MHz)",
-        "Estado", "Equipo Serial", "Fecha Instalacion", "Fecha Registro", "Notas"
+    cursor = RAMUnit.iter_all(db, estado)
+    rows = (_ram_export_row(u) for u in iter_cursor(cursor))
+    return export_response("inventario_ram", RAM_EXPORT_HEADERS, rows, request.args.get("format"),
+                           RAM_EXPORT_TYPES)
+
+
+SSD_EXPORT_HEADERS = [
+    "ID", "Serial", "Marca", "Modelo", "Capacidad (GB)", "Tipo",
+    "Estado", "Equipo Serial", "Fecha Instalacion", "Fecha Registro", "Notas"
+]
+SSD_EXPORT_TYPES = {"ID": "int", "Capacidad (GB)": "int"}
+
+
+def _ssd_export_row(u) -> list:
+    return [
+        u["id"],
+        u["serial_num"],
+        u["marca"],
+        u["modelo"],
+        u["capacidad_gb"],
+        u["tipo"],
+        COMPONENT_STATUS.get(u["estado"], u["estado"]),
+        u["equipo_serial"],
+        u["fecha_instalacion"],
+        u["fecha_registro"],
+        u["notas"],
     ]
-    writer.writerow(headers)
-
-    for u in units:
-        estado_label = COMPONENT_STATUS.get(u["estado"], u["estado"])
-        writer.writerow([
-            u["id"],
-            u["serial_num"],
-            u["marca"],
-            u["capacidad_gb"],
-            u["tipo"],
-            u["velocidad_mhz"],
-            estado_label,
-            u["equipo_serial"],
-            u["fecha_instalacion"],
-            u["fecha_registro"],
-            u["notas"],
-        ])
-
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"inventario_ram_{timestamp}.csv"
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
 
 @reports_bp.route("/exportar/ssd")
 @login_required
 def export_ssd():
-    """Exporta inventario de SSD a CSV"""
+    """Exporta inventario de SSD"""
     db = get_db()
     estado = request.args.get("estado", "").strip() or None
-    units = SSDUnit.get_all(db, estado)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
-        "ID", "Serial", "Marca", "Modelo", "Capacidad (GB)", "Tipo",
-        "Estado", "Equipo Serial", "Fecha Instalacion", "Fecha Registro", "Notas"
+    cursor = SSDUnit.iter_all(db, estado)
+    rows = (_ssd_export_row(u) for u in iter_cursor(cursor))
+    return export_response("inventario_ssd", SSD_EXPORT_HEADERS, rows, request.args.get("format"),
+                           SSD_EXPORT_TYPES)
+
+
+REPOTENTIATION_EXPORT_HEADERS = [
+    "ID", "Equipo Serial", "Equipo Hostname", "Usuario", "Fecha Repotenciacion",
+    "RAM Antes (GB)", "RAM Antes Tipo", "RAM Antes Serial",
+    "RAM Despues (GB)", "RAM Despues Tipo", "RAM Despues Serial",
+    "Disco Antes Tipo", "Disco Antes (GB)", "Disco Antes Serial",
+    "Disco Despues Tipo", "Disco Despues (GB)", "Disco Despues Serial",
+    "RAM Extraida Serial", "RAM Extraida Estado",
+    "Disco Extraido Serial", "Disco Extraido Estado", "Disco Destruido",
+    "Tecnico", "Notas"
+]
+REPOTENTIATION_EXPORT_TYPES = {
+    "ID": "int", "RAM Antes (GB)": "int", "RAM Despues (GB)": "int",
+    "Disco Antes (GB)": "int", "Disco Despues (GB)": "int",
+}
+
+
+def _repotentiation_export_row(r) -> list:
+    return [
+        r["id"],
+        r["equipo_serial"],
+        r["equipo_hostname"],
+        r["nombre_completo"],
+        r["fecha_repotenciacion"],
+        r["ram_antes_gb"],
+        r["ram_antes_tipo"],
+        r["ram_antes_serial"],
+        r["ram_despues_gb"],
+        r["ram_despues_tipo"],
+        r["ram_despues_serial"],
+        r["disco_antes_tipo"],
+        r["disco_antes_capacidad_gb"],
+        r["disco_antes_serial"],
+        r["disco_despues_tipo"],
+        r["disco_despues_capacidad_gb"],
+        r["disco_despues_serial"],
+        r["ram_extraida_serial"],
+        r["ram_extraida_estado"],
+        r["disco_extraido_serial"],
+        r["disco_extraido_estado"],
+        "Si" if r["disco_extraido_destruido"] else "No",
+        r["tecnico"],
+        r["notas"],
     ]
-    writer.writerow(headers)
-
-    for u in units:
-        estado_label = COMPONENT_STATUS.get(u["estado"], u["estado"])
-        writer.writerow([
-            u["id"],
-            u["serial_num"],
-            u["marca"],
-            u["modelo"],
-            u["capacidad_gb"],
-            u["tipo"],
-            estado_label,
-            u["equipo_serial"],
-            u["fecha_instalacion"],
-            u["fecha_registro"],
-            u["notas"],
-        ])
-
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"inventario_ssd_{timestamp}.csv"
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
 
 @reports_bp.route("/exportar/repotenciacion")
 @login_required
 def export_repotentiation():
-    """Exporta historial de repotenciación a CSV"""
+    """Exporta historial de repotenciación"""
     db = get_db()
-    records = RepotentiationRecord.get_all(db)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
-        "ID", "Equipo Serial", "Equipo Hostname", "Usuario", "Fecha Repotenciacion",
-        "RAM Antes (GB)", "RAM Antes Tipo", "RAM Antes Serial",
-        "RAM Despues (GB)", "RAM Despues Tipo", "RAM Despues Serial",
-        "Disco Antes Tipo", "Disco Antes (GB)", "Disco Antes Serial",
-        "Disco Despues Tipo", "Disco Despues (GB)", "Disco Despues Serial",
-        "RAM Extraida Serial", "RAM Extraida Estado",
-        "Disco Extraido Serial", "Disco Extraido Estado", "Disco Destruido",
-        "Tecnico", "Notas"
+    cursor = RepotentiationRecord.iter_all(db)
+    rows = (_repotentiation_export_row(r) for r in iter_cursor(cursor))
+    return export_response("repotenciacion", REPOTENTIATION_EXPORT_HEADERS, rows,
+                           request.args.get("format"), REPOTENTIATION_EXPORT_TYPES)
+
+
+DESTRUCTION_EXPORT_HEADERS = [
+    "ID", "Disco Serial", "Disco Marca", "Disco Modelo", "Capacidad (GB)",
+    "Tipo Disco", "Equipo Origen Serial", "Equipo Origen Hostname", "Usuario",
+    "Estado", "Fecha Extraccion", "Fecha Destruccion", "Metodo Destruccion",
+    "Tiene Video", "Certificado Numero", "Certificado Fecha",
+    "Responsable", "Notas"
+]
+DESTRUCTION_EXPORT_TYPES = {"ID": "int", "Capacidad (GB)": "int"}
+
+
+def _destruction_export_row(r) -> list:
+    return [
+        r["id"],
+        r["disco_serial"],
+        r["disco_marca"],
+        r["disco_modelo"],
+        r["disco_capacidad_gb"],
+        r["disco_tipo"],
+        r["equipo_origen_serial"],
+        r["equipo_origen_hostname"],
+        r["nombre_completo"],
+        DESTRUCTION_STATUS.get(r["estado"], r["estado"]),
+        r["fecha_extraccion"],
+        r["fecha_destruccion"],
+        r["metodo_destruccion"],
+        "Si" if r["video_ruta"] else "No",
+        r["certificado_numero"],
+        r["certificado_fecha"],
+        r["responsable"],
+        r["notas"],
     ]
-    writer.writerow(headers)
-
-    for r in records:
-        writer.writerow([
-            r["id"],
-            r["equipo_serial"],
-            r["equipo_hostname"],
-            r["nombre_completo"],
-            r["fecha_repotenciacion"],
-            r["ram_antes_gb"],
-            r["ram_antes_tipo"],
-            r["ram_antes_serial"],
-            r["ram_despues_gb"],
-            r["ram_despues_tipo"],
-            r["ram_despues_serial"],
-            r["disco_antes_tipo"],
-            r["disco_antes_capacidad_gb"],
-            r["disco_antes_serial"],
-            r["disco_despues_tipo"],
-            r["disco_despues_capacidad_gb"],
-            r["disco_despues_serial"],
-            r["ram_extraida_serial"],
-            r["ram_extraida_estado"],
-            r["disco_extraido_serial"],
-            r["disco_extraido_estado"],
-            "Si" if r["disco_extraido_destruido"] else "No",
-            r["tecnico"],
-            r["notas"],
-        ])
-
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"repotenciacion_{timestamp}.csv"
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
 
 @reports_bp.route("/exportar/destruccion")
 @login_required
 def export_destruction():
-    """Exporta registros de destrucción a CSV"""
+    """Exporta registros de destrucción"""
     db = get_db()
     estado = request.args.get("estado", "").strip() or None
-    records = DiskDestruction.get_all(db, estado)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
-        "ID", "Disco Serial", "Disco Marca", "Disco Modelo", "Capacidad (GB)",
-        "Tipo Disco", "Equipo Origen Serial", "Equipo Origen Hostname", "Usuario",
-        "Estado", "Fecha Extraccion", "Fecha Destruccion", "Metodo Destruccion",
-        "Tiene Video", "Certificado Numero", "Certificado Fecha",
-        "Responsable", "Notas"
+    cursor = DiskDestruction.iter_all(db, estado)
+    rows = (_destruction_export_row(r) for r in iter_cursor(cursor))
+    return export_response("destruccion_discos", DESTRUCTION_EXPORT_HEADERS, rows,
+                           request.args.get("format"), DESTRUCTION_EXPORT_TYPES)
+
+
+COMPONENT_HISTORY_EXPORT_HEADERS = [
+    "ID", "Tipo Componente", "Componente ID", "Componente Serial",
+    "Accion", "Equipo Serial Anterior", "Equipo Serial Nuevo",
+    "Estado Anterior", "Estado Nuevo", "Capacidad Anterior (GB)",
+    "Capacidad Nueva (GB)", "Usuario", "Fecha", "Notas"
+]
+COMPONENT_HISTORY_EXPORT_TYPES = {
+    "ID": "int", "Componente ID": "int", "Capacidad Anterior (GB)": "int", "Capacidad Nueva (GB)": "int",
+}
+
+
+def _component_history_export_row(r) -> list:
+    return [
+        r["id"],
+        r["tipo_componente"],
+        r["componente_id"],
+        r["componente_serial"],
+        r["accion"],
+        r["equipo_serial_anterior"],
+        r["equipo_serial_nuevo"],
+        r["estado_anterior"],
+        r["estado_nuevo"],
+        r["capacidad_anterior_gb"],
+        r["capacidad_nueva_gb"],
+        r["usuario"],
+        r["fecha"],
+        r["notas"],
     ]
-    writer.writerow(headers)
-
-    for r in records:
-        estado_label = DESTRUCTION_STATUS.get(r["estado"], r["estado"])
-        writer.writerow([
-            r["id"],
-            r["disco_serial"],
-            r["disco_marca"],
-            r["disco_modelo"],
-            r["disco_capacidad_gb"],
-            r["disco_tipo"],
-            r["equipo_origen_serial"],
-            r["equipo_origen_hostname"],
-            r["nombre_completo"],
-            estado_label,
-            r["fecha_extraccion"],
-            r["fecha_destruccion"],
-            r["metodo_destruccion"],
-            "Si" if r["video_ruta"] else "No",
-            r["certificado_numero"],
-            r["certificado_fecha"],
-            r["responsable"],
-            r["notas"],
-        ])
-
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"destruccion_discos_{timestamp}.csv"
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
 
 @reports_bp.route("/exportar/historial-componentes")
@@ -328,46 +317,10 @@ def export_component_history():
     """Exporta historial de movimientos de componentes"""
     db = get_db()
     limit = request.args.get("limit", 500, type=int)
-    records = ComponentHistory.get_recent(db, limit)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    headers = [
-        "ID", "Tipo Componente", "Componente ID", "Componente Serial",
-        "Accion", "Equipo Serial Anterior", "Equipo Serial Nuevo",
-        "Estado Anterior", "Estado Nuevo", "Capacidad Anterior (GB)",
-        "Capacidad Nueva (GB)", "Usuario", "Fecha", "Notas"
-    ]
-    writer.writerow(headers)
-
-    for r in records:
-        writer.writerow([
-            r["id"],
-            r["tipo_componente"],
-            r["componente_id"],
-            r["componente_serial"],
-            r["accion"],
-            r["equipo_serial_anterior"],
-            r["equipo_serial_nuevo"],
-            r["estado_anterior"],
-            r["estado_nuevo"],
-            r["capacidad_anterior_gb"],
-            r["capacidad_nueva_gb"],
-            r["usuario"],
-            r["fecha"],
-            r["notas"],
-        ])
-
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"historial_componentes_{timestamp}.csv"
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    cursor = ComponentHistory.iter_recent(db, limit)
+    rows = (_component_history_export_row(r) for r in iter_cursor(cursor))
+    return export_response("historial_componentes", COMPONENT_HISTORY_EXPORT_HEADERS, rows,
+                           request.args.get("format"), COMPONENT_HISTORY_EXPORT_TYPES)
 
 
 # ============================================================================
@@ -381,21 +334,10 @@ def raw_tables():
     """Vista principal de tablas de base de datos"""
     db = get_db()
 
-    # Obtener lista de tablas
-    tables = db.execute("""
-        SELECT name FROM sqlite_master
-        WHERE type='table' AND name NOT LIKE 'sqlite_%'
-        ORDER BY name
-    """).fetchall()
-
-    table_info = []
-    for t in tables:
-        table_name = t["name"]
-        count = db.execute(f"SELECT COUNT(*) as count FROM {table_name}").fetchone()["count"]
-        table_info.append({
-            "name": table_name,
-            "count": count
-        })
+    table_info = [
+        {"name": table_name, "count": RawTable.count(db, table_name)}
+        for table_name in RawTable.list_tables(db)
+    ]
 
     return render_template("reports/tables.html", tables=table_info)
 
@@ -408,45 +350,58 @@ def view_table(table_name):
     db = get_db()
 
     # Validar que la tabla existe (prevenir SQL injection)
-    valid_tables = db.execute("""
-        SELECT name FROM sqlite_master
-        WHERE type='table' AND name NOT LIKE 'sqlite_%'
-    """).fetchall()
-    valid_table_names = [t["name"] for t in valid_tables]
-
+    valid_table_names = RawTable.list_tables(db)
     if table_name not in valid_table_names:
-        from flask import abort
         abort(404)
 
-    # Obtener información de columnas
-    columns_info = db.execute(f"PRAGMA table_info({table_name})").fetchall()
-    columns = [col["name"] for col in columns_info]
+    columns = [col["name"] for col in RawTable.columns(db, table_name)]
+    indexed_columns = RawTable.indexed_columns(db, table_name)
 
-    # Paginación
-    page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
-    per_page = min(per_page, 200)  # Máximo 200 registros por página
-    offset = (page - 1) * per_page
-
-    # Obtener total de registros
-    total = db.execute(f"SELECT COUNT(*) as count FROM {table_name}").fetchone()["count"]
-    total_pages = (total + per_page - 1) // per_page
-
-    # Obtener registros
-    rows = db.execute(f"SELECT * FROM {table_name} LIMIT ? OFFSET ?", (per_page, offset)).fetchall()
-
-    # Convertir a lista de diccionarios
-    records = [dict(row) for row in rows]
+    per_page = max(1, min(per_page, 200))  # Máximo 200 registros por página
+
+    # Orden y filtro solo sobre columnas indexadas
+    sort = request.args.get("sort", "rowid")
+    if sort not in indexed_columns:
+        sort = "rowid"
+    descending = request.args.get("dir") == "desc"
+    filter_column = request.args.get("filter_col", "").strip() or None
+    filter_value = request.args.get("filter_value", "").strip() or None
+    if filter_column not in indexed_columns:
+        filter_column = filter_value = None
+
+    page = RawTable.get_page(
+        db, table_name, per_page=per_page, sort=sort, descending=descending,
+        filter_column=filter_column, filter_value=filter_value,
+        after=request.args.get("after"), before=request.args.get("before"),
+    )
+    total = RawTable.count(db, table_name, filter_column, filter_value)
+
+    # Parametros que se conservan al navegar entre paginas
+    view_args = {
+        "table_name": table_name,
+        "per_page": per_page,
+        "sort": sort,
+        "dir": "desc" if descending else "asc",
+        "filter_col": filter_column,
+        "filter_value": filter_value,
+    }
 
     return render_template(
         "reports/table_view.html",
         table_name=table_name,
         columns=columns,
-        records=records,
-        page=page,
+        indexed_columns=indexed_columns,
+        records=page["items"],
+        prev_token=page["prev_cursor"],
+        next_token=page["next_cursor"],
+        view_args=view_args,
         per_page=per_page,
+        sort=sort,
+        descending=descending,
+        filter_column=filter_column,
+        filter_value=filter_value,
         total=total,
-        total_pages=total_pages,
         valid_tables=valid_table_names
     )
 
@@ -455,40 +410,38 @@ def view_table(table_name):
 @login_required
 @admin_required
 def export_raw_table(table_name):
-    """Exporta una tabla completa a CSV"""
+    """Exporta una tabla completa"""
     db = get_db()
 
     # Validar tabla
-    valid_tables = db.execute("""
-        SELECT name FROM sqlite_master
-        WHERE type='table' AND name NOT LIKE 'sqlite_%'
-    """).fetchall()
-    valid_table_names = [t["name"] for t in valid_tables]
-
-    if table_name not in valid_table_names:
-        from flask import abort
+    if table_name not in RawTable.list_tables(db):
         abort(404)
 
-    # Obtener columnas
-    columns_info = db.execute(f"PRAGMA table_info({table_name})").fetchall()
-    columns = [col["name"] for col in columns_info]
-
-    # Obtener todos los registros
-    rows = db.execute(f"SELECT * FROM {table_name}").fetchall()
+    schema = RawTable.columns(db, table_name)
+    columns = [col["name"] for col in schema]
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(columns)
+    cursor = db.execute(f"SELECT * FROM {table_name}")
+    rows = ([row[col] for col in columns] for row in iter_cursor(cursor))
+    return export_response(table_name, columns, rows, request.args.get("format"),
+                           column_types_from_schema(schema))
 
-    for row in rows:
-        writer.writerow([row[col] for col in columns])
 
-    output.seek(0)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{table_name}_{timestamp}.csv"
+# ============================================================================
+# ALMACENAMIENTO DE EVIDENCIAS
+# ============================================================================
 
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+@reports_bp.route("/almacenamiento", methods=["GET", "POST"])
+@login_required
+@admin_required
+def storage():
+    """Espacio de actas y videos; POST concilia uploads/ con la base"""
+    db = get_db()
+    report = None
+    if request.method == "POST":
+        report = UploadReconciler.run(db, remove=request.form.get("remove") == "1")
+    return render_template(
+        "reports/storage.html",
+        usage=report["usage"] if report else StorageUsage.get(db),
+        storage_scopes=STORAGE_SCOPES,
+        report=report,
     )
@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, g
 
 from models.database import get_db
-from models.repotentiation import RepotentiationRecord
-from utils.decorators import login_required, admin_required
+from models.project import ProjectRecord
+from models.repotentiation import RepotentiationRecord, REPOTENTIATION_SORT_KEYS
+from utils.decorators import login_required, admin_required, etag_versioned
+from utils.pagination import page_args, page_params
 
 repotentiation_bp = Blueprint('repotentiation', __name__, url_prefix='/repotenciacion')
 
@@ -14,16 +16,15 @@ def index():
     db = get_db()
     serial_filter = request.args.get("serial", "").strip()
 
-    if serial_filter:
-        records = RepotentiationRecord.search_by_serial(db, serial_filter)
-    else:
-        records = RepotentiationRecord.get_all(db)
-
+    args = page_args(request.args, REPOTENTIATION_SORT_KEYS, "fecha_repotenciacion")
+    page = RepotentiationRecord.get_page(db, {"serial": serial_filter}, **args)
     summary = RepotentiationRecord.get_summary(db)
 
     return render_template(
         "repotentiation/index.html",
-        records=records,
+        records=page["items"],
+        page=page,
+        page_params=page_params(page, serial=serial_filter),
         summary=summary,
         serial_filter=serial_filter,
     )
@@ -36,14 +37,6 @@ def create():
     """Registrar nueva repotenciación"""
     db = get_db()
 
-    # Obtener lista de equipos para el selector
-    equipos = db.execute("""
-        SELECT serial_num, hostname, nombre_completo
-        FROM project_records
-        WHERE serial_num IS NOT NULL AND serial_num != ''
-        ORDER BY hostname
-    """).fetchall()
-
     if request.method == "POST":
         data = {
             "equipo_serial": request.form.get("equipo_serial", "").strip(),
@@ -78,17 +71,24 @@ def create():
 
         if not data["equipo_serial"]:
             flash("Debes seleccionar un equipo", "danger")
-            return render_template("repotentiation/form.html", data=data, equipos=equipos)
+            return render_template("repotentiation/form.html", data=data)
+
+        # El selector solo envia el serial; el hostname se toma del equipo
+        equipo = ProjectRecord.get_equipment(db, data["equipo_serial"])
+        if not equipo:
+            flash("Equipo no encontrado", "danger")
+            return render_template("repotentiation/form.html", data=data)
+        data["equipo_hostname"] = equipo["hostname"] or data["equipo_hostname"]
 
         if not data["fecha_repotenciacion"]:
             flash("La fecha de repotenciación es obligatoria", "danger")
-            return render_template("repotentiation/form.html", data=data, equipos=equipos)
+            return render_template("repotentiation/form.html", data=data)
 
         RepotentiationRecord.create(db, data)
         flash("Repotenciación registrada correctamente", "success")
         return redirect(url_for("repotentiation.index"))
 
-    return render_template("repotentiation/form.html", data={}, equipos=equipos)
+    return render_template("repotentiation/form.html", data={})
 
 
 @repotentiation_bp.route("/<int:id>/editar", methods=["GET", "POST"])
@@ -103,13 +103,6 @@ def edit(id):
         flash("Registro no encontrado", "danger")
         return redirect(url_for("repotentiation.index"))
 
-    equipos = db.execute("""
-        SELECT serial_num, hostname, nombre_completo
-        FROM project_records
-        WHERE serial_num IS NOT NULL AND serial_num != ''
-        ORDER BY hostname
-    """).fetchall()
-
     if request.method == "POST":
         data = {
             "fecha_repotenciacion": request.form.get("fecha_repotenciacion", "").strip(),
@@ -144,7 +137,7 @@ def edit(id):
         flash("Registro actualizado correctamente", "success")
         return redirect(url_for("repotentiation.index"))
 
-    return render_template("repotentiation/form.html", data=dict(record), equipos=equipos, editing=True)
+    return render_template("repotentiation/form.html", data=dict(record), editing=True)
 
 
 @repotentiation_bp.route("/<int:id>/eliminar", methods=["POST"])
@@ -165,10 +158,7 @@ def by_equipment(serial):
     db = get_db()
     records = RepotentiationRecord.get_by_serial(db, serial)
 
-    equipo = db.execute("""
-        SELECT serial_num, hostname, nombre_completo
-        FROM project_records WHERE serial_num = ?
-    """, (serial,)).fetchone()
+    equipo = ProjectRecord.get_equipment(db, serial)
 
     return render_template(
         "repotentiation/equipment.html",
@@ -181,6 +171,7 @@ def by_equipment(serial):
 # API Endpoints
 @repotentiation_bp.route("/api/summary")
 @login_required
+@etag_versioned("repotentiation")
 def api_summary():
     """Resumen de repotenciaciones para el dashboard"""
     db = get_db()
@@ -188,6 +179,16 @@ def api_summary():
     return jsonify(summary)
 
 
+@repotentiation_bp.route("/api/registros")
+@login_required
+def api_list():
+    """API paginada del historial (sort, order, limit, after/before)"""
+    db = get_db()
+    filters = {key: request.args.get(key, "").strip() for key in ("equipo_serial", "serial")}
+    args = page_args(request.args, REPOTENTIATION_SORT_KEYS, "fecha_repotenciacion")
+    return jsonify(RepotentiationRecord.get_page(db, filters, **args))
+
+
 @repotentiation_bp.route("/api/buscar")
 @login_required
 def api_search():
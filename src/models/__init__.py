@@ -5,6 +5,14 @@ from models.component import Component, RAMUnit, SSDUnit, ComponentHistory, COMP
 from models.conformity import ConformityRecord
 from models.repotentiation import RepotentiationRecord
 from models.destruction import DiskDestruction, DESTRUCTION_STATUS
+from models.cache import DataVersion, SummaryCache
+from models.upload_job import UploadJob, UPLOAD_JOB_STATUS
+from models.raw_table import RawTable
+from models.search import SearchIndex
+from models.progress import ProgressSnapshot
+from models.video_upload import VideoUpload
+from models.blob_store import BlobStore
+from models.storage import StorageUsage, UploadReconciler
 
 __all__ = [
     'get_db', 'close_db', 'init_db',
@@ -12,5 +20,9 @@ __all__ = [
     'Component', 'RAMUnit', 'SSDUnit', 'ComponentHistory',
     'COMPONENT_STATUS', 'COMPONENT_STATUS_COLORS',
     'ConformityRecord', 'RepotentiationRecord',
-    'DiskDestruction', 'DESTRUCTION_STATUS'
+    'DiskDestruction', 'DESTRUCTION_STATUS',
+    'DataVersion', 'SummaryCache',
+    'UploadJob', 'UPLOAD_JOB_STATUS',
+    'RawTable', 'SearchIndex', 'ProgressSnapshot', 'VideoUpload',
+    'BlobStore', 'StorageUsage', 'UploadReconciler'
 ]
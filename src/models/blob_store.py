@@ -0,0 +1,197 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+from config import BASE_DIR
+
+# Archivos subidos direccionados por contenido: blobs/<2 primeros hex>/<sha256>
+BLOBS_DIR = BASE_DIR / "uploads" / "blobs"
+BLOBS_TMP_DIR = BLOBS_DIR / "tmp"
+BLOBS_TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+logger = logging.getLogger(__name__)
+
+# Bytes leidos por bloque al copiar y calcular el hash
+BLOB_BLOCK_SIZE = 1024 * 1024
+
+# Columnas de ruta que referencian blobs: (tabla, columna)
+BLOB_REFERENCES = (
+    ("conformity_records", "ruta_archivo"),
+    ("disk_destructions", "video_ruta"),
+)
+
+
+def remove_file(path: str) -> bool:
+    """Borra un archivo subido; un error se registra en el log pero no impide
+    borrar el registro (el archivo queda para la conciliacion)"""
+    try:
+        Path(path).unlink(missing_ok=True)
+        return True
+    except OSError as error:
+        logger.warning("No se pudo borrar el archivo %s: %s", path, error)
+        return False
+
+
+class BlobStore:
+    """Almacen de archivos por contenido (SHA-256) con conteo de referencias.
+
+    Un mismo archivo subido para varios registros se guarda una sola vez; los
+    registros guardan la ruta del blob y este se borra al liberar la ultima
+    referencia. Solo `purge` hace commit: el conteo se confirma junto con el
+    registro que lo usa y el archivo se borra despues.
+    """
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de blobs si no existe"""
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        db.commit()
+
+    @staticmethod
+    def blob_path(sha256: str) -> Path:
+        return BLOBS_DIR / sha256[:2] / sha256
+
+    @staticmethod
+    def sha256_of(path: str) -> Optional[str]:
+        """SHA-256 del blob si `path` es una ruta del almacen, si no None"""
+        candidate = Path(path)
+        if candidate.parent.parent != BLOBS_DIR or candidate.parent.name != candidate.name[:2]:
+            return None
+        return candidate.name
+
+    @staticmethod
+    def _store(db: sqlite3.Connection, temp_path: str, sha256: str, size: int) -> str:
+        # Primero el conteo (toma el lock de escritura de SQLite) y luego el archivo:
+        # un release concurrente del mismo blob ya no puede borrarlo despues
+        db.execute("""
+            INSERT INTO blobs (sha256, size, refcount) VALUES (?, ?, 1)
+            ON CONFLICT(sha256) DO UPDATE SET refcount = refcount + 1
+        """, (sha256, size))
+        target = BlobStore.blob_path(sha256)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Si ya existia, el contenido es identico y reemplazarlo no cuesta una copia
+        os.replace(temp_path, target)
+        return str(target)
+
+    @staticmethod
+    def put_stream(db: sqlite3.Connection, stream: BinaryIO) -> str:
+        """Guarda el contenido de `stream` calculando el hash mientras se copia
+        y retorna la ruta del blob"""
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=BLOBS_TMP_DIR)
+        try:
+            with os.fdopen(handle, "wb") as target:
+                while True:
+                    block = stream.read(BLOB_BLOCK_SIZE)
+                    if not block:
+                        break
+                    size += len(block)
+                    digest.update(block)
+                    target.write(block)
+            return BlobStore._store(db, temp_path, digest.hexdigest(), size)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    @staticmethod
+    def put_file(db: sqlite3.Connection, path: str) -> str:
+        """Mueve al almacen un archivo ya escrito en disco (sin copiarlo si esta
+        en el mismo volumen) y retorna la ruta del blob"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as source:
+            for block in iter(lambda: source.read(BLOB_BLOCK_SIZE), b""):
+                digest.update(block)
+        return BlobStore._store(db, path, digest.hexdigest(), os.path.getsize(path))
+
+    @staticmethod
+    def release(db: sqlite3.Connection, path: Optional[str]) -> Optional[str]:
+        """Libera una referencia a `path` sin tocar el disco.
+
+        Retorna la ruta que quedo sin referencias (o None) para borrarla con
+        `purge` despues del commit: si la transaccion se revierte, el registro
+        sigue apuntando a un archivo que existe. Las rutas fuera del almacen
+        (archivos anteriores a la migracion) siempre se retornan.
+        """
+        if not path:
+            return None
+        sha256 = BlobStore.sha256_of(path)
+        if sha256 is None:
+            return path
+
+        db.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", (sha256,))
+        row = db.execute("SELECT refcount FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        if row is not None and row["refcount"] > 0:
+            return None
+        db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+        return path
+
+    @staticmethod
+    def purge(db: sqlite3.Connection, path: Optional[str]) -> bool:
+        """Borra el archivo retornado por `release`; se llama despues del commit.
+
+        Si el mismo contenido se volvio a subir entretanto, el blob se conserva.
+        Retorna True si se elimino el archivo.
+        """
+        if not path:
+            return False
+        sha256 = BlobStore.sha256_of(path)
+        if sha256 is None:
+            return remove_file(path)
+
+        # Con el lock de escritura tomado, un _store concurrente no puede registrar
+        # el blob entre la consulta y el borrado (registra el conteo antes del archivo)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if db.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone():
+                return False
+            return remove_file(path)
+        finally:
+            db.commit()
+
+    @staticmethod
+    def dedupe_existing(db: sqlite3.Connection) -> Dict[str, int]:
+        """Mueve al almacen los archivos de actas y videos guardados con el
+        esquema anterior (serial + fecha) y actualiza las rutas de los registros.
+
+        Los duplicados quedan como un solo blob. Es idempotente: solo procesa
+        rutas que aun no son blobs. Retorna conteos y bytes liberados.
+        """
+        stats = {"files": 0, "missing": 0, "deduplicated": 0, "bytes_saved": 0}
+        existing = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, column in BLOB_REFERENCES:
+            if table not in existing:
+                continue
+            rows = db.execute(
+                f"SELECT id, {column} AS path FROM {table} WHERE {column} IS NOT NULL AND {column} != ''"
+            ).fetchall()
+            for row in rows:
+                if BlobStore.sha256_of(row["path"]):
+                    continue
+                if not os.path.exists(row["path"]):
+                    stats["missing"] += 1
+                    continue
+                size = os.path.getsize(row["path"])
+                blob_path = BlobStore.put_file(db, row["path"])
+                db.execute(f"UPDATE {table} SET {column} = ? WHERE id = ?", (blob_path, row["id"]))
+                # Cada archivo se confirma por separado: un corte no deja rutas rotas
+                db.commit()
+                stats["files"] += 1
+                refcount = db.execute(
+                    "SELECT refcount FROM blobs WHERE sha256 = ?", (BlobStore.sha256_of(blob_path),)
+                ).fetchone()[0]
+                if refcount > 1:
+                    stats["deduplicated"] += 1
+                    stats["bytes_saved"] += size
+        return stats
@@ -0,0 +1,112 @@
+import sqlite3
+import json
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from config import SUMMARY_CACHE_MAX_ENTRIES
+
+# Segundos minimos entre actualizaciones de last_access de una misma entrada
+_TOUCH_INTERVAL = 30
+
+
+class DataVersion:
+    """Contadores de version por conjunto de datos, compartidos por todos los workers"""
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de versiones si no existe"""
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS data_versions (
+                scope TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        db.commit()
+
+    @staticmethod
+    def bump(db: sqlite3.Connection, *scopes: str) -> None:
+        """Incrementa la version de los conjuntos indicados.
+
+        No hace commit: el incremento se confirma junto con la escritura que
+        lo origina.
+        """
+        for scope in scopes:
+            db.execute("""
+                INSERT INTO data_versions (scope, version) VALUES (?, 1)
+                ON CONFLICT(scope) DO UPDATE SET version = version + 1
+            """, (scope,))
+
+    @staticmethod
+    def token(db: sqlite3.Connection, *scopes: str) -> str:
+        """Retorna un identificador de la version actual de los conjuntos indicados"""
+        placeholders = ", ".join("?" for _ in scopes)
+        rows = db.execute(
+            f"SELECT scope, version FROM data_versions WHERE scope IN ({placeholders})",
+            scopes,
+        ).fetchall()
+        versions = {row["scope"]: row["version"] for row in rows}
+        return ".".join(str(versions.get(scope, 0)) for scope in scopes)
+
+
+class SummaryCache:
+    """Cache LRU de resumenes en la base de datos, valida mientras no cambie la version"""
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de cache si no existe"""
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                cache_key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        db.commit()
+
+    @staticmethod
+    def make_key(namespace: str, filters: Dict) -> str:
+        """Clave estable para un conjunto de filtros (ignora filtros vacios y el orden)"""
+        normalized = {key: value for key, value in filters.items() if value not in (None, "")}
+        raw = json.dumps([namespace, normalized], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get(db: sqlite3.Connection, namespace: str, filters: Dict, version: str) -> Optional[Any]:
+        key = SummaryCache.make_key(namespace, filters)
+        row = db.execute(
+            "SELECT version, payload, last_access FROM summary_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if not row or row["version"] != version:
+            return None
+
+        now = time.time()
+        if now - row["last_access"] > _TOUCH_INTERVAL:
+            db.execute("UPDATE summary_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            db.commit()
+        return json.loads(row["payload"])
+
+    @staticmethod
+    def set(db: sqlite3.Connection, namespace: str, filters: Dict, version: str, payload: Any,
+            max_entries: int = SUMMARY_CACHE_MAX_ENTRIES) -> None:
+        key = SummaryCache.make_key(namespace, filters)
+        db.execute("""
+            INSERT INTO summary_cache (cache_key, version, payload, last_access)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                version = excluded.version,
+                payload = excluded.payload,
+                last_access = excluded.last_access
+        """, (key, version, json.dumps(payload, ensure_ascii=False), time.time()))
+
+        # Expulsar las entradas menos usadas recientemente
+        db.execute("""
+            DELETE FROM summary_cache WHERE cache_key IN (
+                SELECT cache_key FROM summary_cache
+                ORDER BY last_access DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,))
+        db.commit()
+
@@ -1,7 +1,12 @@
 import sqlite3
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+from config import BULK_CHUNK_SIZE
+from models.cache import DataVersion
+from models.database import create_indexes
+from models.pagination import keyset_page, cached_count, prefix_condition, DEFAULT_PAGE_SIZE
+
 
 # Estados de componentes
 COMPONENT_STATUS = {
@@ -19,6 +24,24 @@ COMPONENT_STATUS_COLORS = {
     "DEFECTUOSO": "#dc3545",     # rojo
 }
 
+# Indices para listados por estado, orden por fecha de registro y busquedas por equipo
+COMPONENT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_ram_units_estado_fecha ON ram_units(estado, fecha_registro)",
+    "CREATE INDEX IF NOT EXISTS idx_ram_units_fecha_registro ON ram_units(fecha_registro)",
+    "CREATE INDEX IF NOT EXISTS idx_ram_units_equipo_serial ON ram_units(equipo_serial)",
+    "CREATE INDEX IF NOT EXISTS idx_ssd_units_estado_fecha ON ssd_units(estado, fecha_registro)",
+    "CREATE INDEX IF NOT EXISTS idx_ssd_units_fecha_registro ON ssd_units(fecha_registro)",
+    "CREATE INDEX IF NOT EXISTS idx_ssd_units_equipo_serial ON ssd_units(equipo_serial)",
+    "CREATE INDEX IF NOT EXISTS idx_component_history_componente "
+    "ON component_history(tipo_componente, componente_id, fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_component_history_fecha ON component_history(fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_component_history_equipo_anterior ON component_history(equipo_serial_anterior)",
+    "CREATE INDEX IF NOT EXISTS idx_component_history_equipo_nuevo ON component_history(equipo_serial_nuevo)",
+]
+
+# Columnas por las que se pueden ordenar los listados de RAM/SSD (todas con indice)
+COMPONENT_SORT_KEYS = ("fecha_registro", "serial_num", "id")
+
 
 class Component:
     """Clase base para componentes (RAM y SSD)"""
@@ -84,6 +107,66 @@ class Component:
         """)
 
         db.commit()
+        Component.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, COMPONENT_INDEXES)
+
+
+def _bulk_upsert(db: sqlite3.Connection, table: str, columns: List[str], rows: List[Dict],
+                 chunk_size: int) -> Tuple[int, int]:
+    """Inserta o actualiza por serial_num en lotes con executemany; retorna (insertados, actualizados).
+
+    Igual que `update`, una fila existente queda sin equipo asignado. No hace
+    commit: todos los lotes se confirman en la transaccion del llamador.
+    """
+    updates = [f"{column} = excluded.{column}" for column in columns if column != "serial_num"]
+    updates += ["equipo_serial = NULL", "fecha_instalacion = NULL"]
+    upsert = f"""
+        INSERT INTO {table} ({", ".join(columns)})
+        VALUES ({", ".join("?" for _ in columns)})
+        ON CONFLICT(serial_num) DO UPDATE SET {", ".join(updates)}
+    """
+
+    inserted = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        serials = list({row["serial_num"] for row in chunk})
+        placeholders = ", ".join("?" for _ in serials)
+        existing = db.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE serial_num IN ({placeholders})", serials
+        ).fetchone()[0]
+        # Un serial repetido en el archivo cuenta como insercion la primera vez
+        inserted += len(serials) - existing
+        db.executemany(upsert, [[row.get(column) for column in columns] for row in chunk])
+
+    if rows:
+        DataVersion.bump(db, "inventory")
+    return inserted, len(rows) - inserted
+
+
+def _component_page(db: sqlite3.Connection, table: str, filters: Dict, sort: str, descending: bool,
+                    limit: int, after: str, before: str) -> Dict:
+    """Pagina de RAM/SSD filtrada por estado, equipo o prefijo de serial"""
+    where, params = [], []
+    if filters.get("estado"):
+        where.append("estado = ?")
+        params.append(filters["estado"])
+    if filters.get("equipo_serial"):
+        where.append("equipo_serial = ?")
+        params.append(filters["equipo_serial"])
+    if filters.get("serial"):
+        condition, prefix_params = prefix_condition("serial_num", filters["serial"])
+        where.append(condition)
+        params.extend(prefix_params)
+
+    sort = sort if sort in COMPONENT_SORT_KEYS else "fecha_registro"
+    page = keyset_page(db, "*", table, where, params, sort, "id", descending, limit, after, before)
+    page["total"] = cached_count(db, table, where, params, ("inventory",), dict(filters, list=table))
+    page["sort"] = sort
+    page["order"] = "desc" if descending else "asc"
+    return page
 
 
 class RAMUnit:
@@ -106,13 +189,25 @@ class RAMUnit:
 
     @staticmethod
     def get_all(db: sqlite3.Connection, estado: str = None) -> List[sqlite3.Row]:
+        return RAMUnit.iter_all(db, estado).fetchall()
+
+    @staticmethod
+    def get_page(db: sqlite3.Connection, filters: Dict = None, sort: str = "fecha_registro",
+                 descending: bool = True, limit: int = DEFAULT_PAGE_SIZE, after: str = None,
+                 before: str = None) -> Dict:
+        """Pagina del listado; filtros: estado, equipo_serial, serial (prefijo)"""
+        return _component_page(db, "ram_units", filters or {}, sort, descending, limit, after, before)
+
+    @staticmethod
+    def iter_all(db: sqlite3.Connection, estado: str = None) -> sqlite3.Cursor:
+        """Igual que get_all, como cursor sin materializar (exportaciones por streaming)"""
         query = "SELECT * FROM ram_units"
         params = []
         if estado:
             query += " WHERE estado = ?"
             params.append(estado)
         query += " ORDER BY fecha_registro DESC"
-        return db.execute(query, params).fetchall()
+        return db.execute(query, params)
 
     @staticmethod
     def get_by_id(db: sqlite3.Connection, id: int) -> Optional[sqlite3.Row]:
@@ -136,6 +231,7 @@ class RAMUnit:
             data.get("estado", "POR_ENTREGAR"),
             data.get("notas"),
         ))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return cursor.lastrowid
 
@@ -157,9 +253,20 @@ class RAMUnit:
             data.get("notas"),
             id,
         ))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
+    @staticmethod
+    def bulk_upsert(db: sqlite3.Connection, rows: List[Dict],
+                    chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, int]:
+        """Carga masiva por serial_num; retorna (insertados, actualizados) sin hacer commit"""
+        return _bulk_upsert(
+            db, "ram_units",
+            ["serial_num", "marca", "capacidad_gb", "tipo", "velocidad_mhz", "estado", "notas"],
+            rows, chunk_size,
+        )
+
     @staticmethod
     def assign_to_equipment(db: sqlite3.Connection, ram_id: int, equipo_serial: str, usuario: str = None) -> bool:
         """Asigna una RAM a un equipo"""
@@ -185,6 +292,7 @@ class RAMUnit:
         """, ("RAM", ram_id, ram["serial_num"], "INSTALACION", old_equipo, equipo_serial,
               old_estado, "INSTALADO", usuario, f"Instalación en equipo {equipo_serial}"))
 
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
@@ -211,6 +319,7 @@ class RAMUnit:
         """, ("RAM", ram_id, ram["serial_num"], "DESINSTALACION", old_equipo,
               old_estado, "POR_ASIGNAR", usuario, notas))
 
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
@@ -242,6 +351,7 @@ class RAMUnit:
     def delete(db: sqlite3.Connection, id: int) -> bool:
         """Elimina una unidad de RAM"""
         db.execute("DELETE FROM ram_units WHERE id = ?", (id,))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
@@ -251,13 +361,25 @@ class SSDUnit:
 
     @staticmethod
     def get_all(db: sqlite3.Connection, estado: str = None) -> List[sqlite3.Row]:
+        return SSDUnit.iter_all(db, estado).fetchall()
+
+    @staticmethod
+    def get_page(db: sqlite3.Connection, filters: Dict = None, sort: str = "fecha_registro",
+                 descending: bool = True, limit: int = DEFAULT_PAGE_SIZE, after: str = None,
+                 before: str = None) -> Dict:
+        """Pagina del listado; filtros: estado, equipo_serial, serial (prefijo)"""
+        return _component_page(db, "ssd_units", filters or {}, sort, descending, limit, after, before)
+
+    @staticmethod
+    def iter_all(db: sqlite3.Connection, estado: str = None) -> sqlite3.Cursor:
+        """Igual que get_all, como cursor sin materializar (exportaciones por streaming)"""
         query = "SELECT * FROM ssd_units"
         params = []
         if estado:
             query += " WHERE estado = ?"
             params.append(estado)
         query += " ORDER BY fecha_registro DESC"
-        return db.execute(query, params).fetchall()
+        return db.execute(query, params)
 
     @staticmethod
     def get_by_id(db: sqlite3.Connection, id: int) -> Optional[sqlite3.Row]:
@@ -281,6 +403,7 @@ class SSDUnit:
             data.get("estado", "POR_ENTREGAR"),
             data.get("notas"),
         ))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return cursor.lastrowid
 
@@ -302,9 +425,20 @@ class SSDUnit:
             data.get("notas"),
             id,
         ))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
+    @staticmethod
+    def bulk_upsert(db: sqlite3.Connection, rows: List[Dict],
+                    chunk_size: int = BULK_CHUNK_SIZE) -> Tuple[int, int]:
+        """Carga masiva por serial_num; retorna (insertados, actualizados) sin hacer commit"""
+        return _bulk_upsert(
+            db, "ssd_units",
+            ["serial_num", "marca", "modelo", "capacidad_gb", "tipo", "estado", "notas"],
+            rows, chunk_size,
+        )
+
     @staticmethod
     def assign_to_equipment(db: sqlite3.Connection, ssd_id: int, equipo_serial: str, usuario: str = None) -> bool:
         """Asigna un SSD a un equipo"""
@@ -329,6 +463,7 @@ class SSDUnit:
         """, ("SSD", ssd_id, ssd["serial_num"], "INSTALACION", old_equipo, equipo_serial,
               old_estado, "INSTALADO", usuario, f"Instalación en equipo {equipo_serial}"))
 
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
@@ -355,6 +490,7 @@ class SSDUnit:
         """, ("SSD", ssd_id, ssd["serial_num"], "DESINSTALACION", old_equipo,
               old_estado, "POR_ASIGNAR", usuario, notas))
 
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
@@ -386,6 +522,7 @@ class SSDUnit:
     def delete(db: sqlite3.Connection, id: int) -> bool:
         """Elimina una unidad de SSD"""
         db.execute("DELETE FROM ssd_units WHERE id = ?", (id,))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return True
 
@@ -411,9 +548,14 @@ class ComponentHistory:
 
     @staticmethod
     def get_recent(db: sqlite3.Connection, limit: int = 20) -> List[sqlite3.Row]:
+        return ComponentHistory.iter_recent(db, limit).fetchall()
+
+    @staticmethod
+    def iter_recent(db: sqlite3.Connection, limit: int = 20) -> sqlite3.Cursor:
+        """Igual que get_recent, como cursor sin materializar"""
         return db.execute("""
             SELECT * FROM component_history ORDER BY fecha DESC LIMIT ?
-        """, (limit,)).fetchall()
+        """, (limit,))
 
     @staticmethod
     def add_entry(db: sqlite3.Connection, data: Dict) -> int:
@@ -437,5 +579,6 @@ class ComponentHistory:
             data.get("usuario"),
             data.get("notas"),
         ))
+        DataVersion.bump(db, "inventory")
         db.commit()
         return cursor.lastrowid
@@ -2,8 +2,11 @@ import sqlite3
 import os
 from typing import List, Dict, Optional
 from datetime import datetime
-from pathlib import Path
 from config import BASE_DIR
+from models.blob_store import BlobStore
+from models.cache import DataVersion
+from models.database import create_indexes
+from models.pagination import keyset_page, cached_count, DEFAULT_PAGE_SIZE
 
 # Directorio para almacenar archivos
 UPLOADS_DIR = BASE_DIR / "uploads" / "actas"
@@ -12,6 +15,19 @@ UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 ALLOWED_EXTENSIONS = {'pdf', 'msg'}
 
 
+# Indices para listados por fecha, busquedas por equipo, resumen por tipo y
+# conciliacion de archivos (buscar el registro de un archivo en disco)
+CONFORMITY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_conformity_records_equipo ON conformity_records(equipo_serial, fecha_subida)",
+    "CREATE INDEX IF NOT EXISTS idx_conformity_records_fecha_subida ON conformity_records(fecha_subida)",
+    "CREATE INDEX IF NOT EXISTS idx_conformity_records_tipo ON conformity_records(tipo_archivo)",
+    "CREATE INDEX IF NOT EXISTS idx_conformity_records_ruta ON conformity_records(ruta_archivo)",
+]
+
+# Columnas por las que se puede ordenar el listado de actas (todas con indice)
+CONFORMITY_SORT_KEYS = ("fecha_subida", "equipo_serial", "id")
+
+
 class ConformityRecord:
     """Modelo para Actas de Conformidad"""
 
@@ -34,6 +50,11 @@ class ConformityRecord:
             )
         """)
         db.commit()
+        ConformityRecord.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, CONFORMITY_INDEXES)
 
     @staticmethod
     def get_all(db: sqlite3.Connection, equipo_serial: str = None) -> List[sqlite3.Row]:
@@ -49,6 +70,69 @@ class ConformityRecord:
         query += " ORDER BY cr.fecha_subida DESC"
         return db.execute(query, params).fetchall()
 
+    @staticmethod
+    def get_page(db: sqlite3.Connection, filters: Dict = None, sort: str = "fecha_subida",
+                 descending: bool = True, limit: int = DEFAULT_PAGE_SIZE, after: str = None,
+                 before: str = None) -> Dict:
+        """Pagina del listado; filtros: equipo_serial, tipo_archivo"""
+        filters = filters or {}
+        where, params = [], []
+        if filters.get("equipo_serial"):
+            where.append("cr.equipo_serial = ?")
+            params.append(filters["equipo_serial"])
+        if filters.get("tipo_archivo"):
+            where.append("cr.tipo_archivo = ?")
+            params.append(filters["tipo_archivo"])
+
+        sort = sort if sort in CONFORMITY_SORT_KEYS else "fecha_subida"
+        source = """
+            conformity_records cr
+            LEFT JOIN project_records pr ON cr.equipo_serial = pr.serial_num
+        """
+        page = keyset_page(
+            db, "cr.*, pr.nombre_completo, pr.hostname", source, where, params,
+            f"cr.{sort}", "cr.id", descending, limit, after, before,
+        )
+        page["total"] = cached_count(
+            db, "conformity_records cr", where, params, ("conformity",),
+            dict(filters, list="conformity_records"),
+        )
+        page["sort"] = sort
+        page["order"] = "desc" if descending else "asc"
+        return page
+
+    @staticmethod
+    def iter_bundle(db: sqlite3.Connection, filters: Dict = None) -> sqlite3.Cursor:
+        """Cursor de actas para el ZIP de auditoria con la sede y fase del equipo.
+
+        Filtros: nom_sede, fase, fecha_inicio y fecha_fin (YYYY-MM-DD, inclusivas,
+        sobre fecha_subida para usar su indice).
+        """
+        filters = filters or {}
+        where, params = [], []
+        if filters.get("nom_sede"):
+            where.append("pr.nom_sede = ?")
+            params.append(filters["nom_sede"])
+        if filters.get("fase"):
+            where.append("pr.fase = ?")
+            params.append(filters["fase"])
+        if filters.get("fecha_inicio"):
+            where.append("cr.fecha_subida >= ?")
+            params.append(filters["fecha_inicio"])
+        if filters.get("fecha_fin"):
+            where.append("cr.fecha_subida < date(?, '+1 day')")
+            params.append(filters["fecha_fin"])
+
+        query = """
+            SELECT cr.*, pr.nom_sede, pr.fase
+            FROM conformity_records cr
+            LEFT JOIN project_records pr ON cr.equipo_serial = pr.serial_num
+        """
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY cr.id"
+        return db.execute(query, params)
+
     @staticmethod
     def get_by_id(db: sqlite3.Connection, id: int) -> Optional[sqlite3.Row]:
         return db.execute("""
@@ -83,6 +167,7 @@ class ConformityRecord:
             data.get("subido_por"),
             data.get("notas"),
         ))
+        DataVersion.bump(db, "conformity")
         db.commit()
         return cursor.lastrowid
 
@@ -92,16 +177,12 @@ class ConformityRecord:
         if not record:
             return False
 
-        # Eliminar archivo físico
-        try:
-            file_path = Path(record["ruta_archivo"])
-            if file_path.exists():
-                file_path.unlink()
-        except Exception:
-            pass
-
         db.execute("DELETE FROM conformity_records WHERE id = ?", (id,))
+        # El archivo solo se borra si ninguna otra acta comparte el mismo contenido
+        released = BlobStore.release(db, record["ruta_archivo"])
+        DataVersion.bump(db, "conformity")
         db.commit()
+        BlobStore.purge(db, released)
         return True
 
     @staticmethod
@@ -129,8 +210,11 @@ class ConformityRecord:
                filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
     @staticmethod
-    def save_file(file, equipo_serial: str) -> tuple:
-        """Guarda un archivo y retorna (nombre_seguro, ruta_completa, tipo)"""
+    def save_file(db: sqlite3.Connection, file, equipo_serial: str) -> tuple:
+        """Guarda un archivo en el almacen de blobs y retorna (nombre_seguro, ruta_completa, tipo).
+
+        La referencia al blob queda pendiente del commit de `create`.
+        """
         if not file or not file.filename:
             return None, None, None
 
@@ -141,12 +225,6 @@ class ConformityRecord:
         ext = filename.rsplit('.', 1)[1].lower()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_filename = f"{equipo_serial}_{timestamp}.{ext}"
+        file_path = BlobStore.put_stream(db, file.stream)
 
-        # Crear subdirectorio por equipo
-        equipo_dir = UPLOADS_DIR / equipo_serial
-        equipo_dir.mkdir(parents=True, exist_ok=True)
-
-        file_path = equipo_dir / safe_filename
-        file.save(str(file_path))
-
-        return safe_filename, str(file_path), ext.upper()
+        return safe_filename, file_path, ext.upper()
@@ -1,18 +1,196 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
 from flask import g, current_app
 
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+# Ultima ejecucion de PRAGMA optimize en este proceso
+_optimize_lock = threading.Lock()
+_last_optimize = time.monotonic()
+
+
+def configure_connection(conn: sqlite3.Connection, config: Mapping) -> sqlite3.Connection:
+    """Aplica los PRAGMA de la configuracion (SQLITE_*) a una conexion nueva"""
+    journal_mode = str(config.get("SQLITE_JOURNAL_MODE", "WAL")).upper()
+    synchronous = str(config.get("SQLITE_SYNCHRONOUS", "NORMAL")).upper()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE invalido: {journal_mode}")
+    if synchronous not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS invalido: {synchronous}")
+
+    conn.execute(f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    conn.execute(f"PRAGMA mmap_size = {int(config.get('SQLITE_MMAP_SIZE', 0))}")
+    conn.execute(f"PRAGMA cache_size = {int(config.get('SQLITE_CACHE_SIZE', -2000))}")
+    return conn
+
+
+def connect(database: str, config: Mapping, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Abre una conexion configurada con row_factory=sqlite3.Row"""
+    conn = sqlite3.connect(
+        database,
+        timeout=config.get("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000,
+        check_same_thread=check_same_thread,
+    )
+    conn.row_factory = sqlite3.Row
+    return configure_connection(conn, config)
+
+
+class ConnectionPool:
+    """Pool de conexiones configuradas de un proceso, seguro entre hilos.
+
+    Conserva hasta `size` conexiones ociosas; las que se piden por encima de
+    ese numero se abren y se cierran al devolverse. Cada conexion se usa por
+    un solo hilo a la vez.
+    """
+
+    def __init__(self, database: str, config: Mapping, size: int):
+        self.database = database
+        self.config = dict(config)
+        self.size = size
+        self.closed = False
+        # LIFO: se reutiliza primero la conexion con la cache mas caliente
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return connect(self.database, self.config, check_same_thread=False)
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Devuelve la conexion al pool, descartando cualquier transaccion pendiente"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+            conn.set_trace_callback(None)
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        if self.closed:
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def close_all(self) -> None:
+        """Cierra las conexiones ociosas; las que estan en uso se cierran al devolverse"""
+        self.closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+# Pools del proceso actual, por ruta de base de datos
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+# Pools heredados por fork: se conservan sin cerrar, el proceso padre sigue usandolos
+_inherited_pools: List[ConnectionPool] = []
+
+
+def _reset_pools_after_fork() -> None:
+    global _pools, _pools_lock
+    _inherited_pools.extend(_pools.values())
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+def get_pool(database: str, config: Mapping) -> Optional[ConnectionPool]:
+    """Pool del proceso para la base indicada, o None si SQLITE_POOL_SIZE es 0"""
+    size = int(config.get("SQLITE_POOL_SIZE", 0))
+    if size <= 0:
+        return None
+    with _pools_lock:
+        pool = _pools.get(database)
+        if pool is None or pool.size != size:
+            if pool is not None:
+                pool.close_all()
+            pool = _pools[database] = ConnectionPool(database, config, size)
+        return pool
+
+
+def maybe_optimize(conn: sqlite3.Connection, interval: int) -> bool:
+    """Ejecuta PRAGMA optimize si paso el intervalo desde la ultima vez en este proceso"""
+    global _last_optimize
+    if interval <= 0:
+        return False
+    with _optimize_lock:
+        now = time.monotonic()
+        if now - _last_optimize < interval:
+            return False
+        _last_optimize = now
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.OperationalError:
+        # Otra conexion tiene el bloqueo de escritura; se intentara en el proximo intervalo
+        return False
+    return True
+
 
 def get_db() -> sqlite3.Connection:
     if "db" not in g:
-        g.db = sqlite3.connect(current_app.config["DATABASE"])
-        g.db.row_factory = sqlite3.Row
+        pool = get_pool(current_app.config["DATABASE"], current_app.config)
+        if pool is not None:
+            g.db = pool.acquire()
+            g.db_pool = pool
+        else:
+            g.db = connect(current_app.config["DATABASE"], current_app.config)
     return g.db
 
 
 def close_db(exception=None):
     db = g.pop("db", None)
+    pool = g.pop("db_pool", None)
     if db is not None:
-        db.close()
+        if exception is None:
+            maybe_optimize(db, current_app.config.get("SQLITE_OPTIMIZE_INTERVAL", 0))
+        if pool is not None:
+            pool.release(db)
+        else:
+            db.close()
+
+
+def create_indexes(db: sqlite3.Connection, statements: List[str]) -> List[str]:
+    """Crea indices de forma idempotente; retorna los errores (por ejemplo, columnas faltantes)"""
+    errors = []
+    for statement in statements:
+        try:
+            db.execute(statement)
+        except sqlite3.OperationalError as exc:
+            errors.append(f"{statement}: {exc}")
+    db.commit()
+    return errors
 
 
 def init_db() -> None:
@@ -22,6 +200,13 @@ def init_db() -> None:
     from models.conformity import ConformityRecord
     from models.repotentiation import RepotentiationRecord
     from models.destruction import DiskDestruction
+    from models.cache import DataVersion, SummaryCache
+    from models.upload_job import UploadJob
+    from models.search import SearchIndex
+    from models.progress import ProgressSnapshot
+    from models.video_upload import VideoUpload
+    from models.blob_store import BlobStore
+    from models.storage import StorageUsage
 
     db = get_db()
 
@@ -38,9 +223,19 @@ def init_db() -> None:
     )
 
     User.ensure_role_column(db)
+    # Antes que el esquema de project_records: el relleno de columnas derivadas
+    # de una base existente incrementa data_versions (mismo orden que migrate_db.py)
+    DataVersion.ensure_table(db)
+    SummaryCache.ensure_table(db)
     ProjectRecord.ensure_schema(db)
     Component.ensure_tables(db)
     ConformityRecord.ensure_table(db)
     RepotentiationRecord.ensure_table(db)
     DiskDestruction.ensure_table(db)
+    UploadJob.ensure_table(db)
+    ProgressSnapshot.ensure_table(db)
+    VideoUpload.ensure_table(db)
+    BlobStore.ensure_table(db)
+    StorageUsage.ensure_table(db)
+    SearchIndex.ensure(db)
     User.ensure_initial_admin(db)
@@ -2,8 +2,11 @@ import sqlite3
 import os
 from typing import List, Dict, Optional
 from datetime import datetime
-from pathlib import Path
 from config import BASE_DIR
+from models.blob_store import BlobStore
+from models.cache import DataVersion
+from models.database import create_indexes
+from models.pagination import keyset_page, cached_count, DEFAULT_PAGE_SIZE
 
 # Directorio para almacenar videos de destrucción
 VIDEOS_DIR = BASE_DIR / "uploads" / "destruccion"
@@ -21,6 +24,20 @@ DESTRUCTION_STATUS = {
 }
 
 
+# Indices para listados por estado, orden por fecha y busquedas por serial
+DESTRUCTION_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_disk_destructions_disco_serial ON disk_destructions(disco_serial)",
+    "CREATE INDEX IF NOT EXISTS idx_disk_destructions_estado_fecha ON disk_destructions(estado, fecha_registro)",
+    "CREATE INDEX IF NOT EXISTS idx_disk_destructions_fecha_registro ON disk_destructions(fecha_registro)",
+    "CREATE INDEX IF NOT EXISTS idx_disk_destructions_equipo_origen ON disk_destructions(equipo_origen_serial)",
+    # Conciliacion de archivos: buscar el registro de un video en disco
+    "CREATE INDEX IF NOT EXISTS idx_disk_destructions_video_ruta ON disk_destructions(video_ruta)",
+]
+
+# Columnas por las que se puede ordenar el listado de destrucciones (todas con indice)
+DESTRUCTION_SORT_KEYS = ("fecha_registro", "disco_serial", "id")
+
+
 class DiskDestruction:
     """Modelo para gestionar la destrucción de discos"""
 
@@ -58,9 +75,50 @@ class DiskDestruction:
             )
         """)
         db.commit()
+        DiskDestruction.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, DESTRUCTION_INDEXES)
 
     @staticmethod
     def get_all(db: sqlite3.Connection, estado: str = None) -> List[sqlite3.Row]:
+        return DiskDestruction.iter_all(db, estado).fetchall()
+
+    @staticmethod
+    def get_page(db: sqlite3.Connection, filters: Dict = None, sort: str = "fecha_registro",
+                 descending: bool = True, limit: int = DEFAULT_PAGE_SIZE, after: str = None,
+                 before: str = None) -> Dict:
+        """Pagina del listado; filtros: estado, equipo_origen_serial"""
+        filters = filters or {}
+        where, params = [], []
+        if filters.get("estado"):
+            where.append("dd.estado = ?")
+            params.append(filters["estado"])
+        if filters.get("equipo_origen_serial"):
+            where.append("dd.equipo_origen_serial = ?")
+            params.append(filters["equipo_origen_serial"])
+
+        sort = sort if sort in DESTRUCTION_SORT_KEYS else "fecha_registro"
+        source = """
+            disk_destructions dd
+            LEFT JOIN project_records pr ON dd.equipo_origen_serial = pr.serial_num
+        """
+        page = keyset_page(
+            db, "dd.*, pr.nombre_completo, pr.hostname as hostname_actual", source, where, params,
+            f"dd.{sort}", "dd.id", descending, limit, after, before,
+        )
+        page["total"] = cached_count(
+            db, "disk_destructions dd", where, params, ("destruction",),
+            dict(filters, list="disk_destructions"),
+        )
+        page["sort"] = sort
+        page["order"] = "desc" if descending else "asc"
+        return page
+
+    @staticmethod
+    def iter_all(db: sqlite3.Connection, estado: str = None) -> sqlite3.Cursor:
+        """Igual que get_all, como cursor sin materializar (exportaciones por streaming)"""
         query = """
             SELECT dd.*, pr.nombre_completo, pr.hostname as hostname_actual
             FROM disk_destructions dd
@@ -71,7 +129,7 @@ class DiskDestruction:
             query += " WHERE dd.estado = ?"
             params.append(estado)
         query += " ORDER BY dd.fecha_registro DESC"
-        return db.execute(query, params).fetchall()
+        return db.execute(query, params)
 
     @staticmethod
     def get_by_id(db: sqlite3.Connection, id: int) -> Optional[sqlite3.Row]:
@@ -89,7 +147,7 @@ class DiskDestruction:
         """, (serial,)).fetchone()
 
     @staticmethod
-    def create(db: sqlite3.Connection, data: Dict) -> int:
+    def create(db: sqlite3.Connection, data: Dict, commit: bool = True) -> int:
         cursor = db.execute("""
             INSERT INTO disk_destructions (
                 disco_serial, disco_marca, disco_modelo, disco_capacidad_gb, disco_tipo,
@@ -118,11 +176,13 @@ class DiskDestruction:
             data.get("responsable"),
             data.get("notas"),
         ))
-        db.commit()
+        DataVersion.bump(db, "destruction")
+        if commit:
+            db.commit()
         return cursor.lastrowid
 
     @staticmethod
-    def update(db: sqlite3.Connection, id: int, data: Dict) -> bool:
+    def update(db: sqlite3.Connection, id: int, data: Dict, commit: bool = True) -> bool:
         db.execute("""
             UPDATE disk_destructions SET
                 disco_marca = ?, disco_modelo = ?, disco_capacidad_gb = ?, disco_tipo = ?,
@@ -148,22 +208,22 @@ class DiskDestruction:
             data.get("notas"),
             id,
         ))
-        db.commit()
+        DataVersion.bump(db, "destruction")
+        if commit:
+            db.commit()
         return True
 
     @staticmethod
     def delete(db: sqlite3.Connection, id: int) -> bool:
         record = DiskDestruction.get_by_id(db, id)
-        if record and record["video_ruta"]:
-            try:
-                video_path = Path(record["video_ruta"])
-                if video_path.exists():
-                    video_path.unlink()
-            except Exception:
-                pass
-
         db.execute("DELETE FROM disk_destructions WHERE id = ?", (id,))
+        released = None
+        if record and record["video_ruta"]:
+            # El video solo se borra si ningun otro registro comparte el mismo contenido
+            released = BlobStore.release(db, record["video_ruta"])
+        DataVersion.bump(db, "destruction")
         db.commit()
+        BlobStore.purge(db, released)
         return True
 
     @staticmethod
@@ -205,8 +265,11 @@ class DiskDestruction:
                filename.rsplit('.', 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
 
     @staticmethod
-    def save_video(file, disco_serial: str) -> tuple:
-        """Guarda un video y retorna (nombre_seguro, ruta_completa)"""
+    def save_video(db: sqlite3.Connection, file, disco_serial: str) -> tuple:
+        """Guarda un video en el almacen de blobs y retorna (nombre_seguro, ruta_completa).
+
+        La referencia al blob queda pendiente del commit de `update`.
+        """
         if not file or not file.filename:
             return None, None
 
@@ -217,8 +280,6 @@ class DiskDestruction:
         ext = filename.rsplit('.', 1)[1].lower()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_filename = f"destruccion_{disco_serial}_{timestamp}.{ext}"
+        file_path = BlobStore.put_stream(db, file.stream)
 
-        file_path = VIDEOS_DIR / safe_filename
-        file.save(str(file_path))
-
-        return safe_filename, str(file_path)
+        return safe_filename, file_path
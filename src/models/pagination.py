@@ -0,0 +1,128 @@
+import sqlite3
+import json
+import base64
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.cache import DataVersion, SummaryCache
+
+# Tamano de pagina por defecto y maximo para listados y APIs
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Limite superior de un filtro por prefijo: se compara con el rango
+# [prefijo, prefijo + _MAX_CHAR), que un indice BINARY puede recorrer
+_MAX_CHAR = "\U0010ffff"
+
+
+def encode_cursor(value, key: int) -> str:
+    """Token opaco con la clave de ordenamiento de una fila"""
+    raw = json.dumps([value, key], ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Optional[Tuple]:
+    """Clave (valor, id) de un token, o None si no es valido"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return value, int(key)
+    except (ValueError, TypeError):
+        return None
+
+
+def prefix_condition(column: str, prefix: str) -> Tuple[str, List]:
+    """Condicion "empieza con" que usa el indice de la columna (a diferencia de LIKE)"""
+    return f"{column} >= ? AND {column} < ?", [prefix, prefix + _MAX_CHAR]
+
+
+def keyset_segments(column: str, tiebreak: str, ascending: bool,
+                    key: Optional[Tuple]) -> List[Tuple[str, List]]:
+    """Condiciones, en orden, de las filas que siguen a `key`.
+
+    El orden es (column, tiebreak), con los NULL primero en ascendente como
+    hace SQLite. Una comparacion de row values no incluye NULLs, por eso el
+    tramo de NULLs se consulta aparte.
+    """
+    if key is None:
+        return [("1", [])]
+    value, key_id = key
+    if column == tiebreak:
+        return [(f"{tiebreak} > ?" if ascending else f"{tiebreak} < ?", [key_id])]
+    if ascending:
+        if value is None:
+            return [(f"{column} IS NULL AND {tiebreak} > ?", [key_id]), (f"{column} IS NOT NULL", [])]
+        return [(f"({column}, {tiebreak}) > (?, ?)", [value, key_id])]
+    if value is None:
+        return [(f"{column} IS NULL AND {tiebreak} < ?", [key_id])]
+    return [(f"({column}, {tiebreak}) < (?, ?)", [value, key_id]), (f"{column} IS NULL", [])]
+
+
+def keyset_page(db: sqlite3.Connection, select: str, source: str, where: Sequence[str],
+                params: Sequence, sort_column: str, tiebreak: str, descending: bool = False,
+                limit: int = DEFAULT_PAGE_SIZE, after: str = None, before: str = None) -> Dict:
+    """Pagina por clave (keyset) en lugar de OFFSET.
+
+    `select` son las columnas y `source` el FROM (con sus JOIN). `after`
+    avanza desde la ultima fila de la pagina anterior y `before` retrocede
+    desde la primera; el costo no depende de la profundidad siempre que
+    `sort_column` tenga indice.
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    backwards = bool(before) and not after
+    key = decode_cursor(before if backwards else after) if (before or after) else None
+    # Al retroceder se recorre el orden invertido y luego se da vuelta la pagina
+    ascending = descending == backwards
+    direction = "ASC" if ascending else "DESC"
+    if sort_column == tiebreak:
+        order = f"{tiebreak} {direction}"
+    else:
+        order = f"{sort_column} {direction}, {tiebreak} {direction}"
+    base_where = " AND ".join(f"({condition})" for condition in where) or "1"
+
+    rows = []
+    for condition, segment_params in keyset_segments(sort_column, tiebreak, ascending, key):
+        remaining = limit + 1 - len(rows)
+        if remaining <= 0:
+            break
+        rows.extend(db.execute(
+            f"SELECT {select}, {sort_column} AS _sort_value, {tiebreak} AS _sort_key "
+            f"FROM {source} WHERE {base_where} AND ({condition}) ORDER BY {order} LIMIT ?",
+            list(params) + segment_params + [remaining],
+        ).fetchall())
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = key is not None, has_more
+
+    def token(row) -> str:
+        return encode_cursor(row["_sort_value"], row["_sort_key"])
+
+    return {
+        "items": [
+            {k: row[k] for k in row.keys() if k not in ("_sort_value", "_sort_key")} for row in rows
+        ],
+        "prev_cursor": token(rows[0]) if rows and has_prev else None,
+        "next_cursor": token(rows[-1]) if rows and has_next else None,
+        "limit": limit,
+    }
+
+
+def cached_count(db: sqlite3.Connection, source: str, where: Sequence[str], params: Sequence,
+                 scopes: Sequence[str], cache_key: Dict) -> int:
+    """COUNT(*) de un listado filtrado, cacheado hasta la siguiente escritura de `scopes`"""
+    base_where = " AND ".join(f"({condition})" for condition in where) or "1"
+    sql = f"SELECT COUNT(*) AS count FROM {source} WHERE {base_where}"
+    if not scopes:
+        return db.execute(sql, list(params)).fetchone()["count"]
+
+    version = DataVersion.token(db, *scopes)
+    cached = SummaryCache.get(db, "list_count", cache_key, version)
+    if cached is not None:
+        return cached
+    total = db.execute(sql, list(params)).fetchone()["count"]
+    SummaryCache.set(db, "list_count", cache_key, version, total)
+    return total
@@ -0,0 +1,135 @@
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional
+
+from models.cache import DataVersion
+from models.project import ProjectRecord
+
+# Buckets de avance de cada foto diaria (los de ProjectRecord.status_bucket en el dashboard)
+PROGRESS_BUCKETS = ("Completado", "En progreso", "Pendiente", "Otro")
+
+# Dias de historial usados para la velocidad promedio y la proyeccion de termino
+VELOCITY_WINDOW_DAYS = 7
+
+
+class ProgressSnapshot:
+    """Fotos diarias de la cantidad de registros por fase, sede y bucket de estado.
+
+    Las series de burndown y velocidad se leen de esta tabla (una fila por
+    dia, fase, sede y bucket) sin recorrer project_records.
+    """
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de fotos de avance si no existe"""
+        # fase y nom_sede vacios ('') en lugar de NULL para que la clave sea unica
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS progress_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                snapshot_date TEXT NOT NULL,
+                fase TEXT NOT NULL DEFAULT '',
+                nom_sede TEXT NOT NULL DEFAULT '',
+                bucket TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                UNIQUE (snapshot_date, fase, nom_sede, bucket)
+            )
+        """)
+        db.commit()
+
+    @staticmethod
+    def capture(db: sqlite3.Connection, snapshot_date: Optional[str] = None) -> int:
+        """Guarda (o reemplaza) la foto del dia con el estado actual de project_records.
+
+        Es un solo GROUP BY sobre la tabla; se ejecuta tras cada carga de
+        avances y desde `flask snapshot-progress`. Retorna las filas guardadas.
+        """
+        snapshot_date = snapshot_date or date.today().isoformat()
+        counts = ProjectRecord.count_buckets(db, ("fase", "nom_sede"))
+
+        db.execute("DELETE FROM progress_snapshots WHERE snapshot_date = ?", (snapshot_date,))
+        db.executemany(
+            "INSERT INTO progress_snapshots (snapshot_date, fase, nom_sede, bucket, count) VALUES (?, ?, ?, ?, ?)",
+            [(snapshot_date, fase, sede, bucket, count) for (fase, sede, bucket), count in counts.items()],
+        )
+        DataVersion.bump(db, "progress")
+        db.commit()
+        return len(counts)
+
+    @staticmethod
+    def get_dates(db: sqlite3.Connection) -> List[str]:
+        rows = db.execute("SELECT DISTINCT snapshot_date FROM progress_snapshots ORDER BY snapshot_date").fetchall()
+        return [row["snapshot_date"] for row in rows]
+
+    @staticmethod
+    def get_series(db: sqlite3.Connection, fase: str = None, nom_sede: str = None,
+                   fecha_inicio: str = None, fecha_fin: str = None) -> Dict:
+        """Series diarias de burndown y velocidad a partir de las fotos.
+
+        `remaining` es el total menos los completados de cada dia y `velocity`
+        los completados por dia desde la foto anterior (dividido por los dias
+        transcurridos si faltan fotos intermedias).
+        """
+        conditions, params = [], []
+        if fecha_inicio:
+            conditions.append("snapshot_date >= ?")
+            params.append(fecha_inicio)
+        if fecha_fin:
+            conditions.append("snapshot_date <= ?")
+            params.append(fecha_fin)
+        if fase:
+            conditions.append("fase = ?")
+            params.append(fase)
+        if nom_sede:
+            conditions.append("nom_sede = ?")
+            params.append(nom_sede)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+
+        rows = db.execute(f"""
+            SELECT snapshot_date, bucket, SUM(count) AS count
+            FROM progress_snapshots{where}
+            GROUP BY snapshot_date, bucket
+            ORDER BY snapshot_date
+        """, params).fetchall()
+
+        by_date: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            by_date.setdefault(row["snapshot_date"], {})[row["bucket"]] = row["count"]
+
+        series = []
+        previous = None
+        for snapshot_date, buckets in by_date.items():
+            total = sum(buckets.values())
+            completed = buckets.get("Completado", 0)
+            point = {
+                "date": snapshot_date,
+                "total": total,
+                "completed": completed,
+                "remaining": total - completed,
+                "buckets": {bucket: buckets.get(bucket, 0) for bucket in PROGRESS_BUCKETS},
+                "velocity": None,
+            }
+            if previous is not None:
+                days = (date.fromisoformat(snapshot_date) - date.fromisoformat(previous["date"])).days
+                point["velocity"] = round((completed - previous["completed"]) / max(days, 1), 2)
+            series.append(point)
+            previous = point
+
+        return {"series": series, **ProgressSnapshot._forecast(series)}
+
+    @staticmethod
+    def _forecast(series: List[Dict]) -> Dict:
+        """Velocidad promedio de los ultimos VELOCITY_WINDOW_DAYS dias y dias estimados para terminar"""
+        if len(series) < 2:
+            return {"average_velocity": None, "days_to_finish": None}
+        last = series[-1]
+        last_date = date.fromisoformat(last["date"])
+        start = next(
+            (p for p in series if (last_date - date.fromisoformat(p["date"])).days <= VELOCITY_WINDOW_DAYS),
+            series[-2],
+        )
+        if start is last:
+            start = series[-2]
+        days = max((last_date - date.fromisoformat(start["date"])).days, 1)
+        average = (last["completed"] - start["completed"]) / days
+        days_to_finish = round(last["remaining"] / average, 1) if average > 0 else None
+        return {"average_velocity": round(average, 2), "days_to_finish": days_to_finish}
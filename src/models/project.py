@@ -1,7 +1,52 @@
+import hashlib
+import json
 import sqlite3
-from typing import Dict, List
-from collections import Counter
-from config import PROJECT_COLUMNS, DONE_STATUS, IN_PROGRESS_STATUS, PENDING_STATUS, PROJECT_PHASES
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from config import (
+    PROJECT_COLUMNS, DONE_STATUS, IN_PROGRESS_STATUS, PENDING_STATUS, PROJECT_PHASES,
+    get_phase_from_category,
+)
+from models.cache import DataVersion
+from models.database import create_indexes
+from models.search import SearchIndex
+from utils.helpers import normalize_date
+
+# Caracteres que str.strip() elimina en los estados (espacio, tab, saltos de linea)
+_WHITESPACE = "char(32, 9, 10, 11, 12, 13)"
+
+# Indices para filtros del dashboard, joins por serial y orden por actualizacion
+PROJECT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_project_records_serial_num ON project_records(serial_num)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_hostname ON project_records(hostname)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_last_updated ON project_records(last_updated)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_fecha_estado ON project_records(fecha_estado)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_estado ON project_records(UPPER(estado))",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_ubicacion ON project_records(ubicacion)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_nom_sede ON project_records(nom_sede)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_categoria_trab ON project_records(categoria_trab)",
+    "CREATE INDEX IF NOT EXISTS idx_project_records_fase ON project_records(fase)",
+]
+
+# Columnas calculadas al escribir; se agregan con ALTER TABLE sin recrear la tabla.
+# content_hash resume los valores de PROJECT_COLUMNS (carga por cambios) y
+# missing_since marca los registros que no vinieron en una carga completa.
+DERIVED_COLUMNS = {
+    "fase": "TEXT",
+    "content_hash": "TEXT",
+    "missing_since": "TEXT",
+}
+
+
+def content_hash(row) -> str:
+    """Hash de los valores de PROJECT_COLUMNS de una fila (dict o sqlite3.Row).
+
+    NULL y cadena vacia cuentan igual: una columna ausente del CSV y una vacia
+    no son un cambio.
+    """
+    keys = set(row.keys())
+    values = [(row[column] if column in keys else None) or "" for column in PROJECT_COLUMNS]
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
 
 
 class ProjectRecord:
@@ -9,7 +54,7 @@ class ProjectRecord:
     def ensure_schema(db: sqlite3.Connection) -> None:
         existing = {row[1] for row in db.execute("PRAGMA table_info(project_records)")}
         expected = set(["id", *PROJECT_COLUMNS, "last_updated"])
-        if existing != expected:
+        if existing - set(DERIVED_COLUMNS) != expected:
             db.execute("DROP TABLE IF EXISTS project_records")
             db.execute(
                 """
@@ -39,6 +84,57 @@ class ProjectRecord:
                 """
             )
             db.commit()
+        ProjectRecord.ensure_derived_columns(db)
+        ProjectRecord.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, PROJECT_INDEXES)
+
+    @staticmethod
+    def ensure_derived_columns(db: sqlite3.Connection) -> List[str]:
+        """Agrega las columnas derivadas faltantes y rellena sus valores"""
+        existing = {row[1] for row in db.execute("PRAGMA table_info(project_records)")}
+        added = []
+        for column, column_type in DERIVED_COLUMNS.items():
+            if column not in existing:
+                db.execute(f"ALTER TABLE project_records ADD COLUMN {column} {column_type}")
+                added.append(column)
+        if "fase" in added:
+            ProjectRecord.backfill_phases(db)
+        if "content_hash" in added:
+            ProjectRecord.backfill_content_hashes(db)
+        db.commit()
+        return added
+
+    @staticmethod
+    def backfill_phases(db: sqlite3.Connection) -> int:
+        """Recalcula la fase de todos los registros (una actualizacion por categoria distinta)"""
+        updated = 0
+        categorias = db.execute("SELECT DISTINCT categoria_trab FROM project_records").fetchall()
+        for row in categorias:
+            fase = get_phase_from_category(row[0])
+            cursor = db.execute(
+                "UPDATE project_records SET fase = ? WHERE categoria_trab IS ? AND fase IS NOT ?",
+                (fase, row[0], fase),
+            )
+            updated += cursor.rowcount
+        if updated:
+            DataVersion.bump(db, "project")
+        db.commit()
+        return updated
+
+    @staticmethod
+    def backfill_content_hashes(db: sqlite3.Connection) -> int:
+        """Calcula content_hash de los registros que no lo tienen"""
+        columns = ", ".join(PROJECT_COLUMNS)
+        rows = db.execute(f"SELECT id, {columns} FROM project_records WHERE content_hash IS NULL").fetchall()
+        db.executemany(
+            "UPDATE project_records SET content_hash = ? WHERE id = ?",
+            [(content_hash(row), row["id"]) for row in rows],
+        )
+        db.commit()
+        return len(rows)
 
     @staticmethod
     def status_bucket(value: str) -> str:
@@ -53,6 +149,22 @@ class ProjectRecord:
             return "Pendiente"
         return "Otro"
 
+    @staticmethod
+    def search_equipment(db: sqlite3.Connection, term: str, limit: int = 10) -> List[Dict]:
+        """Equipos con serial cuyo serial, hostname o usuario coincide con `term`
+        (selector de equipos de los formularios)"""
+        group = SearchIndex.search_group(
+            db, "equipos", term, limit, where="serial_num IS NOT NULL AND serial_num != ''"
+        )
+        return group["items"]
+
+    @staticmethod
+    def get_equipment(db: sqlite3.Connection, serial: str) -> Optional[sqlite3.Row]:
+        return db.execute("""
+            SELECT serial_num, hostname, nombre_completo
+            FROM project_records WHERE serial_num = ?
+        """, (serial,)).fetchone()
+
     @staticmethod
     def get_filter_options(db: sqlite3.Connection, field: str) -> List[str]:
         rows = db.execute(
@@ -61,13 +173,8 @@ class ProjectRecord:
         return [row[0] for row in rows]
 
     @staticmethod
-    def query_records(db: sqlite3.Connection, filters: dict) -> List[sqlite3.Row]:
-        query = (
-            "SELECT record_id, ubicacion, nom_sede, categoria_trab, nombre_completo, perfil_imagen, "
-            "marca, modelo, serial_num, hostname, ip_equipo, email_trabajo, fecha_estado, estado, "
-            "estado_coordinacion, estado_upgrade, fecha_programada, fecha_ejecucion, notas, last_updated "
-            "FROM project_records"
-        )
+    def _filter_conditions(filters: dict) -> Tuple[List[str], List[str]]:
+        """Construye las condiciones WHERE y sus parametros a partir de los filtros"""
         conditions = []
         params: List[str] = []
 
@@ -88,51 +195,100 @@ class ProjectRecord:
             conditions.append("fecha_estado <= ?")
             params.append(filters["fecha_fin"])
 
-        if filters.get("nombre"):
-            conditions.append("UPPER(nombre_completo) LIKE UPPER(?)")
-            params.append(f"%{filters['nombre']}%")
+        # Busquedas por subcadena: usan el indice FTS (trigram, sin distinguir mayusculas)
+        for key, column in (("nombre", "nombre_completo"), ("hostname", "hostname")):
+            if filters.get(key):
+                condition, condition_params = SearchIndex.condition("project_records", filters[key], (column,))
+                conditions.append(condition)
+                params.extend(condition_params)
 
-        if filters.get("hostname"):
-            conditions.append("hostname LIKE ?")
-            params.append(f"%{filters['hostname']}%")
+        # Filtro por fase del proyecto (columna derivada e indexada)
+        if filters.get("fase") in PROJECT_PHASES:
+            conditions.append("fase = ?")
+            params.append(filters["fase"])
 
-        # Filtro por fase del proyecto
-        if filters.get("fase"):
-            fase_key = filters["fase"]
-            if fase_key in PROJECT_PHASES:
-                categorias = PROJECT_PHASES[fase_key]["categorias"]
-                fase_conditions = []
-                for cat in categorias:
-                    fase_conditions.append("UPPER(categoria_trab) LIKE UPPER(?)")
-                    params.append(f"%{cat}%")
-                if fase_conditions:
-                    conditions.append(f"({' OR '.join(fase_conditions)})")
+        return conditions, params
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += " ORDER BY last_updated DESC"
+    @staticmethod
+    def _where(filters: dict, *extra: str) -> Tuple[str, List[str]]:
+        conditions, params = ProjectRecord._filter_conditions(filters)
+        conditions.extend(extra)
+        if not conditions:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
 
-        return db.execute(query, params).fetchall()
+    @staticmethod
+    def query_records(db: sqlite3.Connection, filters: dict, limit: Optional[int] = None) -> List[sqlite3.Row]:
+        return ProjectRecord.iter_records(db, filters, limit).fetchall()
 
     @staticmethod
-    def calculate_summary(records: List[sqlite3.Row]) -> Dict:
-        total = len(records)
+    def iter_records(db: sqlite3.Connection, filters: dict, limit: Optional[int] = None) -> sqlite3.Cursor:
+        """Igual que query_records, como cursor sin materializar (exportaciones por streaming)"""
+        where, params = ProjectRecord._where(filters)
+        query = (
+            "SELECT record_id, ubicacion, nom_sede, categoria_trab, nombre_completo, perfil_imagen, "
+            "marca, modelo, serial_num, hostname, ip_equipo, email_trabajo, fecha_estado, estado, "
+            "estado_coordinacion, estado_upgrade, fecha_programada, fecha_ejecucion, notas, fase, last_updated "
+            "FROM project_records" + where + " ORDER BY last_updated DESC"
+        )
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return db.execute(query, params)
+
+    @staticmethod
+    def summarize(db: sqlite3.Connection, filters: dict, recent_limit: Optional[int] = 10) -> Dict:
+        """Calcula el resumen del dashboard con agregaciones GROUP BY en SQLite.
+
+        Solo los conteos agregados y las `recent_limit` filas mas recientes
+        (todas si es None) se leen en Python.
+        """
+        where, params = ProjectRecord._where(filters)
+        status_rows = db.execute(
+            f"""
+            SELECT COALESCE(NULLIF(UPPER(TRIM(estado, {_WHITESPACE})), ''), 'SIN ESTADO') AS estado_norm,
+                   fase, COUNT(*) AS count
+            FROM project_records{where}
+            GROUP BY estado_norm, fase
+            """,
+            params,
+        ).fetchall()
+
         status_counts: Dict[str, int] = {}
         bucket_counts: Dict[str, int] = {}
-        schedule_map: Dict[str, int] = {}
-        schedule_brands: Dict[str, List[str]] = {}
-        recent_updates = []
-
-        for row in records:
-            estado = (row["estado"] or "").strip().upper() or "SIN ESTADO"
-            status_counts[estado] = status_counts.get(estado, 0) + 1
+        phase_counts: Dict[str, int] = {}
+        for row in status_rows:
+            estado = row["estado_norm"]
+            status_counts[estado] = status_counts.get(estado, 0) + row["count"]
+            if row["fase"]:
+                phase_counts[row["fase"]] = phase_counts.get(row["fase"], 0) + row["count"]
+        status_counts = dict(sorted(status_counts.items(), key=lambda item: (-item[1], item[0])))
+        for estado, count in status_counts.items():
             bucket = ProjectRecord.status_bucket(estado)
-            bucket_counts[bucket] = bucket_counts.get(bucket, 0) + 1
+            bucket_counts[bucket] = bucket_counts.get(bucket, 0) + count
 
-            if row["fecha_estado"]:
-                schedule_map[row["fecha_estado"]] = schedule_map.get(row["fecha_estado"], 0) + 1
-                schedule_brands.setdefault(row["fecha_estado"], []).append(row["marca"] or "")
+        where, params = ProjectRecord._where(filters, "fecha_estado IS NOT NULL", "fecha_estado <> ''")
+        schedule_rows = db.execute(
+            f"""
+            SELECT fecha_estado, marca, COUNT(*) AS count
+            FROM project_records{where}
+            GROUP BY fecha_estado, marca
+            """,
+            params,
+        ).fetchall()
 
+        schedule_map: Dict[str, int] = {}
+        schedule_brands: Dict[str, Dict[str, int]] = {}
+        for row in schedule_rows:
+            fecha = row["fecha_estado"]
+            schedule_map[fecha] = schedule_map.get(fecha, 0) + row["count"]
+            brands = schedule_brands.setdefault(fecha, {})
+            if row["marca"]:
+                brands[row["marca"]] = row["count"]
+
+        recent_updates = []
+        for row in ProjectRecord.query_records(db, filters, limit=recent_limit):
             recent_updates.append({
                 "record_id": row["record_id"],
                 "nombre_completo": row["nombre_completo"],
@@ -140,7 +296,7 @@ class ProjectRecord:
                 "nom_sede": row["nom_sede"],
                 "hostname": row["hostname"],
                 "categoria_trab": row["categoria_trab"],
-                "estado": estado,
+                "estado": (row["estado"] or "").strip().upper() or "SIN ESTADO",
                 "estado_coordinacion": row["estado_coordinacion"],
                 "estado_upgrade": row["estado_upgrade"],
                 "fecha_programada": row["fecha_programada"],
@@ -152,31 +308,79 @@ class ProjectRecord:
                 "last_updated": row["last_updated"],
             })
 
-        schedule_brands_counts = {
-            date: {brand: count for brand, count in Counter(brands).items() if brand}
-            for date, brands in schedule_brands.items()
-        }
-
         return {
-            "total": total,
+            "total": sum(status_counts.values()),
             "status_counts": status_counts,
             "status_buckets": bucket_counts,
             "schedule": schedule_map,
-            "schedule_brands": schedule_brands_counts,
+            "schedule_brands": schedule_brands,
             "recent_updates": recent_updates,
+            "fase_counts": phase_counts,
         }
 
+    @staticmethod
+    def count_buckets(db: sqlite3.Connection, columns: Sequence[str]) -> Dict[tuple, int]:
+        """Cantidad de registros por valores de `columns` (NULL como '') y bucket de
+        estado, con la misma normalizacion del estado que summarize"""
+        selected = ", ".join(f"COALESCE({column}, '') AS {column}" for column in columns)
+        rows = db.execute(
+            f"""
+            SELECT COALESCE(NULLIF(UPPER(TRIM(estado, {_WHITESPACE})), ''), 'SIN ESTADO') AS estado_norm,
+                   {selected}, COUNT(*) AS count
+            FROM project_records
+            GROUP BY estado_norm, {", ".join(columns)}
+            """
+        ).fetchall()
+
+        counts: Dict[tuple, int] = {}
+        for row in rows:
+            key = tuple(row[column] for column in columns) + (ProjectRecord.status_bucket(row["estado_norm"]),)
+            counts[key] = counts.get(key, 0) + row["count"]
+        return counts
+
+    @staticmethod
+    def count_by_phase(db: sqlite3.Connection, filters: Optional[dict] = None) -> Dict[str, int]:
+        """Cuenta registros por fase usando el indice de la columna fase"""
+        where, params = ProjectRecord._where(filters or {}, "fase IS NOT NULL")
+        rows = db.execute(
+            f"SELECT fase, COUNT(*) AS count FROM project_records{where} GROUP BY fase",
+            params,
+        ).fetchall()
+        return {row["fase"]: row["count"] for row in rows}
+
+    @staticmethod
+    def normalize_upload_row(row: Dict[str, Optional[str]]) -> Optional[Dict[str, Optional[str]]]:
+        """Normaliza una fila mapeada del CSV de avances; None si no tiene record_id"""
+        if not row.get("record_id"):
+            return None
+        for field in ("estado", "estado_coordinacion", "estado_upgrade"):
+            if field in row and isinstance(row[field], str):
+                row[field] = row[field].upper()
+        for field in ("fecha_estado", "fecha_programada", "fecha_ejecucion"):
+            if field in row:
+                row[field] = normalize_date(row[field])
+        return row
+
     @staticmethod
     def upsert_record(db: sqlite3.Connection, row: Dict[str, str]) -> int:
+        """Inserta o reemplaza el registro por record_id.
+
+        Retorna cursor.rowcount, que es 1 tanto al insertar como al actualizar;
+        para distinguirlos usar apply_upload_chunk. No incrementa data_versions:
+        el llamador lo hace una vez por lote.
+        """
         params = [row.get(column) for column in PROJECT_COLUMNS]
+        params.append(get_phase_from_category(row.get("categoria_trab")))
+        params.append(content_hash(row))
         cursor = db.execute(
             """
             INSERT INTO project_records (
                 record_id, ubicacion, nom_sede, categoria_trab, nombre_completo,
                 perfil_imagen, marca, modelo, serial_num, hostname, ip_equipo,
                 email_trabajo, fecha_estado, estado, estado_coordinacion,
-                estado_upgrade, fecha_programada, fecha_ejecucion, notas
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                estado_upgrade, fecha_programada, fecha_ejecucion, notas, fase,
+                content_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(record_id) DO UPDATE SET
                 ubicacion=excluded.ubicacion,
                 nom_sede=excluded.nom_sede,
@@ -196,8 +400,73 @@ class ProjectRecord:
                 fecha_programada=excluded.fecha_programada,
                 fecha_ejecucion=excluded.fecha_ejecucion,
                 notas=excluded.notas,
+                fase=excluded.fase,
+                content_hash=excluded.content_hash,
+                missing_since=NULL,
                 last_updated=CURRENT_TIMESTAMP
             """,
             params,
         )
         return cursor.rowcount
+
+    @staticmethod
+    def apply_upload_chunk(db: sqlite3.Connection, rows: Sequence[Dict[str, str]],
+                           delta: bool = False) -> Dict[str, int]:
+        """Aplica un lote de filas normalizadas del CSV de avances.
+
+        Compara cada fila con el content_hash guardado: en modo delta las filas
+        sin cambios no se escriben (no cambia last_updated). No hace commit.
+        Retorna los conteos {"inserted", "updated", "unchanged"}.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if not rows:
+            return counts
+        stored = {
+            row["record_id"]: (row["content_hash"], row["missing_since"])
+            for row in db.execute(
+                "SELECT record_id, content_hash, missing_since FROM project_records "
+                "WHERE record_id IN (SELECT value FROM json_each(?))",
+                (json.dumps([row["record_id"] for row in rows]),),
+            )
+        }
+        for row in rows:
+            digest = content_hash(row)
+            previous = stored.get(row["record_id"])
+            if previous is None:
+                counts["inserted"] += 1
+            elif delta and previous == (digest, None):
+                counts["unchanged"] += 1
+                continue
+            else:
+                counts["updated"] += 1
+            ProjectRecord.upsert_record(db, row)
+            # Un mismo record_id repetido en el archivo se compara con la ultima version
+            stored[row["record_id"]] = (digest, None)
+        if counts["inserted"] or counts["updated"]:
+            DataVersion.bump(db, "project")
+        return counts
+
+    @staticmethod
+    def absent_records(db: sqlite3.Connection, record_ids: Iterable[str], mark: bool = False) -> int:
+        """Cuenta los registros vigentes cuyo record_id no esta en `record_ids`.
+
+        Con `mark`, les asigna missing_since (se limpia si vuelven en una carga).
+        No hace commit.
+        """
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS upload_record_ids (record_id TEXT PRIMARY KEY)")
+        db.execute("DELETE FROM temp.upload_record_ids")
+        db.executemany(
+            "INSERT OR IGNORE INTO temp.upload_record_ids (record_id) VALUES (?)",
+            ((record_id,) for record_id in record_ids),
+        )
+        absent = "missing_since IS NULL AND record_id NOT IN (SELECT record_id FROM temp.upload_record_ids)"
+        if mark:
+            count = db.execute(
+                f"UPDATE project_records SET missing_since = CURRENT_TIMESTAMP WHERE {absent}"
+            ).rowcount
+            if count:
+                DataVersion.bump(db, "project")
+        else:
+            count = db.execute(f"SELECT COUNT(*) FROM project_records WHERE {absent}").fetchone()[0]
+        db.execute("DELETE FROM temp.upload_record_ids")
+        return count
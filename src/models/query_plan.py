@@ -0,0 +1,99 @@
+import sqlite3
+import re
+from typing import Callable, Dict, List, Tuple
+
+from models.project import ProjectRecord
+from models.component import RAMUnit, SSDUnit, ComponentHistory
+from models.conformity import ConformityRecord
+from models.repotentiation import RepotentiationRecord
+from models.destruction import DiskDestruction
+from models.cache import DataVersion, SummaryCache
+
+# Linea de plan que recorre una tabla completa: "SCAN tabla" sin "USING ... INDEX"
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)(?: AS \S+)?$")
+
+# Sentencias internas de SQLite que tambien pasan por el trace callback: FTS5 lee
+# sus tablas sombra (p. ej. SELECT k, v FROM 'main'.'tabla_fts_config') con el
+# esquema entre comillas; no son consultas de la app y no se auditan
+_INTERNAL_STATEMENT = re.compile(r"'\w+'\.'|\b\w+_fts_(?:config|data|idx|content|docsize)\b", re.IGNORECASE)
+
+# Consultas ejecutadas en cada carga de pagina o llamada a la API. Los agregados
+# sobre la tabla completa (get_summary) quedan fuera porque recorren todo por diseño.
+HOT_QUERIES: List[Tuple[str, Callable[[sqlite3.Connection], object]]] = [
+    ("ProjectRecord.query_records (sede)", lambda db: ProjectRecord.query_records(db, {"nom_sede": "X"})),
+    ("ProjectRecord.query_records (estado)", lambda db: ProjectRecord.query_records(db, {"estado": "realizado"})),
+    ("ProjectRecord.query_records (fase)", lambda db: ProjectRecord.query_records(db, {"fase": "FASE_1"})),
+    ("ProjectRecord.query_records (fechas)", lambda db: ProjectRecord.query_records(
+        db, {"fecha_inicio": "2025-01-01", "fecha_fin": "2025-01-31"})),
+    ("ProjectRecord.query_records (nombre)", lambda db: ProjectRecord.query_records(db, {"nombre": "PEREZ"})),
+    ("ProjectRecord.query_records (hostname)", lambda db: ProjectRecord.query_records(db, {"hostname": "PC-0"})),
+    ("ProjectRecord.query_records (recientes)", lambda db: ProjectRecord.query_records(db, {}, limit=10)),
+    ("ProjectRecord.summarize (sede)", lambda db: ProjectRecord.summarize(db, {"nom_sede": "X"})),
+    ("ProjectRecord.get_filter_options", lambda db: ProjectRecord.get_filter_options(db, "nom_sede")),
+    ("RAMUnit.get_all", lambda db: RAMUnit.get_all(db)),
+    ("RAMUnit.get_all (estado)", lambda db: RAMUnit.get_all(db, "INSTALADO")),
+    ("RAMUnit.get_by_serial", lambda db: RAMUnit.get_by_serial(db, "X")),
+    ("SSDUnit.get_all", lambda db: SSDUnit.get_all(db)),
+    ("SSDUnit.get_all (estado)", lambda db: SSDUnit.get_all(db, "INSTALADO")),
+    ("SSDUnit.get_by_serial", lambda db: SSDUnit.get_by_serial(db, "X")),
+    ("ComponentHistory.get_by_component", lambda db: ComponentHistory.get_by_component(db, "RAM", 1)),
+    ("ComponentHistory.get_by_equipment", lambda db: ComponentHistory.get_by_equipment(db, "X")),
+    ("ComponentHistory.get_recent", lambda db: ComponentHistory.get_recent(db)),
+    ("ConformityRecord.get_all", lambda db: ConformityRecord.get_all(db)),
+    ("ConformityRecord.get_all (equipo)", lambda db: ConformityRecord.get_all(db, "X")),
+    ("ConformityRecord.get_by_id", lambda db: ConformityRecord.get_by_id(db, 1)),
+    ("ConformityRecord.get_by_equipment", lambda db: ConformityRecord.get_by_equipment(db, "X")),
+    ("RepotentiationRecord.get_all", lambda db: RepotentiationRecord.get_all(db)),
+    ("RepotentiationRecord.get_all (equipo)", lambda db: RepotentiationRecord.get_all(db, "X")),
+    ("RepotentiationRecord.get_by_id", lambda db: RepotentiationRecord.get_by_id(db, 1)),
+    ("RepotentiationRecord.get_by_serial", lambda db: RepotentiationRecord.get_by_serial(db, "X")),
+    ("RepotentiationRecord.search_by_serial", lambda db: RepotentiationRecord.search_by_serial(db, "ABC")),
+    ("DiskDestruction.get_all", lambda db: DiskDestruction.get_all(db)),
+    ("DiskDestruction.get_all (estado)", lambda db: DiskDestruction.get_all(db, "PENDIENTE")),
+    ("DiskDestruction.get_by_id", lambda db: DiskDestruction.get_by_id(db, 1)),
+    ("DiskDestruction.get_by_serial", lambda db: DiskDestruction.get_by_serial(db, "X")),
+    ("DataVersion.token", lambda db: DataVersion.token(db, "project", "inventory")),
+    ("SummaryCache.get", lambda db: SummaryCache.get(db, "audit", {}, "0")),
+    ("Selector de equipos", lambda db: ProjectRecord.search_equipment(db, "PC0")),
+    ("Equipo por serial", lambda db: ProjectRecord.get_equipment(db, "X")),
+]
+
+
+def capture_statements(db: sqlite3.Connection, query: Callable[[sqlite3.Connection], object]) -> List[str]:
+    """Ejecuta la consulta y retorna las sentencias SQL emitidas, con parametros expandidos"""
+    statements: List[str] = []
+    db.set_trace_callback(statements.append)
+    try:
+        query(db)
+    finally:
+        db.set_trace_callback(None)
+    return [
+        sql for sql in statements
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")) and not _INTERNAL_STATEMENT.search(sql)
+    ]
+
+
+def full_scans(db: sqlite3.Connection, sql: str) -> Tuple[List[str], List[str]]:
+    """Retorna (plan, tablas recorridas completas) de una sentencia"""
+    plan = [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    scans = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail.strip())
+        if match:
+            scans.append(match.group(1))
+    return plan, scans
+
+
+def audit_query_plans(db: sqlite3.Connection) -> List[Dict]:
+    """Ejecuta EXPLAIN QUERY PLAN sobre cada consulta caliente de los modelos"""
+    results = []
+    for name, query in HOT_QUERIES:
+        for sql in capture_statements(db, query):
+            plan, scans = full_scans(db, sql)
+            results.append({
+                "name": name,
+                "sql": " ".join(sql.split()),
+                "plan": plan,
+                "full_scans": scans,
+            })
+    return results
@@ -0,0 +1,104 @@
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from models.pagination import keyset_page, cached_count, prefix_condition
+
+# Conjunto de datos (DataVersion) que invalida el conteo cacheado de cada tabla.
+# Las tablas que no aparecen aqui son pequenas y se cuentan directamente.
+TABLE_SCOPES = {
+    "project_records": ("project",),
+    "ram_units": ("inventory",),
+    "ssd_units": ("inventory",),
+    "component_history": ("inventory",),
+    "conformity_records": ("conformity",),
+    "disk_destructions": ("destruction",),
+    "repotentiation_history": ("repotentiation",),
+    "progress_snapshots": ("progress",),
+}
+
+_NUMERIC_AFFINITY = ("INT", "REAL", "FLOA", "DOUB", "NUM", "DEC")
+
+
+class RawTable:
+    """Lectura generica de tablas para el visor de base de datos (solo admin)"""
+
+    @staticmethod
+    def list_tables(db: sqlite3.Connection) -> List[str]:
+        """Tablas con rowid visibles en el visor (excluye internas, WITHOUT ROWID
+        y las tablas virtuales de busqueda con sus tablas auxiliares)"""
+        rows = db.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE type='table' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """).fetchall()
+        virtual = [r["name"] for r in rows if (r["sql"] or "").upper().startswith("CREATE VIRTUAL TABLE")]
+        return [
+            r["name"] for r in rows
+            if "WITHOUT ROWID" not in (r["sql"] or "").upper()
+            and not any(r["name"] == name or r["name"].startswith(f"{name}_") for name in virtual)
+        ]
+
+    @staticmethod
+    def columns(db: sqlite3.Connection, table: str) -> List[sqlite3.Row]:
+        return db.execute(f"PRAGMA table_info({table})").fetchall()
+
+    @staticmethod
+    def indexed_columns(db: sqlite3.Connection, table: str) -> List[str]:
+        """Columnas por las que se puede filtrar y ordenar usando un indice.
+
+        Son la primera columna (con collation BINARY) de algun indice de la
+        tabla, mas el rowid.
+        """
+        indexed = ["rowid"]
+        for index in db.execute(f"PRAGMA index_list({table})").fetchall():
+            for col in db.execute(f"PRAGMA index_xinfo({index['name']})").fetchall():
+                if col["seqno"] == 0:
+                    if col["name"] and col["coll"] == "BINARY" and col["name"] not in indexed:
+                        indexed.append(col["name"])
+                    break
+        for col in RawTable.columns(db, table):
+            # INTEGER PRIMARY KEY es un alias del rowid
+            if col["pk"] == 1 and col["type"].upper() == "INTEGER" and col["name"] not in indexed:
+                indexed.append(col["name"])
+        return indexed
+
+    @staticmethod
+    def _filter_condition(db: sqlite3.Connection, table: str, column: Optional[str],
+                          value: Optional[str]) -> Tuple[str, List]:
+        """Condicion indexable para el filtro de columna: igualdad si la columna
+        es numerica y el valor tambien, si no prefijo de texto"""
+        if not column or value in (None, ""):
+            return "1", []
+        declared = next(
+            (c["type"].upper() for c in RawTable.columns(db, table) if c["name"] == column), "INTEGER"
+        )
+        if any(token in declared for token in _NUMERIC_AFFINITY):
+            try:
+                number = float(value)
+            except ValueError:
+                pass
+            else:
+                return f'"{column}" = ?', [int(number) if number.is_integer() else number]
+        return prefix_condition(f'"{column}"', value)
+
+    @staticmethod
+    def count(db: sqlite3.Connection, table: str, filter_column: str = None,
+              filter_value: str = None) -> int:
+        """Cantidad de filas, cacheada hasta la siguiente escritura del conjunto de datos"""
+        where, params = RawTable._filter_condition(db, table, filter_column, filter_value)
+        return cached_count(
+            db, table, [where], params, TABLE_SCOPES.get(table, ()),
+            {"table": table, "column": filter_column, "value": filter_value},
+        )
+
+    @staticmethod
+    def get_page(db: sqlite3.Connection, table: str, per_page: int = 50, sort: str = "rowid",
+                 descending: bool = False, filter_column: str = None, filter_value: str = None,
+                 after: str = None, before: str = None) -> Dict:
+        """Pagina por clave (keyset) sobre (sort, rowid)"""
+        where, params = RawTable._filter_condition(db, table, filter_column, filter_value)
+        return keyset_page(
+            db, "*", table, [where], params,
+            sort_column="rowid" if sort == "rowid" else f'"{sort}"', tiebreak="rowid",
+            descending=descending, limit=per_page, after=after, before=before,
+        )
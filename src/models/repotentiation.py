@@ -2,6 +2,22 @@ import sqlite3
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from models.cache import DataVersion
+from models.database import create_indexes
+from models.search import SearchIndex
+from models.pagination import keyset_page, cached_count, DEFAULT_PAGE_SIZE
+
+
+# Indices para el historial por equipo y el orden por fecha de repotenciacion
+REPOTENTIATION_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_repotentiation_history_equipo "
+    "ON repotentiation_history(equipo_serial, fecha_repotenciacion)",
+    "CREATE INDEX IF NOT EXISTS idx_repotentiation_history_fecha ON repotentiation_history(fecha_repotenciacion)",
+]
+
+# Columnas por las que se puede ordenar el historial (todas con indice)
+REPOTENTIATION_SORT_KEYS = ("fecha_repotenciacion", "equipo_serial", "id")
+
 
 class RepotentiationRecord:
     """Modelo para registrar el historial de repotenciación de equipos"""
@@ -52,9 +68,54 @@ class RepotentiationRecord:
             )
         """)
         db.commit()
+        RepotentiationRecord.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, REPOTENTIATION_INDEXES)
 
     @staticmethod
     def get_all(db: sqlite3.Connection, equipo_serial: str = None) -> List[sqlite3.Row]:
+        return RepotentiationRecord.iter_all(db, equipo_serial).fetchall()
+
+    @staticmethod
+    def get_page(db: sqlite3.Connection, filters: Dict = None, sort: str = "fecha_repotenciacion",
+                 descending: bool = True, limit: int = DEFAULT_PAGE_SIZE, after: str = None,
+                 before: str = None) -> Dict:
+        """Pagina del listado; filtros: equipo_serial, serial (equipo o componente, parcial)"""
+        filters = filters or {}
+        where, params = [], []
+        if filters.get("equipo_serial"):
+            where.append("rh.equipo_serial = ?")
+            params.append(filters["equipo_serial"])
+        if filters.get("serial"):
+            # Misma busqueda que search_by_serial
+            condition, condition_params = SearchIndex.condition(
+                "repotentiation_history", filters["serial"], alias="rh"
+            )
+            where.append(condition)
+            params.extend(condition_params)
+
+        sort = sort if sort in REPOTENTIATION_SORT_KEYS else "fecha_repotenciacion"
+        source = """
+            repotentiation_history rh
+            LEFT JOIN project_records pr ON rh.equipo_serial = pr.serial_num
+        """
+        page = keyset_page(
+            db, "rh.*, pr.nombre_completo, pr.hostname as equipo_hostname_actual", source, where, params,
+            f"rh.{sort}", "rh.id", descending, limit, after, before,
+        )
+        page["total"] = cached_count(
+            db, "repotentiation_history rh", where, params, ("repotentiation",),
+            dict(filters, list="repotentiation_history"),
+        )
+        page["sort"] = sort
+        page["order"] = "desc" if descending else "asc"
+        return page
+
+    @staticmethod
+    def iter_all(db: sqlite3.Connection, equipo_serial: str = None) -> sqlite3.Cursor:
+        """Igual que get_all, como cursor sin materializar (exportaciones por streaming)"""
         query = """
             SELECT rh.*, pr.nombre_completo, pr.hostname as equipo_hostname_actual
             FROM repotentiation_history rh
@@ -65,7 +126,7 @@ class RepotentiationRecord:
             query += " WHERE rh.equipo_serial = ?"
             params.append(equipo_serial)
         query += " ORDER BY rh.fecha_repotenciacion DESC"
-        return db.execute(query, params).fetchall()
+        return db.execute(query, params)
 
     @staticmethod
     def get_by_id(db: sqlite3.Connection, id: int) -> Optional[sqlite3.Row]:
@@ -85,7 +146,7 @@ class RepotentiationRecord:
         """, (equipo_serial,)).fetchall()
 
     @staticmethod
-    def create(db: sqlite3.Connection, data: Dict) -> int:
+    def create(db: sqlite3.Connection, data: Dict, commit: bool = True) -> int:
         cursor = db.execute("""
             INSERT INTO repotentiation_history (
                 equipo_serial, equipo_hostname, fecha_repotenciacion,
@@ -121,7 +182,9 @@ class RepotentiationRecord:
             data.get("tecnico"),
             data.get("notas"),
         ))
-        db.commit()
+        DataVersion.bump(db, "repotentiation")
+        if commit:
+            db.commit()
         return cursor.lastrowid
 
     @staticmethod
@@ -160,12 +223,14 @@ class RepotentiationRecord:
             data.get("notas"),
             id,
         ))
+        DataVersion.bump(db, "repotentiation")
         db.commit()
         return True
 
     @staticmethod
     def delete(db: sqlite3.Connection, id: int) -> bool:
         db.execute("DELETE FROM repotentiation_history WHERE id = ?", (id,))
+        DataVersion.bump(db, "repotentiation")
         db.commit()
         return True
 
@@ -213,15 +278,12 @@ class RepotentiationRecord:
 
     @staticmethod
     def search_by_serial(db: sqlite3.Connection, serial: str) -> List[sqlite3.Row]:
-        """Busca repotenciaciones por serial de equipo o componente"""
-        return db.execute("""
+        """Busca repotenciaciones por serial (parcial) de equipo o componente"""
+        condition, params = SearchIndex.condition("repotentiation_history", serial, alias="rh")
+        return db.execute(f"""
             SELECT rh.*, pr.nombre_completo
             FROM repotentiation_history rh
             LEFT JOIN project_records pr ON rh.equipo_serial = pr.serial_num
-            WHERE rh.equipo_serial LIKE ?
-               OR rh.ram_antes_serial LIKE ?
-               OR rh.ram_despues_serial LIKE ?
-               OR rh.disco_antes_serial LIKE ?
-               OR rh.disco_despues_serial LIKE ?
+            WHERE {condition}
             ORDER BY rh.fecha_repotenciacion DESC
-        """, (f"%{serial}%",) * 5).fetchall()
+        """, params).fetchall()
@@ -0,0 +1,273 @@
+import sqlite3
+from typing import Dict, List, Sequence, Tuple
+
+from models.pagination import prefix_condition
+
+# Columnas indexadas para busqueda por subcadena en cada tabla. Cada tabla tiene
+# una tabla FTS5 "<tabla>_fts" de contenido externo (no duplica los datos) con
+# tokenizador trigram, sincronizada por triggers.
+SEARCH_COLUMNS = {
+    "project_records": ("record_id", "nombre_completo", "hostname", "serial_num"),
+    "ram_units": ("serial_num", "equipo_serial"),
+    "ssd_units": ("serial_num", "equipo_serial"),
+    "repotentiation_history": (
+        "equipo_serial", "ram_antes_serial", "ram_despues_serial",
+        "disco_antes_serial", "disco_despues_serial",
+    ),
+    "disk_destructions": ("disco_serial", "equipo_origen_serial", "equipo_origen_hostname"),
+    "conformity_records": ("equipo_serial", "equipo_hostname", "usuario_nombre"),
+}
+
+# El tokenizador trigram solo encuentra terminos de al menos 3 caracteres
+MIN_TERM_LENGTH = 3
+
+# Grupos de la busqueda global, en orden de presentacion. `prefix` son columnas
+# con indice BINARY (busqueda "empieza con"); la busqueda "contiene" usa el
+# indice FTS de la tabla sobre SEARCH_COLUMNS.
+SEARCH_GROUPS = [
+    {
+        "key": "equipos", "label": "Equipos", "table": "project_records",
+        "select": "id, record_id, serial_num, hostname, nombre_completo, nom_sede, estado",
+        "prefix": ("serial_num", "hostname"),
+    },
+    {
+        "key": "ram", "label": "Memorias RAM", "table": "ram_units",
+        "select": "id, serial_num, equipo_serial, capacidad_gb, marca, estado",
+        "prefix": ("serial_num", "equipo_serial"),
+    },
+    {
+        "key": "ssd", "label": "Discos SSD", "table": "ssd_units",
+        "select": "id, serial_num, equipo_serial, capacidad_gb, marca, estado",
+        "prefix": ("serial_num", "equipo_serial"),
+    },
+    {
+        "key": "actas", "label": "Actas", "table": "conformity_records",
+        "select": "id, equipo_serial, equipo_hostname, usuario_nombre, nombre_archivo, fecha_subida",
+        "prefix": ("equipo_serial",),
+    },
+    {
+        "key": "destruccion", "label": "Destruccion de discos", "table": "disk_destructions",
+        "select": "id, disco_serial, equipo_origen_serial, equipo_origen_hostname, estado",
+        "prefix": ("disco_serial", "equipo_origen_serial"),
+    },
+]
+
+# Conjuntos de datos (DataVersion) que invalidan los resultados de la busqueda global
+SEARCH_SCOPES = ("project", "inventory", "conformity", "destruction")
+
+# Tipo de coincidencia, de mayor a menor relevancia
+MATCH_EXACT, MATCH_PREFIX, MATCH_CONTAINS = 0, 1, 2
+MATCH_LABELS = {MATCH_EXACT: "exacto", MATCH_PREFIX: "prefijo", MATCH_CONTAINS: "contiene"}
+_MATCH_RANKS = {label: rank for rank, label in MATCH_LABELS.items()}
+
+# Candidatos "contiene" leidos del indice FTS por grupo; acota el costo de los
+# terminos cortos que coinciden con miles de filas
+CONTAINS_CANDIDATES = 50
+
+
+def _trigram_supported() -> bool:
+    """FTS5 con tokenizador trigram requiere SQLite 3.34+ compilado con FTS5"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(value, tokenize='trigram')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+TRIGRAM_AVAILABLE = _trigram_supported()
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _index_statements(table: str, columns: Sequence[str]) -> List[str]:
+    fts = fts_table(table)
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        # Solo si cambia alguna columna indexada (los upsert reescriben la fila completa)
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table}
+        WHEN {changed} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+        """,
+    ]
+
+
+def match_expression(term: str, columns: Sequence[str] = ()) -> str:
+    """Consulta FTS5 que busca `term` como subcadena, opcionalmente en ciertas columnas"""
+    phrase = '"' + term.replace('"', '""') + '"'
+    if columns:
+        return "{" + " ".join(columns) + "} : " + phrase
+    return phrase
+
+
+def _match_rank(row: Dict, term: str, columns: Sequence[str]) -> Tuple[int, str]:
+    """(tipo de coincidencia, valor coincidente) de una fila, para ordenar"""
+    folded = term.casefold()
+    best = (MATCH_CONTAINS, "")
+    for column in columns:
+        value = row.get(column)
+        if not value:
+            continue
+        text = str(value).casefold()
+        if text == folded:
+            return MATCH_EXACT, text
+        if text.startswith(folded) and best[0] > MATCH_PREFIX:
+            best = (MATCH_PREFIX, text)
+        elif folded in text and best == (MATCH_CONTAINS, ""):
+            best = (MATCH_CONTAINS, text)
+    return best
+
+
+class SearchIndex:
+    """Indices FTS5 (trigram) para busquedas por nombre, hostname y seriales"""
+
+    @staticmethod
+    def ensure(db: sqlite3.Connection) -> List[str]:
+        """Crea las tablas FTS y sus triggers; reconstruye el indice de las tablas
+        nuevas o cuyos triggers faltaban (por ejemplo, si la tabla se recreo).
+
+        Retorna los errores, igual que create_indexes.
+        """
+        if not TRIGRAM_AVAILABLE:
+            return ["FTS5 con tokenizador trigram no disponible; las busquedas usan LIKE"]
+
+        existing = {
+            row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        }
+        errors = []
+        for table, columns in SEARCH_COLUMNS.items():
+            if table not in existing:
+                continue
+            fts = fts_table(table)
+            stale = any(name not in existing for name in (fts, f"{fts}_ai", f"{fts}_ad", f"{fts}_au"))
+            try:
+                for statement in _index_statements(table, columns):
+                    db.execute(statement)
+                if stale:
+                    db.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                db.commit()
+            except sqlite3.OperationalError as exc:
+                db.rollback()
+                errors.append(f"{fts}: {exc}")
+        return errors
+
+    @staticmethod
+    def rebuild(db: sqlite3.Connection) -> None:
+        """Reconstruye todos los indices desde las tablas de contenido"""
+        for table in SEARCH_COLUMNS:
+            fts = fts_table(table)
+            db.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        db.commit()
+
+    @staticmethod
+    def condition(table: str, term: str, columns: Sequence[str] = (),
+                  alias: str = "") -> Tuple[str, List[str]]:
+        """Condicion WHERE "contiene `term`" sobre `columns` (todas las indexadas si
+        se omite) que usa el indice FTS; `alias` es el de la tabla en el FROM.
+
+        Con terminos de menos de MIN_TERM_LENGTH caracteres, o sin soporte de
+        trigram, se usa LIKE sobre la tabla (recorrido completo).
+        """
+        columns = tuple(columns) or SEARCH_COLUMNS[table]
+        prefix = f"{alias}." if alias else ""
+        if TRIGRAM_AVAILABLE and len(term) >= MIN_TERM_LENGTH:
+            fts = fts_table(table)
+            return (
+                f"{prefix}id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)",
+                [match_expression(term, columns)],
+            )
+        return (
+            "(" + " OR ".join(f"{prefix}{c} LIKE ?" for c in columns) + ")",
+            [f"%{term}%"] * len(columns),
+        )
+
+    @staticmethod
+    def search_group(db: sqlite3.Connection, key: str, term: str, limit: int = 5,
+                     where: str = "") -> Dict:
+        """Hasta `limit` filas de un grupo de SEARCH_GROUPS que coinciden con `term`,
+        ordenadas por tipo de coincidencia (exacta, prefijo, contiene) y valor.
+
+        Todas las consultas usan indices y tienen LIMIT, por lo que el costo no
+        depende del tamano de la tabla. `where` restringe las filas candidatas.
+        """
+        group = next(g for g in SEARCH_GROUPS if g["key"] == key)
+        table = group["table"]
+        columns = SEARCH_COLUMNS[table]
+        extra = f" AND ({where})" if where else ""
+        candidates: Dict[int, Dict] = {}
+
+        # Prefijo (incluye la coincidencia exacta) sobre columnas indexadas
+        for column in group["prefix"]:
+            for variant in dict.fromkeys([term, term.upper()]):
+                condition, params = prefix_condition(column, variant)
+                rows = db.execute(
+                    f"SELECT {group['select']} FROM {table} WHERE {condition}{extra} ORDER BY {column} LIMIT ?",
+                    params + [limit],
+                ).fetchall()
+                for row in rows:
+                    candidates.setdefault(row["id"], dict(row))
+
+        # Subcadena en cualquier columna indexada por FTS. `where` se aplica antes del
+        # LIMIT (semi-join con la tabla) para que los candidatos excluidos no
+        # desplacen a los validos
+        if TRIGRAM_AVAILABLE and len(term) >= MIN_TERM_LENGTH:
+            fts = fts_table(table)
+            allowed = f" AND EXISTS (SELECT 1 FROM {table} WHERE id = {fts}.rowid AND ({where}))" if where else ""
+            rows = db.execute(
+                f"SELECT {group['select']} FROM {table} WHERE id IN "
+                f"(SELECT rowid FROM {fts} WHERE {fts} MATCH ?{allowed} LIMIT ?)",
+                [match_expression(term), CONTAINS_CANDIDATES],
+            ).fetchall()
+            for row in rows:
+                candidates.setdefault(row["id"], dict(row))
+
+        ranked = sorted(candidates.values(), key=lambda item: _match_rank(item, term, columns) + (item["id"],))
+        items = []
+        for item in ranked[:limit]:
+            item["match"] = MATCH_LABELS[_match_rank(item, term, columns)[0]]
+            items.append(item)
+        return {
+            "key": group["key"],
+            "label": group["label"],
+            "items": items,
+            "more": len(candidates) > limit,
+        }
+
+    @staticmethod
+    def search(db: sqlite3.Connection, term: str, limit: int = 5) -> List[Dict]:
+        """Busqueda global: los grupos con resultados, ordenados por su mejor
+        coincidencia y luego por el orden de SEARCH_GROUPS"""
+        ranked_groups = []
+        for order, group in enumerate(SEARCH_GROUPS):
+            result = SearchIndex.search_group(db, group["key"], term, limit)
+            if result["items"]:
+                best = _MATCH_RANKS[result["items"][0]["match"]]
+                ranked_groups.append(((best, order), result))
+
+        ranked_groups.sort(key=lambda pair: pair[0])
+        return [group for _, group in ranked_groups]
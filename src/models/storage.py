@@ -0,0 +1,320 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from models.blob_store import BlobStore, BLOBS_DIR, remove_file
+from models.cache import DataVersion
+from models.conformity import UPLOADS_DIR
+from models.destruction import VIDEOS_DIR
+
+# Directorios de evidencias que recorre la conciliacion
+STORAGE_DIRS = (BLOBS_DIR, UPLOADS_DIR, VIDEOS_DIR)
+
+# Los archivos mas nuevos no se consideran huerfanos: una subida escribe el
+# archivo antes de confirmar el registro que lo referencia
+ORPHAN_GRACE_SECONDS = 3600
+
+# Registros y archivos revisados por lote (cada lote se confirma por separado)
+RECONCILE_BATCH_SIZE = 500
+
+# Maximo de huerfanos y registros sin archivo listados en el reporte
+RECONCILE_SAMPLE_SIZE = 100
+
+# Etiquetas de los totales guardados en storage_usage
+STORAGE_SCOPES = {
+    "tipo": "Por tipo",
+    "sede": "Por sede",
+    "total": "Totales",
+}
+
+
+class StorageUsage:
+    """Totales de espacio de las evidencias (por tipo, por sede y generales).
+
+    Los calcula la conciliacion, que ya revisa cada archivo; la pagina de
+    reportes los lee de esta tabla sin recorrer el disco.
+    """
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de totales de almacenamiento si no existe"""
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS storage_usage (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                files INTEGER NOT NULL DEFAULT 0,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (scope, key)
+            )
+        """)
+        db.commit()
+
+    @staticmethod
+    def save(db: sqlite3.Connection, totals: Dict[Tuple[str, str], List[int]]) -> None:
+        """Reemplaza los totales guardados (no hace commit)"""
+        db.execute("DELETE FROM storage_usage")
+        db.executemany(
+            "INSERT INTO storage_usage (scope, key, files, bytes) VALUES (?, ?, ?, ?)",
+            [(scope, key, files, size) for (scope, key), (files, size) in totals.items()],
+        )
+
+    @staticmethod
+    def get(db: sqlite3.Connection) -> Dict:
+        """Totales por scope, de mayor a menor espacio, y fecha del calculo"""
+        rows = db.execute(
+            "SELECT scope, key, files, bytes, updated_at FROM storage_usage ORDER BY scope, bytes DESC, key"
+        ).fetchall()
+        usage = {scope: [] for scope in STORAGE_SCOPES}
+        for row in rows:
+            usage.setdefault(row["scope"], []).append({"key": row["key"], "files": row["files"], "bytes": row["bytes"]})
+        usage["updated_at"] = rows[0]["updated_at"] if rows else None
+        return usage
+
+
+def _add(totals: Dict, scope: str, key: str, size: int) -> None:
+    entry = totals.setdefault((scope, key), [0, 0])
+    entry[0] += 1
+    entry[1] += size
+
+
+def _file_size(path: str):
+    """Bytes del archivo, o None si no existe"""
+    try:
+        return os.stat(path).st_size
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def _iter_files(root) -> Iterator[Tuple[str, os.stat_result]]:
+    """Recorre un directorio sin cargar el listado completo en memoria"""
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                yield path, os.stat(path)
+            except OSError:
+                continue
+
+
+class UploadReconciler:
+    """Concilia los archivos de uploads/ con la base de datos.
+
+    Detecta registros cuyo archivo ya no existe, conteos de referencias de
+    blobs desalineados y archivos que ningun registro usa (huerfanos). Sin
+    `remove` solo reporta; con `remove` borra los huerfanos, elimina las
+    actas sin archivo, quita el video faltante de su destruccion y corrige
+    los conteos. Recorre registros y archivos por lotes, confirmando cada uno.
+    """
+
+    @staticmethod
+    def run(db: sqlite3.Connection, remove: bool = False,
+            grace_seconds: float = ORPHAN_GRACE_SECONDS) -> Dict:
+        """Ejecuta la conciliacion, guarda los totales en storage_usage y
+        retorna el reporte"""
+        report = {
+            "remove": remove,
+            "rows_checked": 0,
+            "files_checked": 0,
+            "dangling": 0,
+            "dangling_sample": [],
+            "refcounts": 0,
+            "orphans": 0,
+            "orphan_bytes": 0,
+            "orphans_removed": 0,
+            "orphan_sample": [],
+        }
+        totals: Dict[Tuple[str, str], List[int]] = {}
+        # Rutas ya contadas: un blob compartido por varios registros ocupa su espacio una vez
+        seen: set = set()
+        UploadReconciler._check_conformity(db, report, totals, seen, remove)
+        UploadReconciler._check_videos(db, report, totals, seen, remove)
+        UploadReconciler._check_refcounts(db, report, remove)
+        UploadReconciler._check_files(db, report, totals, remove, time.time() - grace_seconds)
+
+        StorageUsage.save(db, totals)
+        db.commit()
+        report["usage"] = StorageUsage.get(db)
+        return report
+
+    @staticmethod
+    def _dangling(report: Dict, table: str, id: int, path: str) -> None:
+        report["dangling"] += 1
+        if len(report["dangling_sample"]) < RECONCILE_SAMPLE_SIZE:
+            report["dangling_sample"].append({"table": table, "id": id, "path": path})
+
+    @staticmethod
+    def _count(totals: Dict, seen: set, path: str, tipo: str, sede: str, size: int) -> None:
+        """Suma un archivo referenciado: `logico` por cada registro y el resto
+        (tipo, sede, referenciado) solo la primera vez que aparece la ruta"""
+        _add(totals, "total", "logico", size)
+        if path in seen:
+            return
+        seen.add(path)
+        _add(totals, "tipo", tipo, size)
+        _add(totals, "sede", sede or "Sin sede", size)
+        _add(totals, "total", "referenciado", size)
+
+    @staticmethod
+    def _check_conformity(db: sqlite3.Connection, report: Dict, totals: Dict, seen: set,
+                          remove: bool) -> None:
+        last_id = 0
+        while True:
+            rows = db.execute("""
+                SELECT cr.id, cr.tipo_archivo, cr.ruta_archivo, pr.nom_sede
+                FROM conformity_records cr
+                LEFT JOIN project_records pr ON cr.equipo_serial = pr.serial_num
+                WHERE cr.id > ? ORDER BY cr.id LIMIT ?
+            """, (last_id, RECONCILE_BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            missing = []
+            for row in rows:
+                report["rows_checked"] += 1
+                size = _file_size(row["ruta_archivo"])
+                if size is None:
+                    missing.append(row["id"])
+                    UploadReconciler._dangling(report, "conformity_records", row["id"], row["ruta_archivo"])
+                    continue
+                UploadReconciler._count(totals, seen, row["ruta_archivo"], row["tipo_archivo"] or "-",
+                                        row["nom_sede"], size)
+            if remove and missing:
+                # Un acta sin archivo no tiene nada que mostrar; el conteo del blob se corrige despues
+                db.execute(
+                    "DELETE FROM conformity_records WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(missing),),
+                )
+                DataVersion.bump(db, "conformity")
+                db.commit()
+
+    @staticmethod
+    def _check_videos(db: sqlite3.Connection, report: Dict, totals: Dict, seen: set,
+                      remove: bool) -> None:
+        last_id = 0
+        while True:
+            rows = db.execute("""
+                SELECT dd.id, dd.video_ruta, pr.nom_sede
+                FROM disk_destructions dd
+                LEFT JOIN project_records pr ON dd.equipo_origen_serial = pr.serial_num
+                WHERE dd.id > ? AND dd.video_ruta IS NOT NULL AND dd.video_ruta != ''
+                ORDER BY dd.id LIMIT ?
+            """, (last_id, RECONCILE_BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            missing = []
+            for row in rows:
+                report["rows_checked"] += 1
+                size = _file_size(row["video_ruta"])
+                if size is None:
+                    missing.append(row["id"])
+                    UploadReconciler._dangling(report, "disk_destructions", row["id"], row["video_ruta"])
+                    continue
+                UploadReconciler._count(totals, seen, row["video_ruta"], "VIDEO", row["nom_sede"], size)
+            if remove and missing:
+                # La destruccion se conserva; solo se quita la referencia al video perdido
+                db.execute("""
+                    UPDATE disk_destructions SET video_nombre = NULL, video_ruta = NULL
+                    WHERE id IN (SELECT value FROM json_each(?))
+                """, (json.dumps(missing),))
+                DataVersion.bump(db, "destruction")
+                db.commit()
+
+    @staticmethod
+    def _check_refcounts(db: sqlite3.Connection, report: Dict, remove: bool) -> None:
+        """Compara blobs.refcount con las referencias reales de actas y videos"""
+        if remove:
+            # Contar y corregir con el lock de escritura: una subida concurrente no queda fuera del conteo
+            db.commit()
+            db.execute("BEGIN IMMEDIATE")
+        counts: Dict[str, int] = {}
+        rows = db.execute("""
+            SELECT ruta_archivo AS path, COUNT(*) AS refs FROM conformity_records GROUP BY ruta_archivo
+            UNION ALL
+            SELECT video_ruta, COUNT(*) FROM disk_destructions WHERE video_ruta IS NOT NULL GROUP BY video_ruta
+        """).fetchall()
+        for row in rows:
+            sha256 = BlobStore.sha256_of(row["path"] or "")
+            if sha256:
+                counts[sha256] = counts.get(sha256, 0) + row["refs"]
+
+        stored = {row["sha256"]: row["refcount"] for row in db.execute("SELECT sha256, refcount FROM blobs")}
+        for sha256 in set(stored) | set(counts):
+            expected = counts.get(sha256, 0)
+            if stored.get(sha256) == expected:
+                continue
+            report["refcounts"] += 1
+            if not remove:
+                continue
+            if expected == 0:
+                # Sin referencias: el archivo queda como huerfano para el recorrido de archivos
+                db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+            elif sha256 in stored:
+                db.execute("UPDATE blobs SET refcount = ? WHERE sha256 = ?", (expected, sha256))
+            else:
+                size = _file_size(str(BlobStore.blob_path(sha256))) or 0
+                db.execute("INSERT INTO blobs (sha256, size, refcount) VALUES (?, ?, ?)", (sha256, size, expected))
+        db.commit()
+
+    @staticmethod
+    def _check_files(db: sqlite3.Connection, report: Dict, totals: Dict, remove: bool,
+                     cutoff: float) -> None:
+        batch: List[Tuple[str, int]] = []
+        for root in STORAGE_DIRS:
+            for path, stat in _iter_files(root):
+                report["files_checked"] += 1
+                _add(totals, "total", "en_disco", stat.st_size)
+                if stat.st_mtime > cutoff:
+                    continue
+                batch.append((path, stat.st_size))
+                if len(batch) >= RECONCILE_BATCH_SIZE:
+                    UploadReconciler._check_file_batch(db, batch, report, totals, remove)
+                    batch = []
+        if batch:
+            UploadReconciler._check_file_batch(db, batch, report, totals, remove)
+
+    @staticmethod
+    def _referenced(db: sqlite3.Connection, paths: List[str]) -> set:
+        """Rutas de `paths` que usa algun registro (una busqueda por indice cada una)"""
+        return {row[0] for row in db.execute("""
+            SELECT value FROM json_each(?) AS f
+            WHERE EXISTS (SELECT 1 FROM conformity_records WHERE ruta_archivo = f.value)
+               OR EXISTS (SELECT 1 FROM disk_destructions WHERE video_ruta = f.value)
+               OR EXISTS (SELECT 1 FROM video_uploads WHERE file_path = f.value)
+        """, (json.dumps(paths),))}
+
+    @staticmethod
+    def _check_file_batch(db: sqlite3.Connection, batch: List[Tuple[str, int]], report: Dict,
+                          totals: Dict, remove: bool) -> None:
+        referenced = UploadReconciler._referenced(db, [path for path, _size in batch])
+        orphans = [(path, size) for path, size in batch if path not in referenced]
+        for path, size in orphans:
+            report["orphans"] += 1
+            report["orphan_bytes"] += size
+            _add(totals, "total", "huerfanos", size)
+            if len(report["orphan_sample"]) < RECONCILE_SAMPLE_SIZE:
+                report["orphan_sample"].append({"path": path, "bytes": size})
+        if not (remove and orphans):
+            return
+
+        # Con el lock de escritura tomado, ninguna subida puede confirmar una
+        # referencia al mismo blob entre la verificacion y el borrado
+        db.commit()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            referenced = UploadReconciler._referenced(db, [path for path, _size in orphans])
+            for path, _size in orphans:
+                if path in referenced:
+                    continue
+                sha256 = BlobStore.sha256_of(path)
+                if sha256:
+                    db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                if remove_file(path):
+                    report["orphans_removed"] += 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
@@ -0,0 +1,244 @@
+import sqlite3
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import BASE_DIR
+from models.database import create_indexes
+
+# Directorio donde se guardan los CSV pendientes de procesar
+JOBS_DIR = BASE_DIR / "uploads" / "jobs"
+JOBS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Estados de un trabajo de carga
+UPLOAD_JOB_STATUS = {
+    "QUEUED": "En cola",
+    "RUNNING": "Procesando",
+    "DONE": "Completado",
+    "FAILED": "Fallido",
+}
+
+# Modos de la carga de avances: completa reescribe todas las filas; por
+# cambios solo escribe las filas cuyo contenido cambio
+UPLOAD_MODES = {
+    "full": "Completa",
+    "delta": "Solo cambios",
+}
+
+# Columnas agregadas despues de la version inicial de la tabla (ALTER TABLE).
+# removed queda NULL hasta que se cuentan los registros ausentes del archivo.
+UPLOAD_JOB_COLUMNS = {
+    "mode": "TEXT NOT NULL DEFAULT 'full'",
+    "mark_missing": "INTEGER NOT NULL DEFAULT 0",
+    "unchanged": "INTEGER NOT NULL DEFAULT 0",
+    "removed": "INTEGER",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# Indices para tomar el siguiente trabajo de la cola y listar el historial por tipo
+UPLOAD_JOB_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_upload_jobs_status ON upload_jobs(status, id)",
+    "CREATE INDEX IF NOT EXISTS idx_upload_jobs_kind ON upload_jobs(kind, id)",
+]
+
+# Errores por fila que se conservan en el trabajo (el total se cuenta aparte)
+MAX_STORED_ERRORS = 100
+
+
+class JobLost(Exception):
+    """Otro worker retomo el trabajo (este dejo de reportar avance a tiempo)"""
+
+
+class UploadJob:
+    """Trabajos de carga masiva procesados en segundo plano"""
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de trabajos de carga si no existe"""
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS upload_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'QUEUED',
+                file_path TEXT NOT NULL,
+                original_name TEXT,
+                total_rows INTEGER,
+                rows_processed INTEGER NOT NULL DEFAULT 0,
+                inserted INTEGER NOT NULL DEFAULT 0,
+                updated INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                mode TEXT NOT NULL DEFAULT 'full',
+                mark_missing INTEGER NOT NULL DEFAULT 0,
+                unchanged INTEGER NOT NULL DEFAULT 0,
+                removed INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error_count INTEGER NOT NULL DEFAULT 0,
+                errors TEXT NOT NULL DEFAULT '[]',
+                error_message TEXT,
+                created_by TEXT,
+                worker TEXT,
+                heartbeat_at REAL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                started_at TEXT,
+                finished_at TEXT
+            )
+        """)
+        db.commit()
+        UploadJob.ensure_columns(db)
+        UploadJob.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_columns(db: sqlite3.Connection) -> List[str]:
+        """Agrega a una tabla existente las columnas de UPLOAD_JOB_COLUMNS que falten"""
+        existing = {row[1] for row in db.execute("PRAGMA table_info(upload_jobs)")}
+        added = []
+        for column, definition in UPLOAD_JOB_COLUMNS.items():
+            if column not in existing:
+                db.execute(f"ALTER TABLE upload_jobs ADD COLUMN {column} {definition}")
+                added.append(column)
+        db.commit()
+        return added
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, UPLOAD_JOB_INDEXES)
+
+    @staticmethod
+    def create(db: sqlite3.Connection, kind: str, file_path: str, original_name: str = None,
+               total_rows: int = None, created_by: str = None, mode: str = "full",
+               mark_missing: bool = False) -> int:
+        cursor = db.execute("""
+            INSERT INTO upload_jobs (kind, file_path, original_name, total_rows, created_by, mode, mark_missing)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (kind, file_path, original_name, total_rows, created_by, mode, int(mark_missing)))
+        db.commit()
+        return cursor.lastrowid
+
+    @staticmethod
+    def get_by_id(db: sqlite3.Connection, id: int) -> Optional[sqlite3.Row]:
+        return db.execute("SELECT * FROM upload_jobs WHERE id = ?", (id,)).fetchone()
+
+    @staticmethod
+    def get_recent(db: sqlite3.Connection, kind: str, limit: int = 10) -> List[sqlite3.Row]:
+        return db.execute("""
+            SELECT * FROM upload_jobs WHERE kind = ? ORDER BY id DESC LIMIT ?
+        """, (kind, limit)).fetchall()
+
+    @staticmethod
+    def claim_next(db: sqlite3.Connection, worker: str, stale_after: float,
+                   max_attempts: int) -> Optional[sqlite3.Row]:
+        """Toma el siguiente trabajo en cola, o uno en proceso cuyo worker dejo de reportar.
+
+        La seleccion y la marca se hacen en una transaccion IMMEDIATE para que
+        dos workers no tomen el mismo trabajo. Los trabajos abandonados que ya
+        se tomaron `max_attempts` veces (por ejemplo, porque tumban al worker)
+        se marcan como fallidos y se borra su archivo.
+        """
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            abandoned = db.execute("""
+                UPDATE upload_jobs SET
+                    status = 'FAILED', finished_at = CURRENT_TIMESTAMP,
+                    error_message = 'El procesamiento se interrumpio ' || attempts || ' veces sin terminar'
+                WHERE status = 'RUNNING' AND heartbeat_at < ? AND attempts >= ?
+                RETURNING file_path
+            """, (now - stale_after, max_attempts)).fetchall()
+            row = db.execute("""
+                SELECT id FROM upload_jobs
+                WHERE status = 'QUEUED' OR (status = 'RUNNING' AND heartbeat_at < ?)
+                ORDER BY id LIMIT 1
+            """, (now - stale_after,)).fetchone()
+            if row is not None:
+                db.execute("""
+                    UPDATE upload_jobs SET
+                        status = 'RUNNING', worker = ?, heartbeat_at = ?, attempts = attempts + 1,
+                        started_at = COALESCE(started_at, CURRENT_TIMESTAMP)
+                    WHERE id = ?
+                """, (worker, now, row["id"]))
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            raise
+        for job in abandoned:
+            Path(job["file_path"]).unlink(missing_ok=True)
+        return UploadJob.get_by_id(db, row["id"]) if row is not None else None
+
+    @staticmethod
+    def record_progress(db: sqlite3.Connection, id: int, worker: str, rows: int, inserted: int = 0,
+                        updated: int = 0, skipped: int = 0, errors: List[str] = (),
+                        unchanged: int = 0) -> None:
+        """Suma el avance de un lote.
+
+        No hace commit: el avance se confirma junto con los datos del lote, de
+        modo que al reanudar se continua exactamente donde quedo. Lanza JobLost
+        si el trabajo ya no pertenece a `worker`; el lote debe revertirse.
+        """
+        job = UploadJob.get_by_id(db, id)
+        stored = json.loads(job["errors"])
+        stored.extend(errors[:max(0, MAX_STORED_ERRORS - len(stored))])
+        cursor = db.execute("""
+            UPDATE upload_jobs SET
+                rows_processed = rows_processed + ?,
+                inserted = inserted + ?,
+                updated = updated + ?,
+                skipped = skipped + ?,
+                unchanged = unchanged + ?,
+                error_count = error_count + ?,
+                errors = ?,
+                heartbeat_at = ?
+            WHERE id = ? AND worker = ? AND status = 'RUNNING'
+        """, (rows, inserted, updated, skipped, unchanged, len(errors), json.dumps(stored, ensure_ascii=False),
+              time.time(), id, worker))
+        if cursor.rowcount == 0:
+            raise JobLost(f"El trabajo {id} fue retomado por otro worker")
+
+    @staticmethod
+    def record_removed(db: sqlite3.Connection, id: int, worker: str, removed: int) -> None:
+        """Guarda la cantidad de registros ausentes del archivo. No hace commit.
+        Lanza JobLost si el trabajo ya no pertenece a `worker`."""
+        cursor = db.execute("""
+            UPDATE upload_jobs SET removed = ?, heartbeat_at = ?
+            WHERE id = ? AND worker = ? AND status = 'RUNNING'
+        """, (removed, time.time(), id, worker))
+        if cursor.rowcount == 0:
+            raise JobLost(f"El trabajo {id} fue retomado por otro worker")
+
+    @staticmethod
+    def finish(db: sqlite3.Connection, id: int, worker: str, status: str, error_message: str = None) -> bool:
+        """Cierra el trabajo; retorna False si ya no pertenece a `worker`"""
+        cursor = db.execute("""
+            UPDATE upload_jobs SET status = ?, error_message = ?, finished_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND worker = ? AND status = 'RUNNING'
+        """, (status, error_message, id, worker))
+        db.commit()
+        return cursor.rowcount > 0
+
+    @staticmethod
+    def to_dict(job: sqlite3.Row) -> Dict:
+        return {
+            "id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "status_label": UPLOAD_JOB_STATUS.get(job["status"], job["status"]),
+            "original_name": job["original_name"],
+            "total_rows": job["total_rows"],
+            "rows_processed": job["rows_processed"],
+            "inserted": job["inserted"],
+            "updated": job["updated"],
+            "skipped": job["skipped"],
+            "mode": job["mode"],
+            "mode_label": UPLOAD_MODES.get(job["mode"], job["mode"]),
+            "mark_missing": bool(job["mark_missing"]),
+            "unchanged": job["unchanged"],
+            "removed": job["removed"],
+            "attempts": job["attempts"],
+            "error_count": job["error_count"],
+            "errors": json.loads(job["errors"]),
+            "error_message": job["error_message"],
+            "created_by": job["created_by"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
@@ -0,0 +1,218 @@
+import fcntl
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
+
+from config import MAX_VIDEO_SIZE
+from models.blob_store import BlobStore
+from models.database import create_indexes
+from models.destruction import DiskDestruction, VIDEOS_DIR
+
+# Bytes leidos del request por escritura al archivo parcial
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+# Segundos sin recibir datos tras los cuales una subida se descarta
+UPLOAD_EXPIRY_SECONDS = 24 * 3600
+
+# Estados de una subida reanudable
+VIDEO_UPLOAD_STATUS = {
+    "UPLOADING": "Subiendo",
+    "DONE": "Completada",
+}
+
+# Indices para reanudar la subida de un registro y expirar las abandonadas
+VIDEO_UPLOAD_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_video_uploads_destruction ON video_uploads(destruction_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_video_uploads_updated_at ON video_uploads(updated_at)",
+]
+
+
+class UploadConflict(Exception):
+    """El offset del PATCH no coincide con lo recibido, u otro PATCH esta en curso"""
+
+
+class UploadTooLarge(Exception):
+    """El cuerpo del PATCH excede el largo declarado al crear la subida"""
+
+
+class VideoUpload:
+    """Subidas reanudables de videos de destruccion (protocolo tipo tus).
+
+    Los bytes se agregan a un archivo parcial dentro de VIDEOS_DIR; el offset
+    vigente es el tamano de ese archivo, por lo que un PATCH cortado conserva
+    lo que alcanzo a escribir. Al completarse, el archivo se renombra (sin
+    copiarlo) al almacen de blobs y se asigna al registro de destruccion.
+    """
+
+    @staticmethod
+    def ensure_table(db: sqlite3.Connection) -> None:
+        """Crea la tabla de subidas reanudables si no existe"""
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS video_uploads (
+                id TEXT PRIMARY KEY,
+                destruction_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                file_path TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'UPLOADING',
+                created_by TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at REAL NOT NULL
+            )
+        """)
+        db.commit()
+        VideoUpload.ensure_indexes(db)
+
+    @staticmethod
+    def ensure_indexes(db: sqlite3.Connection) -> List[str]:
+        return create_indexes(db, VIDEO_UPLOAD_INDEXES)
+
+    @staticmethod
+    def get_by_id(db: sqlite3.Connection, id: str) -> Optional[sqlite3.Row]:
+        return db.execute("SELECT * FROM video_uploads WHERE id = ?", (id,)).fetchone()
+
+    @staticmethod
+    def offset(upload: sqlite3.Row) -> int:
+        """Bytes recibidos (tamano del archivo parcial)"""
+        if upload["status"] == "DONE":
+            return upload["size"]
+        try:
+            return os.path.getsize(upload["file_path"])
+        except OSError:
+            return 0
+
+    @staticmethod
+    def create(db: sqlite3.Connection, destruction_id: int, filename: str, size: int,
+               created_by: str = None) -> sqlite3.Row:
+        """Crea una subida, o retorna la pendiente del mismo archivo para reanudarla.
+
+        Lanza ValueError si la extension o el tamano no son validos.
+        """
+        if not DiskDestruction.allowed_video(filename):
+            raise ValueError("Tipo de video no permitido. Use MP4, AVI, MOV, MKV o WEBM.")
+        if size <= 0 or size > MAX_VIDEO_SIZE:
+            raise ValueError(f"El video debe pesar entre 1 byte y {MAX_VIDEO_SIZE // (1024 * 1024)}MB")
+
+        VideoUpload.purge_expired(db)
+        existing = db.execute("""
+            SELECT * FROM video_uploads
+            WHERE destruction_id = ? AND status = 'UPLOADING' AND filename = ? AND size = ?
+              AND created_by IS ?
+            ORDER BY updated_at DESC LIMIT 1
+        """, (destruction_id, filename, size, created_by)).fetchone()
+        if existing:
+            return existing
+
+        upload_id = uuid.uuid4().hex
+        file_path = VIDEOS_DIR / f".upload_{upload_id}.part"
+        file_path.touch()
+        db.execute("""
+            INSERT INTO video_uploads (id, destruction_id, filename, size, file_path, created_by, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (upload_id, destruction_id, filename, size, str(file_path), created_by, time.time()))
+        db.commit()
+        return VideoUpload.get_by_id(db, upload_id)
+
+    @staticmethod
+    def append(db: sqlite3.Connection, upload: sqlite3.Row, offset: int, stream: BinaryIO) -> int:
+        """Agrega el cuerpo de un PATCH en `offset` y retorna el nuevo offset; al
+        recibir el ultimo byte asigna el video al registro (finalize).
+
+        Un lock exclusivo sobre el archivo parcial impide dos PATCH simultaneos
+        (aun en workers distintos). Lanza UploadConflict si el offset no es el
+        vigente o el archivo esta bloqueado, y UploadTooLarge si se recibe mas
+        de lo declarado; en ese caso se descarta la parte completa.
+        """
+        # Sin crear el archivo: si ya no existe, la subida se completo o se descarto
+        try:
+            target = open(upload["file_path"], "r+b")
+        except FileNotFoundError:
+            raise UploadConflict("La subida ya fue completada o descartada")
+        with target:
+            try:
+                fcntl.flock(target, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflict("Hay otra parte de esta subida en curso")
+            upload = VideoUpload.get_by_id(db, upload["id"])
+            if upload is None or upload["status"] == "DONE":
+                raise UploadConflict("La subida ya fue completada")
+            current = target.seek(0, os.SEEK_END)
+            if offset != current:
+                raise UploadConflict(f"Upload-Offset {offset} no coincide con {current}")
+
+            remaining = upload["size"] - current
+            try:
+                while True:
+                    block = stream.read(UPLOAD_BLOCK_SIZE)
+                    if not block:
+                        break
+                    if len(block) > remaining:
+                        # Se descarta toda la parte: el cliente la reenvia desde `current`
+                        target.truncate(current)
+                        remaining = upload["size"] - current
+                        raise UploadTooLarge("El contenido excede el tamano declarado del video")
+                    target.write(block)
+                    remaining -= len(block)
+            finally:
+                # Lo escrito hasta un corte de conexion queda como avance reanudable
+                target.flush()
+                os.fsync(target.fileno())
+                db.execute("UPDATE video_uploads SET updated_at = ? WHERE id = ?", (time.time(), upload["id"]))
+                db.commit()
+
+            if remaining == 0:
+                VideoUpload.finalize(db, upload)
+            return upload["size"] - remaining
+
+    @staticmethod
+    def finalize(db: sqlite3.Connection, upload: sqlite3.Row) -> Tuple[str, str]:
+        """Asigna el video completo al registro de destruccion.
+
+        Mueve el archivo parcial al almacen de blobs (sin copiarlo), libera el
+        video anterior del registro (su archivo se borra tras el commit) y
+        retorna (nombre, ruta). Se llama desde
+        append con el lock del archivo tomado.
+        """
+        record = DiskDestruction.get_by_id(db, upload["destruction_id"])
+        if record is None:
+            VideoUpload.discard(db, upload)
+            raise LookupError("Registro de destruccion no encontrado")
+
+        ext = upload["filename"].rsplit(".", 1)[1].lower()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        video_name = f"destruccion_{record['disco_serial']}_{timestamp}.{ext}"
+        video_path = BlobStore.put_file(db, upload["file_path"])
+
+        data = dict(record)
+        data["video_nombre"] = video_name
+        data["video_ruta"] = video_path
+        DiskDestruction.update(db, record["id"], data, commit=False)
+        released = BlobStore.release(db, record["video_ruta"])
+        db.execute("UPDATE video_uploads SET status = 'DONE', file_path = ?, updated_at = ? WHERE id = ?",
+                   (video_path, time.time(), upload["id"]))
+        db.commit()
+        # El video anterior se borra solo cuando el registro ya apunta al nuevo
+        BlobStore.purge(db, released)
+        return video_name, video_path
+
+    @staticmethod
+    def discard(db: sqlite3.Connection, upload: sqlite3.Row) -> None:
+        """Elimina una subida pendiente y su archivo parcial"""
+        if upload["status"] != "DONE":
+            Path(upload["file_path"]).unlink(missing_ok=True)
+        db.execute("DELETE FROM video_uploads WHERE id = ?", (upload["id"],))
+        db.commit()
+
+    @staticmethod
+    def purge_expired(db: sqlite3.Connection, max_age: float = UPLOAD_EXPIRY_SECONDS) -> int:
+        """Descarta las subidas sin datos nuevos en `max_age` segundos y las completadas antiguas"""
+        rows = db.execute(
+            "SELECT * FROM video_uploads WHERE updated_at < ?", (time.time() - max_age,)
+        ).fetchall()
+        for upload in rows:
+            VideoUpload.discard(db, upload)
+        return len(rows)
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de rendimiento para BanBif Dashboard.
+
+Cada subcomando crea una base de datos temporal con datos sinteticos, de
+modo que puede ejecutarse sin tocar la base de produccion.
+
+Subcomandos:
+    read-during-upload  Latencia de lectura del dashboard mientras otro
+                        proceso ejecuta una carga masiva de avances,
+                        comparando modos de journal (DELETE vs WAL).
+    requests            Requests por segundo de la aplicacion (cliente de
+                        pruebas de Flask) con y sin pool de conexiones.
+    export-formats      Bytes y tiempo de la exportacion del dashboard en
+                        cada formato (csv, csv.gz, xlsx, parquet).
+    search              Latencia de la busqueda por nombre y hostname con
+                        LIKE '%...%' frente al indice FTS5 trigram, y de la
+                        busqueda global (typeahead) por largo del termino.
+    delta-upload        Carga de avances completa frente a la carga por
+                        cambios (content_hash) con un porcentaje de filas
+                        modificadas.
+
+Uso:
+    python scripts/benchmark.py read-during-upload [--rows N] [--upload-rows N]
+    python scripts/benchmark.py requests [--rows N] [--seconds S] [--pool-sizes 0 4]
+    python scripts/benchmark.py export-formats [--rows N]
+    python scripts/benchmark.py search [--rows N] [--repeat N]
+    python scripts/benchmark.py delta-upload [--rows N] [--churn F]
+"""
+
+import argparse
+import multiprocessing
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from config import Config, PROJECT_PHASES  # noqa: E402
+from models.cache import DataVersion  # noqa: E402
+from models.database import connect  # noqa: E402
+from models.project import ProjectRecord  # noqa: E402
+
+SEDES = [f"SEDE {n:02d}" for n in range(1, 41)]
+ESTADOS = ["REALIZADO", "PENDIENTE", "EN PROCESO", "PROGRAMADO", "USER NO ASISTIO", ""]
+CATEGORIAS = [cat for phase in PROJECT_PHASES.values() for cat in phase["categorias"]]
+
+
+def sqlite_settings(**overrides) -> dict:
+    """Ajustes SQLITE_* de Config con los valores indicados reemplazados"""
+    settings = {key: getattr(Config, key) for key in dir(Config) if key.startswith("SQLITE_")}
+    settings.update(overrides)
+    return settings
+
+
+def fake_project_row(index: int, rnd: random.Random) -> dict:
+    """Registro de avance sintetico con la forma de una fila del CSV ya normalizada"""
+    return {
+        "record_id": f"R{index:07d}",
+        "ubicacion": rnd.choice(["LIMA", "PROVINCIA"]),
+        "nom_sede": rnd.choice(SEDES),
+        "categoria_trab": rnd.choice(CATEGORIAS),
+        "nombre_completo": f"Usuario {index}",
+        "marca": rnd.choice(["HP", "DELL", "LENOVO"]),
+        "modelo": rnd.choice(["ProDesk 400", "OptiPlex 3080", "ThinkCentre M70"]),
+        "serial_num": f"SN{index:08d}",
+        "hostname": f"PC{index:07d}",
+        "email_trabajo": f"usuario{index}@banbif.com.pe",
+        "fecha_estado": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        "estado": rnd.choice(ESTADOS),
+    }
+
+
+def create_project_db(path: str, rows: int, settings: dict) -> None:
+    """Crea el esquema de project_records y carga `rows` registros"""
+    conn = connect(path, settings)
+    ProjectRecord.ensure_schema(conn)
+    DataVersion.ensure_table(conn)
+    rnd = random.Random(1)
+    for index in range(rows):
+        ProjectRecord.upsert_record(conn, fake_project_row(index, rnd))
+    conn.commit()
+    conn.close()
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _bulk_upload_worker(path: str, settings: dict, start: int, rows: int, started) -> None:
+    """Replica la carga de avances: un upsert por fila y un solo commit al final"""
+    conn = connect(path, settings)
+    rnd = random.Random(2)
+    started.set()
+    for index in range(start, start + rows):
+        ProjectRecord.upsert_record(conn, fake_project_row(index, rnd))
+    conn.commit()
+    conn.close()
+
+
+def bench_read_during_upload(args) -> None:
+    print(f"Registros iniciales: {args.rows}, filas de la carga: {args.upload_rows}")
+    print(f"{'journal':<8} {'lecturas':>8} {'errores':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'max ms':>8} {'carga s':>8}")
+
+    for journal_mode in args.journal_modes:
+        settings = sqlite_settings(SQLITE_JOURNAL_MODE=journal_mode)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "bench.db")
+            create_project_db(path, args.rows, settings)
+
+            reader = connect(path, settings)
+            started = multiprocessing.Event()
+            # La mitad de la carga actualiza registros existentes y la otra mitad inserta
+            writer = multiprocessing.Process(
+                target=_bulk_upload_worker,
+                args=(path, settings, args.rows - args.upload_rows // 2, args.upload_rows, started),
+            )
+            writer.start()
+            started.wait()
+            upload_started = time.perf_counter()
+
+            latencies, errors = [], 0
+            rnd = random.Random(3)
+            while writer.is_alive():
+                begin = time.perf_counter()
+                try:
+                    ProjectRecord.summarize(reader, {"nom_sede": rnd.choice(SEDES)})
+                    latencies.append((time.perf_counter() - begin) * 1000)
+                except sqlite3.OperationalError:
+                    errors += 1
+            writer.join()
+            upload_seconds = time.perf_counter() - upload_started
+            reader.close()
+
+        print(f"{journal_mode:<8} {len(latencies):>8} {errors:>8} "
+              f"{statistics.median(latencies) if latencies else 0:>8.2f} "
+              f"{percentile(latencies, 95):>8.2f} {max(latencies, default=0):>8.2f} "
+              f"{upload_seconds:>8.2f}")
+
+
+def bench_requests(args) -> None:
+    from app import app
+    from models.database import init_db
+
+    password = "benchmark-admin"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        create_project_db(path, args.rows, sqlite_settings())
+        app.config.update(DATABASE=path, INITIAL_ADMIN_PASSWORD=password, TESTING=True)
+        with app.app_context():
+            init_db()
+
+        client = app.test_client()
+        response = client.post("/login", data={"username": "admin", "password": password})
+        if response.status_code != 302:
+            raise SystemExit(f"No se pudo iniciar sesion (HTTP {response.status_code})")
+
+        print(f"Registros: {args.rows}, {args.seconds}s por ruta")
+        print(f"{'pool':>4}  {'ruta':<28} {'req/s':>8} {'p50 ms':>8}")
+        for pool_size in args.pool_sizes:
+            app.config["SQLITE_POOL_SIZE"] = pool_size
+            for url in args.paths:
+                client.get(url)  # calentar la cache de resumenes
+                latencies = []
+                deadline = time.perf_counter() + args.seconds
+                while time.perf_counter() < deadline:
+                    begin = time.perf_counter()
+                    client.get(url)
+                    latencies.append((time.perf_counter() - begin) * 1000)
+                rate = len(latencies) / args.seconds
+                print(f"{pool_size:>4}  {url:<28} {rate:>8.0f} {statistics.median(latencies):>8.2f}")
+
+
+def bench_export_formats(args) -> None:
+    from controllers.reports import DASHBOARD_EXPORT_HEADERS, _dashboard_export_row
+    from utils.export import EXPORT_FORMATS, available_export_formats, iter_cursor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        create_project_db(path, args.rows, sqlite_settings())
+        conn = connect(path, sqlite_settings())
+
+        print(f"Registros: {args.rows}")
+        print(f"{'formato':<8} {'bytes':>12} {'vs csv':>7} {'segundos':>9} {'1er bloque ms':>14}")
+        csv_bytes = None
+        for fmt in args.formats:
+            if fmt not in available_export_formats():
+                print(f"{fmt:<8} no disponible")
+                continue
+            encoder = EXPORT_FORMATS[fmt][2]
+            cursor = ProjectRecord.iter_records(conn, {})
+            rows = (_dashboard_export_row(r) for r in iter_cursor(cursor))
+            total = 0
+            first_block = None
+            begin = time.perf_counter()
+            for block in encoder(DASHBOARD_EXPORT_HEADERS, rows):
+                if first_block is None and block:
+                    first_block = (time.perf_counter() - begin) * 1000
+                total += len(block)
+            seconds = time.perf_counter() - begin
+            if fmt == "csv":
+                csv_bytes = total
+            ratio = f"{total / csv_bytes:.2f}" if csv_bytes else "-"
+            print(f"{fmt:<8} {total:>12} {ratio:>7} {seconds:>9.2f} {first_block or 0:>14.1f}")
+        conn.close()
+
+
+def bench_search(args) -> None:
+    from models.search import SearchIndex, TRIGRAM_AVAILABLE
+
+    if not TRIGRAM_AVAILABLE:
+        print("FTS5 con tokenizador trigram no disponible en este SQLite")
+        return
+
+    rnd = random.Random(3)
+    searches = [("nombre", f"ario {rnd.randrange(args.rows)}") for _ in range(3)]
+    searches += [("hostname", f"C{rnd.randrange(args.rows):07d}"[:-2]) for _ in range(3)]
+    like_sql = {
+        "nombre": "UPPER(nombre_completo) LIKE UPPER(?)",
+        "hostname": "hostname LIKE ?",
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        create_project_db(path, args.rows, sqlite_settings())
+        conn = connect(path, sqlite_settings())
+        begin = time.perf_counter()
+        SearchIndex.ensure(conn)
+        print(f"Registros: {args.rows}; indice FTS construido en {time.perf_counter() - begin:.2f} s")
+
+        print(f"{'filtro':<9} {'termino':<14} {'filas':>6} {'LIKE ms':>9} {'FTS ms':>8} {'x':>6}")
+        for key, term in searches:
+            like_times, fts_times = [], []
+            for _ in range(args.repeat):
+                begin = time.perf_counter()
+                expected = conn.execute(
+                    f"SELECT record_id FROM project_records WHERE {like_sql[key]} ORDER BY last_updated DESC",
+                    (f"%{term}%",),
+                ).fetchall()
+                like_times.append((time.perf_counter() - begin) * 1000)
+                begin = time.perf_counter()
+                found = ProjectRecord.query_records(conn, {key: term})
+                fts_times.append((time.perf_counter() - begin) * 1000)
+            # Se compara como conjunto: las filas con igual last_updated no tienen orden fijo
+            if {r["record_id"] for r in found} != {r["record_id"] for r in expected}:
+                print(f"{key:<9} {term:<14} resultados distintos entre LIKE y FTS")
+                continue
+            like_ms, fts_ms = statistics.median(like_times), statistics.median(fts_times)
+            print(f"{key:<9} {term:<14} {len(found):>6} {like_ms:>9.2f} {fts_ms:>8.2f} {like_ms / fts_ms:>6.0f}")
+
+        # Busqueda global: un termino por largo, de 2 caracteres al serial completo
+        from models.component import Component
+        from models.conformity import ConformityRecord
+        from models.destruction import DiskDestruction
+
+        Component.ensure_tables(conn)
+        ConformityRecord.ensure_table(conn)
+        DiskDestruction.ensure_table(conn)
+        units = args.rows // 5
+        conn.executemany(
+            "INSERT INTO ram_units (serial_num, capacidad_gb, equipo_serial) VALUES (?, 8, ?)",
+            ((f"RAM{i:08d}", f"SN{i:08d}") for i in range(units)),
+        )
+        conn.executemany(
+            "INSERT INTO ssd_units (serial_num, capacidad_gb, equipo_serial) VALUES (?, 256, ?)",
+            ((f"SSD{i:08d}", f"SN{i:08d}") for i in range(units)),
+        )
+        conn.executemany(
+            "INSERT INTO conformity_records (equipo_serial, equipo_hostname, tipo_archivo, nombre_archivo, ruta_archivo) "
+            "VALUES (?, ?, 'PDF', 'acta.pdf', 'acta.pdf')",
+            ((f"SN{i:08d}", f"PC{i:07d}") for i in range(units)),
+        )
+        conn.executemany(
+            "INSERT INTO disk_destructions (disco_serial, equipo_origen_serial) VALUES (?, ?)",
+            ((f"HDD{i:08d}", f"SN{i:08d}") for i in range(units)),
+        )
+        conn.commit()
+        SearchIndex.ensure(conn)
+
+        serial = f"SN{rnd.randrange(units):08d}"
+        print(f"\nBusqueda global ({units} componentes, actas y destrucciones)")
+        print(f"{'termino':<14} {'grupos':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        for term in [serial[:length] for length in range(2, len(serial) + 1, 2)] + ["suario 12", "C000"]:
+            times = []
+            for _ in range(args.repeat * 4):
+                begin = time.perf_counter()
+                groups = SearchIndex.search(conn, term)
+                times.append((time.perf_counter() - begin) * 1000)
+            print(f"{term:<14} {len(groups):>6} {percentile(times, 50):>8.2f} {percentile(times, 95):>8.2f}")
+
+        # Costo de los triggers en escritura: upserts de registros nuevos con el indice activo
+        rnd = random.Random(4)
+        begin = time.perf_counter()
+        for index in range(args.rows, args.rows + args.write_rows):
+            ProjectRecord.upsert_record(conn, fake_project_row(index, rnd))
+        conn.commit()
+        per_row = (time.perf_counter() - begin) * 1e6 / args.write_rows
+        print(f"Upsert con indice FTS: {per_row:.0f} us/fila ({args.write_rows} filas)")
+        conn.close()
+
+
+def bench_delta_upload(args) -> None:
+    import shutil
+
+    rnd = random.Random(5)
+    base = [fake_project_row(index, rnd) for index in range(args.rows)]
+    # Archivo de la semana: `churn` de las filas con otro estado, algunas nuevas y algunas ausentes
+    changed = set(rnd.sample(range(args.rows), int(args.rows * args.churn)))
+    dropped = set(rnd.sample(sorted(set(range(args.rows)) - changed), int(args.rows * args.churn / 5)))
+    upload = []
+    for index, row in enumerate(base):
+        if index in dropped:
+            continue
+        if index in changed:
+            row = dict(row, estado="REALIZADO" if row["estado"] != "REALIZADO" else "PENDIENTE")
+        upload.append(row)
+    upload += [fake_project_row(index, rnd) for index in range(args.rows, args.rows + len(dropped))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = str(Path(tmp) / "seed.db")
+        conn = connect(seed, sqlite_settings())
+        ProjectRecord.ensure_schema(conn)
+        DataVersion.ensure_table(conn)
+        for row in base:
+            ProjectRecord.upsert_record(conn, row)
+        conn.commit()
+        conn.close()
+
+        print(f"Registros: {args.rows}; filas del archivo: {len(upload)} "
+              f"({len(changed)} modificadas, {len(dropped)} nuevas, {len(dropped)} ausentes)")
+        print(f"{'modo':<6} {'segundos':>9} {'nuevos':>7} {'actualiz.':>9} {'sin camb.':>9} "
+              f"{'ausentes':>8} {'WAL MB':>7}")
+        for mode in ("full", "delta"):
+            path = str(Path(tmp) / f"{mode}.db")
+            shutil.copy(seed, path)
+            conn = connect(path, sqlite_settings(SQLITE_OPTIMIZE_INTERVAL=0))
+            # Sin checkpoint automatico, el WAL crece con cada pagina escrita
+            conn.execute("PRAGMA wal_autocheckpoint = 0")
+            totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+            begin = time.perf_counter()
+            for start in range(0, len(upload), args.chunk_size):
+                counts = ProjectRecord.apply_upload_chunk(
+                    conn, upload[start:start + args.chunk_size], delta=mode == "delta"
+                )
+                for key, value in counts.items():
+                    totals[key] += value
+                conn.commit()
+            removed = "-"
+            if mode == "delta":
+                removed = ProjectRecord.absent_records(conn, (row["record_id"] for row in upload))
+                conn.commit()
+            seconds = time.perf_counter() - begin
+            wal = Path(path + "-wal")
+            wal_mb = wal.stat().st_size / 1e6 if wal.exists() else 0.0
+            print(f"{mode:<6} {seconds:>9.2f} {totals['inserted']:>7} {totals['updated']:>9} "
+                  f"{totals['unchanged']:>9} {removed:>8} {wal_mb:>7.1f}")
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de BanBif Dashboard")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    read_upload = subparsers.add_parser(
+        "read-during-upload", help="Latencia de lectura durante una carga masiva"
+    )
+    read_upload.add_argument("--rows", type=int, default=20000, help="Registros iniciales")
+    read_upload.add_argument("--upload-rows", type=int, default=20000, help="Filas de la carga")
+    read_upload.add_argument(
+        "--journal-modes", nargs="+", default=["DELETE", "WAL"], help="Modos a comparar"
+    )
+    read_upload.set_defaults(func=bench_read_during_upload)
+
+    requests_parser = subparsers.add_parser(
+        "requests", help="Requests por segundo con y sin pool de conexiones"
+    )
+    requests_parser.add_argument("--rows", type=int, default=5000, help="Registros de avance")
+    requests_parser.add_argument("--seconds", type=float, default=3.0, help="Duracion por ruta")
+    requests_parser.add_argument(
+        "--pool-sizes", nargs="+", type=int, default=[0, 4], help="Tamanos de pool a comparar"
+    )
+    requests_parser.add_argument(
+        "--paths", nargs="+", default=["/api/summary", "/inventario/api/summary", "/health"],
+        help="Rutas a medir",
+    )
+    requests_parser.set_defaults(func=bench_requests)
+
+    export_parser = subparsers.add_parser(
+        "export-formats", help="Bytes y tiempo de exportacion por formato"
+    )
+    export_parser.add_argument("--rows", type=int, default=50000, help="Registros de avance")
+    export_parser.add_argument(
+        "--formats", nargs="+", default=["csv", "csv.gz", "xlsx", "parquet"], help="Formatos a medir"
+    )
+    export_parser.set_defaults(func=bench_export_formats)
+
+    search_parser = subparsers.add_parser(
+        "search", help="Busqueda por subcadena: LIKE frente a FTS5 trigram"
+    )
+    search_parser.add_argument("--rows", type=int, default=100000, help="Registros de avance")
+    search_parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por busqueda")
+    search_parser.add_argument("--write-rows", type=int, default=5000, help="Upserts para medir los triggers")
+    search_parser.set_defaults(func=bench_search)
+
+    delta_parser = subparsers.add_parser(
+        "delta-upload", help="Carga completa frente a carga por cambios"
+    )
+    delta_parser.add_argument("--rows", type=int, default=50000, help="Registros de avance")
+    delta_parser.add_argument("--churn", type=float, default=0.05, help="Fraccion de filas modificadas")
+    delta_parser.add_argument("--chunk-size", type=int, default=500, help="Filas por lote")
+    delta_parser.set_defaults(func=bench_delta_upload)
+
+    args = parser.parse_args()
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,8 @@ echo "[2/2] Iniciando servidor Gunicorn..."
 exec gunicorn \
     --bind 0.0.0.0:5000 \
     --workers "${GUNICORN_WORKERS:-4}" \
+    --worker-class gthread \
+    --threads "${GUNICORN_THREADS:-16}" \
     --access-logfile - \
     --error-logfile - \
     --capture-output \
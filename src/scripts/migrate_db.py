@@ -8,6 +8,22 @@ agregando las tablas nuevas si no existen:
 - conformity_records (Actas de conformidad)
 - repotentiation_history (Historial de repotenciacion)
 - disk_destructions (Destruccion de discos)
+- data_versions, summary_cache (Cache de resumenes del dashboard)
+- upload_jobs (Trabajos de carga masiva en segundo plano)
+- progress_snapshots (Fotos diarias de avance para burndown y velocidad)
+- video_uploads (Subidas reanudables de videos de destruccion)
+- blobs (Almacen de actas y videos direccionado por contenido)
+- storage_usage (Totales de espacio de las evidencias por tipo y sede)
+
+Tambien agrega las columnas derivadas de project_records (por ejemplo
+`fase` y `content_hash`) y las columnas nuevas de upload_jobs, rellena
+sus valores en los registros existentes y crea los indices secundarios
+de todas las tablas y los indices de busqueda de texto (FTS5 trigram)
+con sus triggers (idempotente).
+
+Por ultimo mueve las actas y videos ya subidos al almacen de blobs
+(uploads/blobs, por SHA-256): los archivos identicos quedan como una sola
+copia con conteo de referencias y se actualizan las rutas de los registros.
 
 Uso:
     python scripts/migrate_db.py [--db PATH]
@@ -24,6 +40,32 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_DB = BASE_DIR / "data" / "dashboard.db"
 
+sys.path.insert(0, str(BASE_DIR))
+from config import Config  # noqa: E402
+from models.database import connect  # noqa: E402
+from models.project import ProjectRecord  # noqa: E402
+from models.component import Component  # noqa: E402
+from models.conformity import ConformityRecord  # noqa: E402
+from models.repotentiation import RepotentiationRecord  # noqa: E402
+from models.destruction import DiskDestruction  # noqa: E402
+from models.upload_job import UploadJob  # noqa: E402
+from models.search import SearchIndex  # noqa: E402
+from models.video_upload import VideoUpload  # noqa: E402
+from models.blob_store import BlobStore  # noqa: E402
+
+# Tablas requeridas por cada conjunto de indices
+INDEX_SETS = [
+    (("project_records",), ProjectRecord.ensure_indexes),
+    (("ram_units", "ssd_units", "component_history"), Component.ensure_indexes),
+    (("conformity_records",), ConformityRecord.ensure_indexes),
+    (("repotentiation_history",), RepotentiationRecord.ensure_indexes),
+    (("disk_destructions",), DiskDestruction.ensure_indexes),
+    (("upload_jobs",), UploadJob.ensure_indexes),
+    (("video_uploads",), VideoUpload.ensure_indexes),
+    # Busqueda de texto (FTS5); omite por si misma las tablas que no existen
+    ((), SearchIndex.ensure),
+]
+
 
 def get_existing_tables(conn: sqlite3.Connection) -> set:
     """Obtiene las tablas existentes en la base de datos"""
@@ -43,6 +85,9 @@ def migrate_schema(db_path: Path, verbose: bool = True) -> dict:
     stats = {
         "tables_created": [],
         "tables_existed": [],
+        "columns_added": [],
+        "index_errors": [],
+        "blobs": {},
         "status": "success",
         "message": ""
     }
@@ -55,7 +100,8 @@ def migrate_schema(db_path: Path, verbose: bool = True) -> dict:
         return stats
 
     try:
-        conn = sqlite3.connect(str(db_path))
+        # Aplica los PRAGMA de Config (deja la base en modo WAL, que es persistente)
+        conn = connect(str(db_path), vars(Config))
 
         # Obtener tablas existentes
         existing = get_existing_tables(conn)
@@ -175,6 +221,90 @@ def migrate_schema(db_path: Path, verbose: bool = True) -> dict:
                     fecha_registro TEXT DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (equipo_origen_serial) REFERENCES project_records(serial_num)
                 )
+            """,
+            "data_versions": """
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    scope TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """,
+            "summary_cache": """
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """,
+            "upload_jobs": """
+                CREATE TABLE IF NOT EXISTS upload_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'QUEUED',
+                    file_path TEXT NOT NULL,
+                    original_name TEXT,
+                    total_rows INTEGER,
+                    rows_processed INTEGER NOT NULL DEFAULT 0,
+                    inserted INTEGER NOT NULL DEFAULT 0,
+                    updated INTEGER NOT NULL DEFAULT 0,
+                    skipped INTEGER NOT NULL DEFAULT 0,
+                    mode TEXT NOT NULL DEFAULT 'full',
+                    mark_missing INTEGER NOT NULL DEFAULT 0,
+                    unchanged INTEGER NOT NULL DEFAULT 0,
+                    removed INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error_count INTEGER NOT NULL DEFAULT 0,
+                    errors TEXT NOT NULL DEFAULT '[]',
+                    error_message TEXT,
+                    created_by TEXT,
+                    worker TEXT,
+                    heartbeat_at REAL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """,
+            "progress_snapshots": """
+                CREATE TABLE IF NOT EXISTS progress_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    snapshot_date TEXT NOT NULL,
+                    fase TEXT NOT NULL DEFAULT '',
+                    nom_sede TEXT NOT NULL DEFAULT '',
+                    bucket TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    UNIQUE (snapshot_date, fase, nom_sede, bucket)
+                )
+            """,
+            "video_uploads": """
+                CREATE TABLE IF NOT EXISTS video_uploads (
+                    id TEXT PRIMARY KEY,
+                    destruction_id INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    file_path TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'UPLOADING',
+                    created_by TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_at REAL NOT NULL
+                )
+            """,
+            "blobs": """
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    refcount INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """,
+            "storage_usage": """
+                CREATE TABLE IF NOT EXISTS storage_usage (
+                    scope TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    files INTEGER NOT NULL DEFAULT 0,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (scope, key)
+                )
             """
         }
 
@@ -190,12 +320,47 @@ def migrate_schema(db_path: Path, verbose: bool = True) -> dict:
                 if verbose:
                     print(f"  [NEW] {table_name} creada")
 
+        # Columnas derivadas de project_records (fase indexada, con relleno inicial)
+        if "project_records" in existing:
+            for column in ProjectRecord.ensure_derived_columns(conn):
+                stats["columns_added"].append(f"project_records.{column}")
+                if verbose:
+                    print(f"  [NEW] project_records.{column} agregada y rellenada")
+
+        # Columnas nuevas de upload_jobs (modo de carga, conteos de la carga por cambios e intentos)
+        if "upload_jobs" in existing:
+            for column in UploadJob.ensure_columns(conn):
+                stats["columns_added"].append(f"upload_jobs.{column}")
+                if verbose:
+                    print(f"  [NEW] upload_jobs.{column} agregada")
+
+        # Indices secundarios; los fallos (p. ej. columnas de un esquema antiguo) no detienen la migracion
+        existing = get_existing_tables(conn)
+        for tables, ensure_indexes in INDEX_SETS:
+            if not all(table in existing for table in tables):
+                continue
+            for error in ensure_indexes(conn):
+                stats["index_errors"].append(error)
+                if verbose:
+                    print(f"  [WARN] indice no creado: {error}")
+        if verbose:
+            print("  [OK] indices verificados")
+
         conn.commit()
+
+        # Archivos del esquema anterior al almacen por contenido (confirma archivo por archivo)
+        stats["blobs"] = BlobStore.dedupe_existing(conn)
+        if verbose:
+            print("  [OK] archivos movidos al almacen: {files} ({deduplicated} duplicados, "
+                  "{bytes_saved} bytes liberados, {missing} no encontrados)".format(**stats["blobs"]))
         conn.close()
 
         # Resumen
-        if stats["tables_created"]:
-            stats["message"] = f"Tablas creadas: {', '.join(stats['tables_created'])}"
+        if stats["tables_created"] or stats["columns_added"]:
+            stats["message"] = "Tablas creadas: {}; columnas agregadas: {}".format(
+                ", ".join(stats["tables_created"]) or "ninguna",
+                ", ".join(stats["columns_added"]) or "ninguna",
+            )
         else:
             stats["message"] = "Esquema ya actualizado, no se requieren cambios"
 
@@ -36,6 +36,7 @@ document.addEventListener('DOMContentLoaded', () => {
     setupFilters();
     setupFaseFilters();
     fetchSummary();
+    subscribeToVersions();
 });
 
 function setupFilters() {
@@ -187,36 +188,75 @@ function setupFaseFilters() {
     });
 }
 
+// Respuestas de /api/summary por filtros, validas mientras no cambie la version
+// de los datos del proyecto (la informa /api/events)
+const summaryCache = new Map();
+let summaryController = null;
+let projectVersion = null;
+
+function subscribeToVersions() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/api/events?scopes=project');
+    source.addEventListener('version', (event) => {
+        const version = JSON.parse(event.data).project;
+        const changed = projectVersion !== null && version !== projectVersion;
+        projectVersion = version;
+        if (changed) {
+            summaryCache.clear();
+            fetchSummary();
+        }
+    });
+}
+
 async function fetchSummary() {
+    const params = new URLSearchParams();
+    [...selectFilters, ...estadoFilters, ...dateFilters, 'nombre', 'hostname', 'fase'].forEach((field) => {
+        const value = currentFilters[field];
+        if (value) params.append(field, value);
+    });
+    const query = params.toString();
+    // Solo importa la respuesta de los filtros vigentes: una peticion anterior
+    // en vuelo no debe pintar encima, aunque esta consulta salga de la cache
+    if (summaryController) summaryController.abort();
+    summaryController = null;
+    if (summaryCache.has(query)) {
+        renderSummary(summaryCache.get(query));
+        return;
+    }
+    const controller = new AbortController();
+    summaryController = controller;
     try {
-        const params = new URLSearchParams();
-        [...selectFilters, ...estadoFilters, ...dateFilters, 'nombre', 'hostname', 'fase'].forEach((field) => {
-            const value = currentFilters[field];
-            if (value) params.append(field, value);
+        const response = await fetch(query ? `/api/summary?${query}` : '/api/summary', {
+            signal: controller.signal
         });
-        const query = params.toString();
-        const response = await fetch(query ? `/api/summary?${query}` : '/api/summary');
         if (!response.ok) {
             throw new Error('No se pudo obtener el resumen');
         }
         const data = await response.json();
-        renderSelectFilters(data.filters || {});
-        renderDateFilters(data.date_filters || {});
-        renderNameFilter(data.name_filter || '');
-        renderHostnameFilter(data.hostname_filter || '');
-        renderEstadoFilter(data.estado_filter || '', data.estado_options || []);
-        renderFaseFilter(data.fase_filter || '', data.fase_options || {});
-        renderFaseCounts(data.fase_counts || {});
-        renderMetrics(data);
-        renderCharts(data);
-        renderSchedule(data.schedule, data.schedule_brands || {});
-        renderAlerts(data);
-        renderTable(data.recent_updates);
+        summaryCache.set(query, data);
+        renderSummary(data);
     } catch (err) {
-        console.error(err);
+        if (err.name !== 'AbortError') console.error(err);
+    } finally {
+        if (summaryController === controller) summaryController = null;
     }
 }
 
+function renderSummary(data) {
+    renderSelectFilters(data.filters || {});
+    renderDateFilters(data.date_filters || {});
+    renderNameFilter(data.name_filter || '');
+    renderHostnameFilter(data.hostname_filter || '');
+    renderEstadoFilter(data.estado_filter || '', data.estado_options || []);
+    renderFaseFilter(data.fase_filter || '', data.fase_options || {});
+    renderFaseCounts(data.fase_counts || {});
+    renderMetrics(data);
+    renderCharts(data);
+    renderSchedule(data.schedule, data.schedule_brands || {});
+    renderAlerts(data);
+    renderTable(data.recent_updates);
+}
+
 function renderSelectFilters(filters) {
     selectFilters.forEach((field) => {
         const select = document.getElementById(`filter-${field}`);
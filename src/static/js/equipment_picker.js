@@ -0,0 +1,104 @@
+const PICKER_DEBOUNCE_MS = 150;
+const PICKER_MIN_LENGTH = 2;
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.equipment-picker').forEach(initEquipmentPicker);
+});
+
+function equipmentLabel(item) {
+    const base = item.hostname || item.serial_num;
+    return item.nombre_completo ? `${base} - ${item.nombre_completo}` : base;
+}
+
+function initEquipmentPicker(picker) {
+    const input = picker.querySelector('input[type="text"]');
+    const hidden = picker.querySelector('input[type="hidden"]');
+    const results = picker.querySelector('.equipment-picker-results');
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', () => {
+        // Editar el texto descarta la seleccion anterior
+        if (hidden.value) {
+            hidden.value = '';
+            picker.dispatchEvent(new CustomEvent('equipment:selected', { detail: null }));
+        }
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            const term = input.value.trim();
+            if (term.length < PICKER_MIN_LENGTH) {
+                results.classList.remove('show');
+                return;
+            }
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            const url = `${picker.dataset.searchUrl}?q=${encodeURIComponent(term)}`;
+            fetch(url, { credentials: 'same-origin', signal: controller.signal })
+                .then((response) => {
+                    if (!response.ok) {
+                        throw new Error('Error al buscar equipos');
+                    }
+                    return response.json();
+                })
+                .then((data) => renderEquipment(picker, data))
+                .catch((error) => {
+                    if (error.name !== 'AbortError') {
+                        console.error(error);
+                    }
+                });
+        }, PICKER_DEBOUNCE_MS);
+    });
+
+    input.addEventListener('keydown', (event) => {
+        if (event.key === 'Escape') {
+            results.classList.remove('show');
+        } else if (event.key === 'Enter' && results.classList.contains('show')) {
+            const first = results.querySelector('button.dropdown-item');
+            if (first) {
+                event.preventDefault();
+                first.click();
+            }
+        }
+    });
+
+    document.addEventListener('click', (event) => {
+        if (!picker.contains(event.target)) {
+            results.classList.remove('show');
+        }
+    });
+}
+
+function renderEquipment(picker, data) {
+    const input = picker.querySelector('input[type="text"]');
+    const hidden = picker.querySelector('input[type="hidden"]');
+    const results = picker.querySelector('.equipment-picker-results');
+    results.replaceChildren();
+
+    if (!data.items.length) {
+        const empty = document.createElement('span');
+        empty.className = 'dropdown-item-text text-muted small';
+        empty.textContent = `Sin equipos para "${data.q}"`;
+        results.appendChild(empty);
+    }
+    data.items.forEach((item) => {
+        const option = document.createElement('button');
+        option.type = 'button';
+        option.className = 'dropdown-item';
+        const title = document.createElement('div');
+        title.textContent = equipmentLabel(item);
+        const serial = document.createElement('div');
+        serial.className = 'small text-muted';
+        serial.textContent = item.serial_num;
+        option.append(title, serial);
+        option.addEventListener('click', () => {
+            hidden.value = item.serial_num;
+            input.value = equipmentLabel(item);
+            results.classList.remove('show');
+            picker.dispatchEvent(new CustomEvent('equipment:selected', { detail: item }));
+        });
+        results.appendChild(option);
+    });
+    results.classList.add('show');
+}
@@ -0,0 +1,96 @@
+const SEARCH_DEBOUNCE_MS = 150;
+const SEARCH_MIN_LENGTH = 2;
+
+document.addEventListener('DOMContentLoaded', () => {
+    const container = document.getElementById('global-search');
+    if (container) {
+        initGlobalSearch(container);
+    }
+});
+
+function initGlobalSearch(container) {
+    const input = container.querySelector('input');
+    const results = container.querySelector('.global-search-results');
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            const term = input.value.trim();
+            if (term.length < SEARCH_MIN_LENGTH) {
+                results.classList.remove('show');
+                return;
+            }
+            // Solo importa la respuesta del ultimo termino escrito
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            const url = `${container.dataset.searchUrl}?q=${encodeURIComponent(term)}`;
+            fetch(url, { credentials: 'same-origin', signal: controller.signal })
+                .then((response) => {
+                    if (!response.ok) {
+                        throw new Error('Error en la busqueda');
+                    }
+                    return response.json();
+                })
+                .then((data) => renderSearchResults(results, data))
+                .catch((error) => {
+                    if (error.name !== 'AbortError') {
+                        console.error(error);
+                    }
+                });
+        }, SEARCH_DEBOUNCE_MS);
+    });
+
+    input.addEventListener('keydown', (event) => {
+        if (event.key === 'Escape') {
+            results.classList.remove('show');
+        } else if (event.key === 'Enter') {
+            const first = results.querySelector('a.dropdown-item');
+            if (first) {
+                event.preventDefault();
+                window.location.href = first.href;
+            }
+        }
+    });
+
+    document.addEventListener('click', (event) => {
+        if (!container.contains(event.target)) {
+            results.classList.remove('show');
+        }
+    });
+}
+
+function renderSearchResults(results, data) {
+    results.replaceChildren();
+    if (!data.groups.length) {
+        const empty = document.createElement('span');
+        empty.className = 'dropdown-item-text text-muted small';
+        empty.textContent = `Sin resultados para "${data.q}"`;
+        results.appendChild(empty);
+    }
+    data.groups.forEach((group) => {
+        const header = document.createElement('h6');
+        header.className = 'dropdown-header';
+        header.textContent = group.more ? `${group.label} (mostrando ${group.items.length})` : group.label;
+        results.appendChild(header);
+        group.items.forEach((item) => {
+            const entry = document.createElement(item.url ? 'a' : 'span');
+            entry.className = item.url ? 'dropdown-item' : 'dropdown-item-text';
+            if (item.url) {
+                entry.href = item.url;
+            }
+            const title = document.createElement('div');
+            title.className = 'fw-semibold';
+            title.textContent = item.title;
+            const subtitle = document.createElement('div');
+            subtitle.className = 'small text-muted';
+            subtitle.textContent = item.subtitle;
+            entry.append(title, subtitle);
+            results.appendChild(entry);
+        });
+    });
+    results.classList.add('show');
+}
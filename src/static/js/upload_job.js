@@ -0,0 +1,64 @@
+const JOB_POLL_MS = 1500;
+const FINISHED_STATUSES = ['DONE', 'FAILED'];
+const statusClasses = {
+    QUEUED: 'bg-secondary',
+    RUNNING: 'bg-primary',
+    DONE: 'bg-success',
+    FAILED: 'bg-danger'
+};
+
+document.addEventListener('DOMContentLoaded', () => {
+    const panel = document.getElementById('upload-job');
+    if (panel) {
+        pollJob(panel);
+    }
+});
+
+function pollJob(panel) {
+    fetch(panel.dataset.statusUrl, { credentials: 'same-origin' })
+        .then((response) => {
+            if (!response.ok) {
+                throw new Error('Error al consultar el trabajo');
+            }
+            return response.json();
+        })
+        .then((job) => {
+            renderJob(panel, job);
+            if (!FINISHED_STATUSES.includes(job.status)) {
+                setTimeout(() => pollJob(panel), JOB_POLL_MS);
+            }
+        })
+        .catch((error) => {
+            console.error(error);
+            setTimeout(() => pollJob(panel), JOB_POLL_MS * 4);
+        });
+}
+
+function renderJob(panel, job) {
+    ['rows_processed', 'inserted', 'updated', 'skipped', 'unchanged', 'removed', 'status_label'].forEach((field) => {
+        const element = panel.querySelector(`[data-job-field="${field}"]`);
+        if (element) {
+            element.textContent = job[field] ?? '-';
+        }
+    });
+
+    const badge = panel.querySelector('[data-job-field="status_label"]');
+    badge.className = `badge ${statusClasses[job.status] || 'bg-secondary'}`;
+
+    const errorBox = panel.querySelector('[data-job-field="error_message"]');
+    errorBox.textContent = job.error_message || '';
+    errorBox.classList.toggle('d-none', !job.error_message);
+
+    let percent = 0;
+    if (job.status === 'DONE') {
+        percent = 100;
+    } else if (job.total_rows) {
+        percent = Math.min(99, Math.round((job.rows_processed / job.total_rows) * 100));
+    }
+    const bar = panel.querySelector('[data-job-progress]');
+    bar.style.width = `${percent}%`;
+    bar.textContent = `${percent}%`;
+    bar.classList.toggle('bg-danger', job.status === 'FAILED');
+    bar.classList.toggle('progress-bar-striped', !FINISHED_STATUSES.includes(job.status));
+    bar.classList.toggle('progress-bar-animated', !FINISHED_STATUSES.includes(job.status));
+}
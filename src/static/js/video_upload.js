@@ -0,0 +1,114 @@
+// Subida reanudable del video de evidencia: se envia por partes y, si la
+// conexion se corta, continua desde el ultimo byte recibido por el servidor.
+const VIDEO_CHUNK_SIZE = 8 * 1024 * 1024;
+const VIDEO_MAX_RETRIES = 8;
+const VIDEO_RETRY_BASE_MS = 1000;
+
+document.addEventListener('DOMContentLoaded', () => {
+    const panel = document.querySelector('[data-video-upload-url]');
+    if (!panel || !window.fetch || !window.Blob || !Blob.prototype.slice) return;
+
+    const input = panel.querySelector('input[type="file"]');
+    const form = input.form;
+    form.addEventListener('submit', (event) => {
+        const file = input.files[0];
+        if (!file || form.dataset.videoUploaded === '1') return;
+        event.preventDefault();
+        uploadVideo(panel, file)
+            .then(() => {
+                // El video ya quedo asignado al registro; el formulario guarda el resto
+                input.value = '';
+                form.dataset.videoUploaded = '1';
+                form.submit();
+            })
+            .catch((error) => {
+                console.error(error);
+                setVideoStatus(panel, error.message, true);
+                toggleSubmit(form, false);
+            });
+    });
+});
+
+async function uploadVideo(panel, file) {
+    const form = panel.closest('form');
+    toggleSubmit(form, true);
+    setVideoStatus(panel, 'Preparando subida...');
+
+    const created = await fetch(panel.dataset.videoUploadUrl, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size })
+    });
+    const info = await created.json();
+    if (!created.ok) {
+        throw new Error(info.error || 'No se pudo iniciar la subida');
+    }
+
+    let offset = info.offset;
+    let retries = 0;
+    while (offset < file.size) {
+        renderVideoProgress(panel, offset, file.size);
+        try {
+            const response = await fetch(info.url, {
+                method: 'PATCH',
+                credentials: 'same-origin',
+                headers: {
+                    'Content-Type': 'application/offset+octet-stream',
+                    'Upload-Offset': String(offset)
+                },
+                body: file.slice(offset, offset + VIDEO_CHUNK_SIZE)
+            });
+            if (response.status === 204 || response.status === 409) {
+                // En un conflicto el servidor informa cuanto recibio realmente
+                offset = Number(response.headers.get('Upload-Offset'));
+                retries = 0;
+                continue;
+            }
+            const body = await response.json().catch(() => ({}));
+            throw new Error(body.error || `Error ${response.status} al subir el video`);
+        } catch (error) {
+            if (error instanceof TypeError && retries < VIDEO_MAX_RETRIES) {
+                // Corte de red: esperar y preguntar al servidor donde quedo
+                retries += 1;
+                setVideoStatus(panel, `Conexion interrumpida; reintentando (${retries}/${VIDEO_MAX_RETRIES})...`);
+                await new Promise((resolve) => setTimeout(resolve, VIDEO_RETRY_BASE_MS * 2 ** (retries - 1)));
+                offset = await fetchOffset(info.url, offset);
+                continue;
+            }
+            throw error;
+        }
+    }
+    renderVideoProgress(panel, file.size, file.size);
+    setVideoStatus(panel, 'Video subido correctamente');
+}
+
+async function fetchOffset(url, fallback) {
+    try {
+        const response = await fetch(url, { method: 'HEAD', credentials: 'same-origin' });
+        return response.ok ? Number(response.headers.get('Upload-Offset')) : fallback;
+    } catch (error) {
+        return fallback;
+    }
+}
+
+function renderVideoProgress(panel, offset, size) {
+    const percent = size ? Math.floor((offset / size) * 100) : 0;
+    const wrapper = panel.querySelector('[data-video-progress]');
+    wrapper.classList.remove('d-none');
+    const bar = wrapper.querySelector('.progress-bar');
+    bar.style.width = `${percent}%`;
+    bar.textContent = `${percent}%`;
+}
+
+function setVideoStatus(panel, message, isError = false) {
+    const status = panel.querySelector('[data-video-status]');
+    status.textContent = message;
+    status.classList.toggle('text-danger', isError);
+}
+
+function toggleSubmit(form, disabled) {
+    form.querySelectorAll('button[type="submit"]').forEach((button) => {
+        button.disabled = disabled;
+    });
+}
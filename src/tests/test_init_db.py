@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models.database import init_db, get_db  # noqa: E402
+
+# Esquema de la version anterior a las columnas derivadas (sin fase ni content_hash)
+OLD_SCHEMA = """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        role TEXT NOT NULL DEFAULT 'standard'
+    );
+    CREATE TABLE project_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_id TEXT UNIQUE,
+        ubicacion TEXT,
+        nom_sede TEXT,
+        categoria_trab TEXT,
+        nombre_completo TEXT,
+        perfil_imagen TEXT,
+        marca TEXT,
+        modelo TEXT,
+        serial_num TEXT,
+        hostname TEXT,
+        ip_equipo TEXT,
+        email_trabajo TEXT,
+        fecha_estado TEXT,
+        estado TEXT,
+        estado_coordinacion TEXT,
+        estado_upgrade TEXT,
+        fecha_programada TEXT,
+        fecha_ejecucion TEXT,
+        notas TEXT,
+        last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO project_records (record_id, nom_sede, categoria_trab, serial_num, estado)
+    VALUES ('R1', 'SEDE A', 'UPGRADE + WIN11', 'SN1', 'REALIZADO'),
+           ('R2', 'SEDE B', 'EQUIPO NUEVO', 'SN2', 'PENDIENTE');
+"""
+
+
+class InitDbUpgradeTest(unittest.TestCase):
+    """init_db sobre una base creada con el esquema anterior"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(OLD_SCHEMA)
+        conn.close()
+        self.app = create_app()
+        self.app.config["DATABASE"] = self.path
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.unlink(self.path + suffix)
+
+    def test_upgrades_existing_database(self):
+        with self.app.app_context():
+            init_db()
+            db = get_db()
+            phases = dict(db.execute("SELECT record_id, fase FROM project_records").fetchall())
+            self.assertEqual(phases, {"R1": "FASE_1", "R2": "FASE_3"})
+            hashes = db.execute("SELECT COUNT(*) FROM project_records WHERE content_hash IS NULL").fetchone()[0]
+            self.assertEqual(hashes, 0)
+            self.assertIsNotNone(db.execute("SELECT version FROM data_versions WHERE scope = 'project'").fetchone())
+
+    def test_is_idempotent(self):
+        with self.app.app_context():
+            init_db()
+            init_db()
+            count = get_db().execute("SELECT COUNT(*) FROM project_records").fetchone()[0]
+            self.assertEqual(count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
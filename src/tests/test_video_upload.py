@@ -0,0 +1,147 @@
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from models import blob_store, video_upload  # noqa: E402
+from models.blob_store import BlobStore  # noqa: E402
+from models.database import init_db, get_db  # noqa: E402
+from models.video_upload import VideoUpload  # noqa: E402
+
+VIDEO = b"0123456789" * 30
+OFFSET_STREAM = "application/offset+octet-stream"
+
+
+class CutStream(io.BytesIO):
+    """Cuerpo de un PATCH que se corta tras entregar sus bytes"""
+
+    def read(self, size=-1):
+        block = super().read(size)
+        if not block:
+            raise OSError("conexion cerrada por el cliente")
+        return block
+
+
+class ResumableVideoUploadTest(unittest.TestCase):
+    """Protocolo de subida reanudable de /destruccion/<id>/video/subidas"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        blobs_dir = Path(self.tmp) / "blobs"
+        (blobs_dir / "tmp").mkdir(parents=True)
+        for patcher in (
+            mock.patch.object(video_upload, "VIDEOS_DIR", Path(self.tmp)),
+            mock.patch.object(blob_store, "BLOBS_DIR", blobs_dir),
+            mock.patch.object(blob_store, "BLOBS_TMP_DIR", blobs_dir / "tmp"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.app = create_app()
+        self.app.config.update(
+            DATABASE=os.path.join(self.tmp, "test.db"),
+            INITIAL_ADMIN_PASSWORD="adminadmin",
+            JOB_WORKER_ENABLED=False,
+            TESTING=True,
+        )
+        with self.app.app_context():
+            init_db()
+            db = get_db()
+            self.old_video = BlobStore.put_stream(db, io.BytesIO(b"video anterior"))
+            self.destruction_id = db.execute(
+                "INSERT INTO disk_destructions (disco_serial, video_nombre, video_ruta) VALUES ('HDD1', 'a.mp4', ?)",
+                (self.old_video,),
+            ).lastrowid
+            db.commit()
+
+        self.client = self.app.test_client()
+        response = self.client.post("/login", data={"username": "admin", "password": "adminadmin"})
+        self.assertEqual(response.status_code, 302)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def create_upload(self):
+        response = self.client.post(f"/destruccion/{self.destruction_id}/video/subidas",
+                                    json={"filename": "evidencia.mp4", "size": len(VIDEO)})
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["url"]
+
+    def patch(self, url, offset, body):
+        return self.client.patch(url, data=body, content_type=OFFSET_STREAM,
+                                 headers={"Upload-Offset": str(offset)})
+
+    def video_path(self):
+        with self.app.app_context():
+            return get_db().execute(
+                "SELECT video_ruta FROM disk_destructions WHERE id = ?", (self.destruction_id,)
+            ).fetchone()[0]
+
+    def test_offset_mismatch_is_conflict(self):
+        url = self.create_upload()
+        self.assertEqual(self.patch(url, 0, VIDEO[:100]).status_code, 204)
+
+        response = self.patch(url, 50, VIDEO[50:150])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers["Upload-Offset"], "100")
+
+    def test_oversize_part_is_truncated(self):
+        url = self.create_upload()
+        self.assertEqual(self.patch(url, 0, VIDEO[:100]).status_code, 204)
+
+        response = self.patch(url, 100, VIDEO[100:] + b"extra")
+        self.assertEqual(response.status_code, 413)
+        # Se descarta la parte completa: el cliente la reenvia desde el offset anterior
+        self.assertEqual(response.headers["Upload-Offset"], "100")
+        self.assertEqual(self.client.head(url).headers["Upload-Offset"], "100")
+
+    def test_interrupted_patch_resumes(self):
+        url = self.create_upload()
+        with self.app.app_context():
+            db = get_db()
+            upload = VideoUpload.get_by_id(db, url.rsplit("/", 1)[1])
+            with self.assertRaises(OSError):
+                VideoUpload.append(db, upload, 0, CutStream(VIDEO[:120]))
+
+        response = self.client.head(url)
+        self.assertEqual(response.headers["Upload-Offset"], "120")
+        self.assertEqual(self.patch(url, 120, VIDEO[120:]).status_code, 204)
+        self.assertEqual(Path(self.video_path()).read_bytes(), VIDEO)
+
+    def test_finalize_replaces_previous_video(self):
+        url = self.create_upload()
+        response = self.patch(url, 0, VIDEO)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.headers["Upload-Offset"], str(len(VIDEO)))
+
+        new_path = self.video_path()
+        self.assertEqual(Path(new_path).read_bytes(), VIDEO)
+        self.assertFalse(os.path.exists(self.old_video))
+        self.assertEqual(self.patch(url, len(VIDEO), b"x").status_code, 409)
+
+    def test_failed_finalize_keeps_previous_video(self):
+        url = self.create_upload()
+        self.assertEqual(self.patch(url, 0, VIDEO[:100]).status_code, 204)
+        with self.app.app_context():
+            db = get_db()
+            upload = VideoUpload.get_by_id(db, url.rsplit("/", 1)[1])
+            failure = sqlite3.OperationalError("database is locked")
+            with mock.patch.object(video_upload.DiskDestruction, "update", side_effect=failure):
+                with self.assertRaises(sqlite3.OperationalError):
+                    VideoUpload.append(db, upload, 100, io.BytesIO(VIDEO[100:]))
+            db.rollback()
+
+        self.assertEqual(self.video_path(), self.old_video)
+        self.assertTrue(os.path.exists(self.old_video))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,8 @@
 from utils.helpers import normalize_header, normalize_date, coerce_iso_date
-from utils.decorators import login_required, admin_required
+from utils.decorators import login_required, admin_required, etag_versioned
+from utils.ingest import read_csv_rows, chunked
 
-__all__ = ['normalize_header', 'normalize_date', 'coerce_iso_date', 'login_required', 'admin_required']
+__all__ = [
+    'normalize_header', 'normalize_date', 'coerce_iso_date', 'login_required', 'admin_required',
+    'etag_versioned', 'read_csv_rows', 'chunked',
+]
@@ -1,5 +1,10 @@
+import hashlib
+import json
 from functools import wraps
-from flask import g, flash, redirect, url_for
+from flask import g, flash, redirect, url_for, request, make_response, current_app
+
+from models.database import get_db
+from models.cache import DataVersion
 
 
 def login_required(view):
@@ -20,3 +25,29 @@ def admin_required(view):
             return redirect(url_for("dashboard.index"))
         return view(**kwargs)
     return wrapped_view
+
+
+def etag_versioned(*scopes):
+    """Agrega un ETag fuerte basado en la version de los datos y los parametros.
+
+    Si el cliente envia un If-None-Match vigente se responde 304 sin ejecutar
+    la vista, a costa de una sola lectura de data_versions.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped_view(**kwargs):
+            version = DataVersion.token(get_db(), *scopes)
+            raw = json.dumps([request.path, sorted(request.args.items(multi=True)), version])
+            etag = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+            if etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapped_view
+    return decorator
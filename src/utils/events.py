@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from flask import Flask
+
+from models.database import connect
+
+# Conjuntos de datos (DataVersion) que se pueden suscribir por /api/events
+EVENT_SCOPES = ("project", "inventory", "conformity", "repotentiation", "destruction", "progress")
+
+
+class VersionWatcher:
+    """Hilo por proceso que detecta escrituras de cualquier worker y publica las
+    versiones nuevas de data_versions a los clientes SSE del proceso.
+
+    Usa PRAGMA data_version en una conexion propia: cambia cuando otra conexion
+    (de este u otro proceso) confirma una escritura en el archivo, y no lee
+    ninguna tabla. Solo entonces se consulta data_versions. El costo es una
+    consulta trivial por intervalo y por worker, sin importar cuantos clientes
+    esten conectados.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._versions: Dict[str, int] = {}
+        self._sequence = 0
+
+    def ensure_started(self, app: Flask) -> None:
+        """Arranca el hilo en este proceso si aun no corre (tambien tras un fork)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            conn = connect(app.config["DATABASE"], app.config, check_same_thread=False)
+            self._versions = self._read_versions(conn)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop, args=(app, conn), name="data-version-watcher", daemon=True
+            )
+            self._thread.start()
+
+    @staticmethod
+    def _read_versions(conn: sqlite3.Connection) -> Dict[str, int]:
+        try:
+            rows = conn.execute("SELECT scope, version FROM data_versions").fetchall()
+        except sqlite3.OperationalError:
+            return {}
+        finally:
+            # Sin transaccion abierta, para no retener una instantanea vieja en WAL
+            if conn.in_transaction:
+                conn.rollback()
+        return {row["scope"]: row["version"] for row in rows}
+
+    def _loop(self, app: Flask, conn: sqlite3.Connection) -> None:
+        interval = app.config.get("EVENTS_POLL_INTERVAL", 0.5)
+        last_data_version = None
+        while True:
+            try:
+                data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version != last_data_version:
+                    last_data_version = data_version
+                    versions = self._read_versions(conn)
+                    if versions != self._versions:
+                        with self._changed:
+                            self._versions = versions
+                            self._sequence += 1
+                            self._changed.notify_all()
+            except sqlite3.Error:
+                app.logger.exception("Error al consultar data_versions para eventos")
+            time.sleep(interval)
+
+    def snapshot(self) -> Tuple[int, Dict[str, int]]:
+        with self._changed:
+            return self._sequence, dict(self._versions)
+
+    def wait(self, sequence: int, timeout: float) -> Tuple[int, Dict[str, int]]:
+        """Espera hasta que haya versiones posteriores a `sequence` o venza `timeout`"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._sequence != sequence, timeout)
+            return self._sequence, dict(self._versions)
+
+
+version_watcher = VersionWatcher()
+
+
+def _event(name: str, payload: Dict, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {name}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(payload, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def version_events(scopes: Sequence[str], heartbeat: float, max_age: float,
+                   retry_ms: int = 3000) -> Iterator[str]:
+    """Flujo SSE: un evento `version` al conectar y cada vez que cambia la
+    version de alguno de `scopes`, y un comentario cada `heartbeat` segundos
+    para mantener viva la conexion a traves de proxies.
+
+    Se cierra tras `max_age` segundos; EventSource reconecta solo, lo que
+    libera periodicamente los hilos del worker.
+    """
+    sequence, versions = version_watcher.snapshot()
+    current = {scope: versions.get(scope, 0) for scope in scopes}
+    yield f"retry: {retry_ms}\n\n"
+    yield _event("version", current, sequence)
+
+    deadline = time.monotonic() + max_age
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        new_sequence, versions = version_watcher.wait(sequence, min(heartbeat, remaining))
+        if new_sequence == sequence:
+            yield ": ping\n\n"
+            continue
+        sequence = new_sequence
+        latest = {scope: versions.get(scope, 0) for scope in scopes}
+        if latest != current:
+            current = latest
+            yield _event("version", current, sequence)
@@ -0,0 +1,347 @@
+import csv
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from flask import Response, abort, stream_with_context
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet requiere pyarrow (requirements.txt)
+    pyarrow = None
+
+# Filas leidas por fetchmany y bytes acumulados antes de enviar un bloque
+EXPORT_FETCH_SIZE = 1000
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+# Bytes leidos por bloque de cada archivo agregado a un ZIP de evidencias
+ZIP_READ_SIZE = 256 * 1024
+
+# Columnas que iter_zip_bundle agrega a cada fila del manifiesto
+ZIP_MANIFEST_COLUMNS = ["Archivo en ZIP", "Bytes", "SHA-256", "Estado"]
+
+# Filas por row group en Parquet
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Caracteres de control no permitidos en XML 1.0
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def iter_cursor(cursor: sqlite3.Cursor, size: int = EXPORT_FETCH_SIZE) -> Iterator[sqlite3.Row]:
+    """Recorre un cursor en bloques de fetchmany"""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_csv(headers: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Genera el CSV en bloques de bytes UTF-8 de ~EXPORT_FLUSH_BYTES"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_FLUSH_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_csv_gzip(headers: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """CSV comprimido con gzip, bloque a bloque"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: cabecera gzip
+    for block in iter_csv(headers, rows):
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _StreamSink(io.RawIOBase):
+    """Destino no posicionable que acumula lo escrito hasta que se drena"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Datos" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value) -> str:
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_XML_ILLEGAL.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Sequence) -> str:
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+
+def iter_xlsx(headers: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Libro XLSX de una hoja generado por streaming.
+
+    Las celdas de texto van como inlineStr (sin tabla de strings compartidos,
+    que obligaria a mantener todo en memoria) y el ZIP se escribe sobre un
+    destino no posicionable, con descriptores de datos tras cada entrada.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _XLSX_WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            sheet.write(_xlsx_row(headers).encode("utf-8"))
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode("utf-8"))
+                if sink.size >= EXPORT_FLUSH_BYTES:
+                    yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+
+def _as_int(value) -> Optional[int]:
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def _as_float(value) -> Optional[float]:
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+# Tipos de columna de las exportaciones: (tipo pyarrow, conversion de cada valor)
+_PARQUET_TYPES = {
+    "int": ("int64", _as_int),
+    "float": ("float64", _as_float),
+    "text": ("string", _as_text),
+}
+
+
+def column_types_from_schema(columns: Iterable[sqlite3.Row]) -> Dict[str, str]:
+    """Tipos de exportacion segun la afinidad de SQLite de cada columna (PRAGMA table_info)"""
+    types = {}
+    for column in columns:
+        declared = (column["type"] or "").upper()
+        if "INT" in declared:
+            types[column["name"]] = "int"
+        elif any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+            types[column["name"]] = "float"
+    return types
+
+
+def iter_parquet(headers: Sequence[str], rows: Iterable[Sequence],
+                 column_types: Dict[str, str] = None) -> Iterator[bytes]:
+    """Archivo Parquet escrito por row groups.
+
+    `column_types` asigna "int" o "float" a las columnas numericas; el resto
+    se guarda como texto (SQLite no garantiza un tipo por columna y el esquema
+    se fija antes de leer las filas). En una columna numerica los valores que
+    no son numeros quedan nulos.
+    """
+    column_types = column_types or {}
+    kinds = [_PARQUET_TYPES[column_types.get(str(name), "text")] for name in headers]
+    schema = pyarrow.schema([(str(name), getattr(pyarrow, kind)()) for name, (kind, _) in zip(headers, kinds)])
+    sink = _StreamSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="snappy")
+
+    def write_group(batch: List[Sequence]) -> None:
+        arrays = [
+            pyarrow.array([convert(row[i]) for row in batch], type=schema.field(i).type)
+            for i, (_kind, convert) in enumerate(kinds)
+        ]
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= PARQUET_ROW_GROUP_SIZE:
+            write_group(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_group(batch)
+    writer.close()
+    yield sink.drain()
+
+
+def iter_zip_bundle(entries: Iterable[Tuple[str, Optional[str], Sequence]],
+                    manifest_name: str, manifest_headers: Sequence[str]) -> Iterator[bytes]:
+    """ZIP de archivos en disco generado por streaming, con un manifiesto CSV al final.
+
+    `entries` entrega (nombre en el ZIP, ruta, fila del manifiesto). Cada
+    archivo se copia por bloques de ZIP_READ_SIZE sin comprimir (PDF y video
+    ya lo estan) y se envia cada EXPORT_FLUSH_BYTES, por lo que la memoria no
+    depende del tamano de los archivos; solo el manifiesto (una fila por
+    archivo) se mantiene hasta el final. Los archivos que faltan en disco
+    quedan en el manifiesto como NO ENCONTRADO.
+    """
+    sink = _StreamSink()
+    manifest = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for arcname, path, row in entries:
+            try:
+                source = open(path, "rb")
+            except (OSError, TypeError):
+                manifest.append([*row, "", "", "", "NO ENCONTRADO"])
+                continue
+            with source:
+                stat = os.fstat(source.fileno())
+                info = zipfile.ZipInfo(arcname, datetime.fromtimestamp(stat.st_mtime).timetuple()[:6])
+                info.file_size = stat.st_size
+                digest = hashlib.sha256()
+                with archive.open(info, "w") as target:
+                    for block in iter(lambda: source.read(ZIP_READ_SIZE), b""):
+                        digest.update(block)
+                        target.write(block)
+                        if sink.size >= EXPORT_FLUSH_BYTES:
+                            yield sink.drain()
+            manifest.append([*row, arcname, stat.st_size, digest.hexdigest(), "INCLUIDO"])
+
+        info = zipfile.ZipInfo(manifest_name, datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, "w") as target:
+            for block in iter_csv([*manifest_headers, *ZIP_MANIFEST_COLUMNS], manifest):
+                target.write(block)
+                if sink.size >= EXPORT_FLUSH_BYTES:
+                    yield sink.drain()
+    yield sink.drain()
+
+
+def zip_entry_name(*parts) -> str:
+    """Ruta dentro de un ZIP a partir de valores de la base (sin separadores ni vacios)"""
+    cleaned = []
+    for part in parts:
+        text = str(part or "").strip().replace("/", "_").replace("\\", "_")
+        cleaned.append(text.strip(".") or "SIN_DATO")
+    return "/".join(cleaned)
+
+
+# Formatos de exportacion: (extension, mimetype, generador)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "csv": ("csv", "text/csv", iter_csv),
+    "csv.gz": ("csv.gz", "application/gzip", iter_csv_gzip),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", iter_xlsx),
+    "parquet": ("parquet", "application/vnd.apache.parquet", iter_parquet),
+}
+
+
+def available_export_formats() -> List[str]:
+    """Formatos que se pueden generar en esta instalacion"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pyarrow is not None]
+
+
+def export_filename(prefix: str, extension: str = "csv") -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{prefix}_{timestamp}.{extension}"
+
+
+def export_response(prefix: str, headers: List[str], rows: Iterable[Sequence],
+                    fmt: str = "csv", column_types: Dict[str, str] = None) -> Response:
+    """Respuesta de exportacion por streaming en el formato pedido; el contexto
+    del request (y su conexion) sigue activo hasta que se envia el ultimo bloque.
+
+    `column_types` ("int" o "float" por encabezado) solo se usa en Parquet, el
+    unico formato con un tipo por columna.
+    """
+    fmt = (fmt or "csv").lower()
+    if fmt not in available_export_formats():
+        abort(400, description=f"Formato de exportacion no soportado: {fmt}")
+    extension, mimetype, encoder = EXPORT_FORMATS[fmt]
+    chunks = iter_parquet(headers, rows, column_types) if encoder is iter_parquet else encoder(headers, rows)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={export_filename(prefix, extension)}"},
+    )
+
+
+def csv_response(prefix: str, headers: List[str], rows: Iterable[Sequence]) -> Response:
+    """Respuesta CSV por streaming"""
+    return export_response(prefix, headers, rows, "csv")
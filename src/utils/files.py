@@ -0,0 +1,59 @@
+import mimetypes
+import os
+from pathlib import Path
+from urllib.parse import quote
+
+from flask import current_app, request
+from werkzeug.utils import send_file as werkzeug_send_file
+
+from config import BASE_DIR
+
+# Raiz de los archivos subidos; con X-Accel-Redirect las rutas se envian relativas a ella
+UPLOADS_ROOT = BASE_DIR / "uploads"
+
+# Las evidencias requieren sesion: ningun cache compartido debe guardarlas, y el
+# navegador revalida con If-None-Match / If-Modified-Since (304 sin cuerpo)
+EVIDENCE_CACHE_CONTROL = "private, no-cache"
+
+
+def _accel_path(path: Path) -> str:
+    """Ruta para X-Accel-Redirect, o "" si el archivo esta fuera de UPLOADS_ROOT"""
+    try:
+        relative = path.resolve().relative_to(UPLOADS_ROOT.resolve())
+    except ValueError:
+        return ""
+    prefix = current_app.config.get("EVIDENCE_ACCEL_PREFIX", "/protected-uploads/").rstrip("/")
+    return f"{prefix}/{quote(relative.as_posix())}"
+
+
+def send_evidence(file_path: str, mimetype: str = None, as_attachment: bool = False,
+                  download_name: str = None):
+    """Entrega un video o acta con soporte de Range, ETag/Last-Modified y 304.
+
+    Segun EVIDENCE_DELIVERY, la transmision se delega al proxy (X-Accel-Redirect
+    o X-Sendfile) para no ocupar un hilo de gunicorn durante toda la descarga;
+    el proxy resuelve entonces los rangos y las validaciones condicionales.
+    """
+    path = Path(file_path)
+    delivery = current_app.config.get("EVIDENCE_DELIVERY", "")
+    download_name = download_name or path.name
+
+    accel = _accel_path(path) if delivery == "x-accel" else ""
+    if accel:
+        response = current_app.response_class()
+        response.headers["X-Accel-Redirect"] = accel
+        response.headers["Content-Type"] = (
+            mimetype or mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+        )
+        disposition = "attachment" if as_attachment else "inline"
+        response.headers["Content-Disposition"] = f"{disposition}; filename*=UTF-8''{quote(download_name)}"
+    else:
+        # send_file ya responde 206 a Range y 304 a If-None-Match/If-Modified-Since;
+        # con X-Sendfile responde solo los encabezados y el servidor envia el archivo
+        response = werkzeug_send_file(
+            os.fspath(path), request.environ, mimetype=mimetype, as_attachment=as_attachment,
+            download_name=download_name, conditional=True, etag=True,
+            use_x_sendfile=delivery == "x-sendfile", response_class=current_app.response_class,
+        )
+    response.headers["Cache-Control"] = EVIDENCE_CACHE_CONTROL
+    return response
@@ -0,0 +1,49 @@
+import csv
+import io
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.helpers import normalize_header
+
+
+def read_csv_rows(stream: BinaryIO, field_map: Dict[str, str], skip_empty: bool = True,
+                  encoding: str = "utf-8-sig") -> Iterator[Tuple[int, Dict[str, Optional[str]]]]:
+    """Lee un CSV subido fila a fila, decodificando de forma incremental.
+
+    Los encabezados se mapean una sola vez con `field_map`; cada fila se
+    entrega como (numero de linea, {campo: valor sin espacios}). Con
+    `skip_empty` se omiten los valores vacios. Un error de codificacion se
+    propaga como UnicodeDecodeError al llegar a la linea afectada.
+    """
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    try:
+        reader = csv.reader(text)
+        headers = next(reader, [])
+        columns = []
+        for index, header in enumerate(headers):
+            key = field_map.get(normalize_header(header))
+            if key:
+                columns.append((index, key))
+
+        for values in reader:
+            if not values:
+                continue
+            row = {}
+            for index, key in columns:
+                value = values[index].strip() if index < len(values) else None
+                if value or not skip_empty:
+                    row[key] = value
+            yield reader.line_num, row
+    finally:
+        # No cerrar el stream de la subida junto con el envoltorio de texto
+        text.detach()
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Agrupa un iterable en listas de hasta `size` elementos"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
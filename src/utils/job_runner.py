@@ -0,0 +1,147 @@
+import os
+import socket
+import threading
+from itertools import islice
+from pathlib import Path
+
+from flask import Flask
+
+from config import CSV_FIELD_MAP, BULK_CHUNK_SIZE
+from models.database import get_db
+from models.project import ProjectRecord
+from models.progress import ProgressSnapshot
+from models.upload_job import JobLost, UploadJob
+from utils.ingest import read_csv_rows, chunked
+
+
+def process_progress_job(db, job) -> None:
+    """Procesa un CSV de avances por lotes, confirmando datos y avance juntos.
+
+    Si el trabajo se reanuda tras un reinicio, se omiten las filas ya
+    confirmadas (`rows_processed`). En modo delta las filas sin cambios no se
+    escriben y al final se cuentan (y opcionalmente marcan) los registros que
+    no vinieron en el archivo.
+    """
+    delta = job["mode"] == "delta"
+    with open(job["file_path"], "rb") as stream:
+        rows = read_csv_rows(stream, CSV_FIELD_MAP, skip_empty=False)
+        try:
+            for chunk in chunked(islice(rows, job["rows_processed"], None), BULK_CHUNK_SIZE):
+                normalized = [ProjectRecord.normalize_upload_row(row) for _, row in chunk]
+                valid = [row for row in normalized if row is not None]
+                counts = ProjectRecord.apply_upload_chunk(db, valid, delta=delta)
+                UploadJob.record_progress(
+                    db, job["id"], job["worker"], len(chunk), counts["inserted"], counts["updated"],
+                    len(normalized) - len(valid), unchanged=counts["unchanged"],
+                )
+                db.commit()
+        finally:
+            rows.close()
+
+    if delta and job["removed"] is None:
+        # Segunda lectura solo de los record_id; el archivo sigue en disco al reanudar
+        with open(job["file_path"], "rb") as stream:
+            id_map = {header: field for header, field in CSV_FIELD_MAP.items() if field == "record_id"}
+            rows = read_csv_rows(stream, id_map)
+            try:
+                record_ids = {row["record_id"] for _, row in rows if row.get("record_id")}
+            finally:
+                rows.close()
+        removed = ProjectRecord.absent_records(db, record_ids, mark=bool(job["mark_missing"]))
+        UploadJob.record_removed(db, job["id"], job["worker"], removed)
+        db.commit()
+
+    # Actualiza la foto de avance del dia con el resultado de la carga
+    ProgressSnapshot.capture(db)
+
+
+# Procesador de cada tipo de trabajo
+JOB_HANDLERS = {
+    "avances": process_progress_job,
+}
+
+
+class JobRunner:
+    """Hilo de fondo por proceso que toma y ejecuta los trabajos de upload_jobs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def worker_id(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def ensure_started(self, app: Flask) -> None:
+        """Arranca el hilo en este proceso si aun no corre (tambien tras un fork)"""
+        if not app.config.get("JOB_WORKER_ENABLED"):
+            return
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop, args=(app,), name="upload-job-runner", daemon=True
+            )
+            self._thread.start()
+
+    def notify(self) -> None:
+        """Despierta al hilo para que revise la cola sin esperar el intervalo"""
+        self._wakeup.set()
+
+    def _loop(self, app: Flask) -> None:
+        interval = app.config.get("JOB_POLL_INTERVAL", 2)
+        while True:
+            try:
+                ran = self.run_once(app)
+            except Exception:
+                app.logger.exception("Error en el runner de trabajos de carga")
+                ran = False
+            if not ran:
+                self._wakeup.wait(interval)
+                self._wakeup.clear()
+
+    def run_once(self, app: Flask) -> bool:
+        """Ejecuta un trabajo pendiente; retorna False si la cola estaba vacia"""
+        with app.app_context():
+            db = get_db()
+            job = UploadJob.claim_next(db, self.worker_id, app.config.get("JOB_STALE_AFTER", 120),
+                                       app.config.get("JOB_MAX_ATTEMPTS", 3))
+            if job is None:
+                return False
+
+            handler = JOB_HANDLERS.get(job["kind"])
+            if handler is None:
+                self._close(db, job, "FAILED", f"Tipo de trabajo desconocido: {job['kind']}")
+                return True
+
+            app.logger.info("Procesando trabajo de carga %s (%s)", job["id"], job["kind"])
+            try:
+                handler(db, job)
+            except JobLost:
+                # El otro worker continua desde el ultimo lote confirmado; el archivo sigue siendo suyo
+                db.rollback()
+                app.logger.warning("Trabajo de carga %s retomado por otro worker", job["id"])
+            except UnicodeDecodeError:
+                db.rollback()
+                self._close(db, job, "FAILED", "No se pudo decodificar el archivo. Usa UTF-8.")
+            except Exception as exc:
+                db.rollback()
+                app.logger.exception("Fallo el trabajo de carga %s", job["id"])
+                self._close(db, job, "FAILED", str(exc))
+            else:
+                self._close(db, job, "DONE")
+            return True
+
+    @staticmethod
+    def _close(db, job, status: str, error_message: str = None) -> None:
+        """Cierra el trabajo y borra su CSV: ni uno completado ni uno fallido se reanuda"""
+        if UploadJob.finish(db, job["id"], job["worker"], status, error_message):
+            Path(job["file_path"]).unlink(missing_ok=True)
+
+
+job_runner = JobRunner()
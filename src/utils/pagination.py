@@ -0,0 +1,28 @@
+from typing import Dict, Mapping, Sequence
+
+from models.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def page_args(args: Mapping, sort_keys: Sequence[str], default_sort: str,
+              default_order: str = "desc") -> Dict:
+    """Argumentos de get_page tomados del query string (sort, order, limit, after, before)"""
+    sort = args.get("sort", default_sort)
+    order = args.get("order", default_order)
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return {
+        "sort": sort if sort in sort_keys else default_sort,
+        "descending": order == "desc",
+        "limit": max(1, min(limit, MAX_PAGE_SIZE)),
+        "after": args.get("after") or None,
+        "before": args.get("before") or None,
+    }
+
+
+def page_params(page: Dict, **filters) -> Dict:
+    """Parametros del listado que se conservan al paginar u ordenar"""
+    params = {key: value for key, value in filters.items() if value}
+    params.update(sort=page["sort"], order=page["order"], limit=page["limit"])
+    return params